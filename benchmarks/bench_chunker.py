@@ -0,0 +1,59 @@
+"""
+Scaling benchmark for chunk_rawdoc: time per character should stay flat
+as documents grow (linear behaviour), up to 10M characters.
+
+    python -m benchmarks.bench_chunker --sizes 100000 1000000 10000000
+"""
+from __future__ import annotations
+import argparse
+import random
+import time
+from typing import List
+
+from services.ingest.chunk.chunker import chunk_rawdoc
+from services.ingest.chunk.tokenizer import get_tokenizer
+from services.ingest.pdf_reader import PageText, RawDoc
+
+WORDS = "retrieval augmented generation vector index naïve café 漢字 chunk overlap token page".split()
+PAGE_CHARS = 3_000
+
+
+def make_doc(n_chars: int, seed: int = 0) -> RawDoc:
+    rng = random.Random(seed)
+    pages: List[PageText] = []
+    remaining = n_chars
+    while remaining > 0:
+        words: List[str] = []
+        size = 0
+        while size < min(PAGE_CHARS, remaining):
+            w = rng.choice(WORDS)
+            words.append(w)
+            size += len(w) + 1
+        text = " ".join(words)
+        pages.append(PageText(page_no=len(pages) + 1, raw_text="", text=text))
+        remaining -= len(text)
+    return RawDoc(
+        doc_id="bench", source_type="pdf", source_value="bench.pdf", mime="application/pdf",
+        fetched_at="", content_hash="", meta={}, pages=pages,
+    )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 3_000_000, 10_000_000])
+    ap.add_argument("--tokenizer", default="cl100k_base")
+    args = ap.parse_args()
+
+    get_tokenizer(args.tokenizer).token_byte_lengths([0])  # warm the encoding and byte-length table
+
+    print(f"{'chars':>12} {'pages':>7} {'chunks':>7} {'seconds':>9} {'us/1k chars':>12}")
+    for n in args.sizes:
+        doc = make_doc(n)
+        t0 = time.perf_counter()
+        chunked = chunk_rawdoc(doc, tokenizer_name=args.tokenizer)
+        dt = time.perf_counter() - t0
+        print(f"{n:>12,} {len(doc.pages):>7} {len(chunked.chunks):>7} {dt:>9.3f} {dt / n * 1e9:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
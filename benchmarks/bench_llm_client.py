@@ -0,0 +1,109 @@
+"""
+Per-request HTTP overhead of the LLM client: a new httpx.Client per call
+(the old behaviour) against OpenAICompatibleClient's pooled, keep-alive
+client.
+
+A local stub server answers every chat completion immediately, so the
+timings are pure client + connection overhead. Loopback has no network
+latency or TLS, so real endpoints see a larger gap; pass --url to measure
+against one (it must accept the dummy key or --api-key).
+
+    python -m benchmarks.bench_llm_client --requests 500
+    python -m benchmarks.bench_llm_client --url https://api.example.com/v1 --api-key $KEY --requests 20
+"""
+from __future__ import annotations
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional
+
+import httpx
+import numpy as np
+
+from services.llm.openai_compat import OpenAICompatibleClient
+
+_MESSAGES = [{"role": "user", "content": "ping"}]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # headers and body are separate writes
+    body = json.dumps({"choices": [{"message": {"content": "pong"}}]}).encode()
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+
+def start_stub() -> tuple[ThreadingHTTPServer, str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def per_call_client(base_url: str, api_key: str, model: str) -> Callable[[], None]:
+    def call() -> None:
+        with httpx.Client(timeout=60.0) as client:
+            r = client.post(
+                f"{base_url}/chat/completions",
+                headers={"Authorization": f"Bearer {api_key}"},
+                json={"model": model, "messages": _MESSAGES, "temperature": 0.2, "max_tokens": 500},
+            )
+            r.raise_for_status()
+            r.json()
+    return call
+
+
+def latencies(fn: Callable[[], object], n: int, warmup: int = 3) -> List[float]:
+    for _ in range(warmup):
+        fn()
+    out: List[float] = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        out.append(time.perf_counter() - t0)
+    return out
+
+
+def report(label: str, samples: List[float]) -> float:
+    ms = np.asarray(samples) * 1000
+    p50, p95 = np.percentile(ms, [50, 95])
+    print(f"{label:<28} p50 {p50:8.2f} ms   p95 {p95:8.2f} ms   mean {ms.mean():8.2f} ms")
+    return float(p50)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--requests", type=int, default=200)
+    ap.add_argument("--url", default=None, help="OpenAI-compatible base URL; default: local stub server")
+    ap.add_argument("--api-key", default="bench")
+    ap.add_argument("--model", default="bench")
+    ap.add_argument("--http2", action="store_true")
+    args = ap.parse_args(argv)
+
+    server = None
+    base_url = args.url
+    if base_url is None:
+        server, base_url = start_stub()
+    try:
+        before = report("new client per request", latencies(per_call_client(base_url, args.api_key, args.model), args.requests))
+        with OpenAICompatibleClient(base_url=base_url, api_key=args.api_key, model=args.model, http2=args.http2) as llm:
+            after = report("pooled client", latencies(lambda: llm.chat(_MESSAGES), args.requests))
+        print(f"per-request overhead saved (p50): {before - after:.2f} ms")
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Micro-benchmark: reference DEFAULT_PIPELINE vs the fused normalize_texts.
+
+    python -m benchmarks.bench_normalize --pages 5000
+"""
+from __future__ import annotations
+import argparse
+import random
+import time
+from typing import Callable, List
+
+from services.ingest.normalize.cleaner import DEFAULT_PIPELINE, normalize_texts
+
+WORDS = (
+    "the quick brown fox jumps over lazy dog infor- mation configu- ration "
+    "• item 1. step 2) “quoted” it’s – — naïve ﬁle"
+).split()
+
+
+def make_pages(n_pages: int, lines_per_page: int = 50, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    pages: List[str] = []
+    for _ in range(n_pages):
+        lines: List[str] = []
+        for _ in range(lines_per_page):
+            line = " ".join(rng.choice(WORDS) for _ in range(12))
+            lines.append(line + rng.choice(["", " ", "\t", "-"]))
+            if rng.random() < 0.1:
+                lines.append("")
+        pages.append("\n".join(lines))
+    return pages
+
+
+def reference(texts: List[str]) -> List[str]:
+    out: List[str] = []
+    for text in texts:
+        for fn in DEFAULT_PIPELINE:
+            text = fn(text)
+        out.append(text)
+    return out
+
+
+def timed(fn: Callable[[List[str]], List[str]], pages: List[str], repeat: int) -> tuple[float, List[str]]:
+    best = float("inf")
+    result: List[str] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(pages)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=2000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    pages = make_pages(args.pages)
+    n_chars = sum(len(p) for p in pages)
+
+    t_ref, out_ref = timed(reference, pages, args.repeat)
+    t_fused, out_fused = timed(normalize_texts, pages, args.repeat)
+    assert out_ref == out_fused, "fused normalizer diverged from DEFAULT_PIPELINE"
+
+    print(f"pages={args.pages} chars={n_chars:,}")
+    print(f"pipeline : {t_ref:.3f}s  ({n_chars / t_ref / 1e6:.1f} M chars/s)")
+    print(f"fused    : {t_fused:.3f}s  ({n_chars / t_fused / 1e6:.1f} M chars/s)")
+    print(f"speedup  : {t_ref / t_fused:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Parity and single-query latency of the onnx backend (fp32 and int8) against
+sbert on CPU. Parity is the cosine similarity between the two backends'
+embeddings of the same texts; latency is one query per call, as on the
+Retriever path.
+
+    python -m benchmarks.bench_onnx_embedder --model sentence-transformers/all-MiniLM-L6-v2 --runs 200
+"""
+from __future__ import annotations
+import argparse
+import statistics
+import tempfile
+import time
+from typing import List
+
+import numpy as np
+
+from services.ingest.embed.factory import create_embedder
+from services.ingest.embed.interfaces import Embedder
+
+QUERIES = [
+    "What is retrieval augmented generation?",
+    "How does Qdrant store payloads next to vectors?",
+    "Summarise the chunking strategy used for PDF ingestion.",
+    "Which tokenizer counts tokens for the chunk size?",
+    "overlap",
+    "Explain why embeddings are L2-normalised before cosine search, and what happens to documents "
+    "that are longer than the model's maximum sequence length during ingestion.",
+]
+
+
+def latency_ms(embedder: Embedder, queries: List[str], runs: int) -> List[float]:
+    for q in queries:  # warm-up
+        embedder.embed_array([q])
+    out: List[float] = []
+    for i in range(runs):
+        q = queries[i % len(queries)]
+        t0 = time.perf_counter()
+        embedder.embed_array([q])
+        out.append((time.perf_counter() - t0) * 1e3)
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    ap.add_argument("--runs", type=int, default=200)
+    ap.add_argument("--model-dir", default=None, help="ONNX export directory (default: a temp dir)")
+    args = ap.parse_args()
+
+    model_dir = args.model_dir or tempfile.mkdtemp(prefix="onnx-bench-")
+    t0 = time.perf_counter()
+    backends = {"sbert": create_embedder("sbert", args.model, device="cpu")}
+    backends["onnx-fp32"] = create_embedder("onnx", args.model, model_dir=model_dir)
+    backends["onnx-int8"] = create_embedder("onnx", args.model, model_dir=model_dir, quantize=True)
+    print(f"load + export: {time.perf_counter() - t0:.1f}s ({model_dir})\n")
+
+    reference = backends["sbert"].embed_array(QUERIES)
+    print(f"{'backend':>10} {'min cos':>8} {'mean cos':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, emb in backends.items():
+        cos = np.sum(reference * emb.embed_array(QUERIES), axis=1)
+        lat = latency_ms(emb, QUERIES, args.runs)
+        p95 = statistics.quantiles(lat, n=20)[-1]
+        print(f"{name:>10} {cos.min():>8.4f} {cos.mean():>9.4f} {statistics.median(lat):>8.2f} {p95:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Upload throughput: sequential upsert_embedded_chunks against bulk_upsert
+at several concurrency levels, with and without wait=False.
+
+Against the in-memory client (default) this mostly measures client-side
+overhead; point --host at a running Qdrant container for network numbers,
+and add --grpc to use the gRPC transport.
+
+    python -m benchmarks.bench_qdrant_upsert --docs 50 --chunks 200
+    python -m benchmarks.bench_qdrant_upsert --host localhost --grpc --in-flight 1 4 8
+"""
+from __future__ import annotations
+import argparse
+import time
+from typing import Any, Callable, List
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+from services.ingest.embed.models import EmbedBatchResult
+from services.ingest.index.qdrant_client import bulk_upsert, connect_qdrant, ensure_collection, upsert_embedded_chunks
+from services.ingest.index.schemas import CollectionSpec
+
+
+def make_results(docs: int, chunks: int, dim: int, text_chars: int) -> List[EmbedBatchResult]:
+    rng = np.random.default_rng(0)
+    out: List[EmbedBatchResult] = []
+    for d in range(docs):
+        matrix = rng.normal(size=(chunks, dim)).astype(np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        out.append(EmbedBatchResult(
+            doc_id=f"bench-{d}",
+            model_name="bench",
+            matrix=matrix,
+            chunk_indices=list(range(chunks)),
+            payload_columns={
+                "chunk_index": list(range(chunks)),
+                "page_start": [1] * chunks,
+                "page_end": [1] * chunks,
+                "text": ["lorem ipsum " * (text_chars // 12)] * chunks,
+            },
+        ))
+    return out
+
+
+def timed(label: str, n: int, fn: Callable[[], Any]) -> None:
+    t0 = time.perf_counter()
+    fn()
+    dt = time.perf_counter() - t0
+    print(f"{label:<34} {dt:>8.2f}s {n / dt:>12,.0f} points/s")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default=None, help="Qdrant host; default is an in-memory client")
+    ap.add_argument("--port", type=int, default=6333)
+    ap.add_argument("--grpc", action="store_true")
+    ap.add_argument("--docs", type=int, default=20)
+    ap.add_argument("--chunks", type=int, default=200)
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--text-chars", type=int, default=1200)
+    ap.add_argument("--in-flight", type=int, nargs="+", default=[1, 4, 8])
+    args = ap.parse_args()
+
+    if args.host is None:
+        client: Any = QdrantClient(":memory:")
+    else:
+        client = connect_qdrant(args.host, args.port, prefer_grpc=args.grpc, pool_size=max(args.in_flight))
+    results = make_results(args.docs, args.chunks, args.dim, args.text_chars)
+    n = args.docs * args.chunks
+
+    def fresh(name: str) -> str:
+        if client.collection_exists(name):
+            client.delete_collection(name)
+        ensure_collection(client, CollectionSpec(name=name, vector_size=args.dim))
+        return name
+
+    name = fresh("bench_upsert")
+    timed("sequential (128/batch)", n, lambda: [upsert_embedded_chunks(client, name, r) for r in results])
+    for k in args.in_flight:
+        for wait in (True, False):
+            name = fresh("bench_upsert")
+            timed(
+                f"bulk in_flight={k} wait={wait}",
+                n,
+                lambda: bulk_upsert(client, name, results, max_in_flight=k, wait=wait),
+            )
+    client.delete_collection("bench_upsert")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+from __future__ import annotations
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Generic, Hashable, TypeVar
+import asyncio
+import threading
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """
+    Coalesces concurrent calls with the same key into one execution.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is in flight wait for and share its result, or its
+    exception. Nothing is cached: once the leader finishes, the next call
+    for that key runs again. `do` is for threads (e.g. sync FastAPI
+    endpoints), `ado` for coroutines on one event loop. With
+    `enabled=False` every call simply runs, but is still counted.
+    """
+
+    def __init__(self, *, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future[T]] = {}
+        self._tasks: Dict[Hashable, asyncio.Task[T]] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    def _count(self, leader: bool) -> None:
+        self.calls += 1
+        if leader:
+            self.executions += 1
+        else:
+            self.coalesced += 1
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        if not self.enabled:
+            with self._lock:
+                self._count(True)
+            return fn()
+        with self._lock:
+            fut = self._calls.get(key)
+            leader = fut is None
+            if fut is None:
+                fut = self._calls[key] = Future()
+            self._count(leader)
+        if not leader:
+            return fut.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        else:
+            fut.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        if not self.enabled:
+            with self._lock:
+                self._count(True)
+            return await fn()
+        with self._lock:
+            task = self._tasks.get(key)
+            leader = task is None
+            if task is None:
+                task = self._tasks[key] = asyncio.ensure_future(fn())
+                task.add_done_callback(lambda _: self._forget(key))
+            self._count(leader)
+        # shield: a caller that is cancelled (e.g. client disconnect) must not cancel the shared work
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable) -> None:
+        with self._lock:
+            self._tasks.pop(key, None)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls) + len(self._tasks)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "enabled": int(self.enabled),
+                "calls": self.calls,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls) + len(self._tasks),
+            }
@@ -1,24 +1,170 @@
 from fastapi import FastAPI, HTTPException, status, Depends
-from qdrant_client import QdrantClient
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from qdrant_client import AsyncQdrantClient, QdrantClient
+import asyncio
+import json
 import os
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from contextlib import asynccontextmanager
-from typing import AsyncIterator, Optional
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from services.api.app.coalesce import SingleFlight
+from services.chat.chat_service import ChatService
+from services.ingest.index.chunk_store import ChunkTextStore
+from services.ingest.manifest import IngestManifest
+from services.observability.metrics import REGISTRY
+from services.retriever import AsyncRetriever, RetrievalQuery, RetrievedChunk, Retriever
+from services.retriever.retriever import normalize_query_text
 
 
 class Health(BaseModel):
     status: str
 
+class ChatRequest(BaseModel):
+    question: str = Field(min_length=1)
+    top_k: int = Field(default=5, ge=1, le=50)
+    doc_id: Optional[str] = None
+
+class ChatResponse(BaseModel):
+    answer: str
+    sources: List[Dict[str, Any]]
+    retrieved: int
+    invalid_citations: List[str]
+    timings: Optional[Dict[str, float]] = None
+
+def build_text_store() -> Optional[ChunkTextStore]:
+    """
+    ChunkTextStore at CHUNK_TEXT_STORE, the file given to ingest's --text-store;
+    needed when the collection's payloads carry no chunk text.
+    """
+    path = os.getenv("CHUNK_TEXT_STORE")
+    if not path:
+        return None
+    if not Path(path).is_file():
+        raise ValueError(f"CHUNK_TEXT_STORE {path!r} does not exist")
+    return ChunkTextStore(path)
+
+def build_retrievers(
+        qdrant: QdrantClient, aqdrant: AsyncQdrantClient, text_store: Optional[ChunkTextStore] = None
+) -> Tuple[Optional[Retriever], Optional[AsyncRetriever]]:
+    """
+    Retriever and AsyncRetriever over QDRANT_COLLECTION, sharing one
+    embedder, or (None, None) when no collection is configured. The async
+    one serves /retrieve and /chat; /chat/stream uses the sync one.
+    """
+    collection = os.getenv("QDRANT_COLLECTION")
+    if not collection:
+        return None, None
+    from services.ingest.embed.factory import create_embedder
+
+    embedder = create_embedder(model_name=os.getenv("EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2"))
+    return (
+        Retriever(qdrant=qdrant, embedder=embedder, collection_name=collection, text_store=text_store),
+        AsyncRetriever(qdrant=aqdrant, embedder=embedder, collection_name=collection, text_store=text_store),
+    )
+
+def build_manifest() -> Optional[IngestManifest]:
+    """
+    IngestManifest at INGEST_MANIFEST when ANSWER_CACHE=1; cached answers
+    are only safe with it, since it tells them when a document is re-ingested.
+    """
+    if os.getenv("ANSWER_CACHE", "") != "1":
+        return None
+    path = os.getenv("INGEST_MANIFEST")
+    if not path:
+        raise ValueError(
+            "ANSWER_CACHE=1 needs INGEST_MANIFEST, the file ingest writes with "
+            "`python -m services.ingest.pipeline --manifest` (or ingest_pdf_incremental)"
+        )
+    if not Path(path).is_file():
+        raise ValueError(f"INGEST_MANIFEST {path!r} does not exist")
+    return IngestManifest(path)
+
+def build_chat_service(
+        retriever: Optional[Retriever],
+        manifest: Optional[IngestManifest] = None,
+        async_retriever: Optional[AsyncRetriever] = None,
+) -> Optional[ChatService]:
+    """
+    ChatService from the environment, or None without a retriever or LLM
+    endpoint. With a manifest, answers are cached (SemanticAnswerCache,
+    ANSWER_CACHE_THRESHOLD) until a source document's manifest entry changes.
+    """
+    if retriever is None or "OPENAI_BASE_URL" not in os.environ:
+        return None
+    from services.chat.answer_cache import SemanticAnswerCache
+    from services.chat.prompt_builder import PromptBuilder
+    from services.llm.openai_compat import client_from_env
+
+    answer_cache = None
+    if manifest is not None:
+        answer_cache = SemanticAnswerCache(
+            threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95")), doc_version=manifest.doc_version
+        )
+    return ChatService(
+        retriever=retriever,
+        prompt_builder=PromptBuilder(),
+        llm=client_from_env(),
+        answer_cache=answer_cache,
+        include_timings=os.getenv("CHAT_TIMINGS", "") == "1",
+        async_retriever=async_retriever,
+    )
+
+COALESCED_ENDPOINTS = ("chat", "retrieve")
+
+def coalescing_from_env() -> Dict[str, SingleFlight[Any]]:
+    """One SingleFlight per endpoint; COALESCE_ENDPOINTS lists the enabled ones (default: all, "" for none)."""
+    raw = os.getenv("COALESCE_ENDPOINTS", ",".join(COALESCED_ENDPOINTS))
+    enabled = {e.strip() for e in raw.split(",") if e.strip()}
+    unknown = enabled - set(COALESCED_ENDPOINTS)
+    if unknown:
+        raise ValueError(f"Unknown COALESCE_ENDPOINTS entries: {sorted(unknown)}")
+    return {name: SingleFlight(enabled=name in enabled) for name in COALESCED_ENDPOINTS}
+
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     qdrant_url = os.getenv("QDRANT_URL", "http://localhost:6333")
     app.state.qdrant = QdrantClient(url=qdrant_url, timeout=2)
+    # app.state attributes set here; they hold closed clients after shutdown, so they are reset
+    # and a restart builds them again. Anything set beforehand (e.g. by tests) is left alone.
+    built = ["qdrant"]
+    text_store: Optional[ChunkTextStore] = None
+    aqdrant: Optional[AsyncQdrantClient] = None
+    async_retriever: Optional[AsyncRetriever] = None
+    manifest: Optional[IngestManifest] = None
+    chat_service: Optional[ChatService] = None
+    if getattr(app.state, "retriever", None) is None:
+        text_store = build_text_store()
+        aqdrant = AsyncQdrantClient(url=qdrant_url, timeout=2)
+        app.state.retriever, async_retriever = build_retrievers(app.state.qdrant, aqdrant, text_store)
+        app.state.async_retriever = async_retriever
+        built += ["retriever", "async_retriever"]
+    if getattr(app.state, "chat_service", None) is None:
+        manifest = build_manifest()
+        app.state.chat_service = chat_service = build_chat_service(app.state.retriever, manifest, async_retriever)
+        built.append("chat_service")
+    if getattr(app.state, "single_flight", None) is None:
+        app.state.single_flight = coalescing_from_env()
+        built.append("single_flight")
     try:
         yield
     finally:
+        if chat_service is not None:
+            await chat_service.aclose()
+        if async_retriever is not None:
+            async_retriever.close()
+        if aqdrant is not None:
+            await aqdrant.close()
         client: Optional[QdrantClient] = getattr(app.state, "qdrant", None)
         if client:
             client.close()
+        if text_store is not None:
+            text_store.close()
+        if manifest is not None:
+            manifest.close()
+        for name in built:
+            setattr(app.state, name, None)
 
 app = FastAPI(title="rag-mlops API", version="0.1.0", lifespan=lifespan)
 
@@ -31,6 +177,38 @@ def get_qdrant() -> QdrantClient:
         )
     return client
 
+async def get_retriever() -> Retriever | AsyncRetriever:
+    # async def, like the endpoints using it, so no request needs a threadpool worker
+    retriever: Optional[Retriever | AsyncRetriever] = (
+        getattr(app.state, "async_retriever", None) or getattr(app.state, "retriever", None)
+    )
+    if retriever is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Retriever not configured"
+        )
+    return retriever
+
+def single_flight(endpoint: str) -> SingleFlight[Any]:
+    flights: Dict[str, SingleFlight[Any]] = getattr(app.state, "single_flight", None) or {}
+    if endpoint not in flights:
+        # Not set up by the lifespan (e.g. app.state filled by hand): run uncoalesced
+        flights[endpoint] = SingleFlight(enabled=False)
+        app.state.single_flight = flights
+    return flights[endpoint]
+
+def _request_key(req: ChatRequest) -> Tuple[str, int, Optional[str]]:
+    return normalize_query_text(req.question), req.top_k, req.doc_id
+
+async def get_chat_service() -> ChatService:
+    service: Optional[ChatService] = getattr(app.state, "chat_service", None)
+    if service is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Chat service not configured"
+        )
+    return service
+
 @app.get("/health", response_model=Health)
 def health_check() -> Health:
     return Health(status="ok")
@@ -45,3 +223,78 @@ def qdrant_health(qdrant: QdrantClient = Depends(get_qdrant)) -> Health:
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Qdrant not reachable"
         )
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    """Prometheus scrape endpoint: per-stage latency histograms and error counters, plus coalescing counters."""
+    lines = [REGISTRY.render().rstrip("\n")]
+    flights: Dict[str, SingleFlight[Any]] = getattr(app.state, "single_flight", None) or {}
+    for field in ("calls", "executions", "coalesced"):
+        name = f"rag_coalesce_{field}_total"
+        lines += [f"# HELP {name} Single-flight {field} per endpoint.", f"# TYPE {name} counter"]
+        lines += [f'{name}{{endpoint="{ep}"}} {f.stats()[field]}' for ep, f in sorted(flights.items())]
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
+@app.get("/coalescing")
+def coalescing_stats() -> Dict[str, Dict[str, int]]:
+    return {name: flight.stats() for name, flight in (getattr(app.state, "single_flight", None) or {}).items()}
+
+async def _retrieve(retriever: Retriever | AsyncRetriever, rq: RetrievalQuery) -> List[RetrievedChunk]:
+    if isinstance(retriever, AsyncRetriever):
+        return await retriever.retrieve(rq)
+    return await asyncio.to_thread(retriever.retrieve, rq)
+
+# /retrieve and /chat run on the event loop, awaiting Qdrant and the LLM, so a burst
+# of slow requests does not tie up (and queue behind) the sync-endpoint threadpool
+@app.post("/retrieve")
+async def retrieve(
+        req: ChatRequest, retriever: Retriever | AsyncRetriever = Depends(get_retriever)
+) -> List[RetrievedChunk]:
+    rq = RetrievalQuery(text=req.question, top_k=req.top_k, doc_id=req.doc_id)
+    chunks: List[RetrievedChunk] = await single_flight("retrieve").ado(
+        _request_key(req), lambda: _retrieve(retriever, rq)
+    )
+    return chunks
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat(req: ChatRequest, service: ChatService = Depends(get_chat_service)) -> ChatResponse:
+    # Identical questions asked while one is being answered share that answer
+    result = await single_flight("chat").ado(
+        _request_key(req),
+        lambda: service.achat(question=req.question, top_k=req.top_k, doc_id=req.doc_id),
+    )
+    return ChatResponse(
+        answer=result.answer,
+        sources=result.sources,
+        retrieved=result.retrived,
+        invalid_citations=result.invalid_citations,
+        timings=result.timings,
+    )
+
+def _sse(event: str, data: object) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/chat/stream")
+def chat_stream(req: ChatRequest, service: ChatService = Depends(get_chat_service)) -> StreamingResponse:
+    """
+    Server-sent events: one `sources` event, `delta` events with answer
+    text, then `done` with the invalid citations that were dropped, or
+    `error` if the answer failed part-way.
+    """
+    def events() -> Iterator[str]:
+        try:
+            for ev in service.chat_stream(question=req.question, top_k=req.top_k, doc_id=req.doc_id):
+                if ev.type == "sources":
+                    yield _sse("sources", ev.sources)
+                elif ev.type == "delta":
+                    yield _sse("delta", {"text": ev.text})
+                elif ev.result is not None:
+                    yield _sse("done", {
+                        "retrieved": ev.result.retrived,
+                        "invalid_citations": ev.result.invalid_citations,
+                    })
+        except Exception as e:
+            # Headers are already sent, so failures are reported in-band
+            yield _sse("error", {"detail": str(e)})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
@@ -0,0 +1,228 @@
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+import threading
+import time
+
+import numpy as np
+import numpy.typing as npt
+
+from services.ingest.index.qdrant_client import make_point_id
+from services.retriever.models import RetrievedChunk
+
+if TYPE_CHECKING:
+    from services.chat.chat_service import ChatResult
+
+_Scope = Tuple[Optional[str], int]  # (doc_id filter, top_k)
+
+@dataclass(frozen=True)
+class _Entry:
+    scope: _Scope
+    source_ids: FrozenSet[str]              # point ids of the chunks the answer was built from
+    doc_versions: Dict[str, Optional[str]]  # doc_id -> version when the answer was stored
+    result: ChatResult
+    stored_at: float
+
+
+class SemanticAnswerCache:
+    """
+    Cache of ChatResults keyed by question embedding.
+
+    A question is served from the cache when a stored question with the
+    same doc_id scope and top_k has cosine similarity >= `threshold`.
+    Entries are bounded by `max_entries` (LRU) and `ttl_s`, and are dropped
+    when the chunks they were answered from are re-ingested: either call
+    `invalidate_docs` after ingest, or pass `doc_version` (doc_id -> version
+    string, e.g. IngestManifest.doc_version) so stale entries are noticed
+    on lookup even when ingest runs in another process.
+
+    Answers built from no retrieved chunks are not cached, since no
+    re-ingest could invalidate them. Thread-safe.
+    """
+
+    def __init__(
+            self,
+            *,
+            threshold: float = 0.95,
+            max_entries: int = 2_000,
+            ttl_s: Optional[float] = None,
+            doc_version: Optional[Callable[[str], Optional[str]]] = None,
+            clock: Callable[[], float] = time.time,
+    ) -> None:
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        if not -1.0 <= threshold <= 1.0:
+            raise ValueError("threshold must be a cosine similarity in [-1, 1]")
+        self._threshold = threshold
+        self._max_entries = max_entries
+        self._ttl_s = ttl_s
+        self._doc_version = doc_version
+        self._clock = clock
+        self._lock = threading.Lock()
+        # Unit question vectors live in one preallocated matrix; entries map to its rows
+        self._vectors: Optional[npt.NDArray[np.float32]] = None
+        self._entries: OrderedDict[int, _Entry] = OrderedDict()
+        self._by_scope: Dict[_Scope, Set[int]] = {}
+        self._by_doc: Dict[str, Set[int]] = {}
+        self._free: List[int] = []
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _drop(self, slot: int) -> None:
+        entry = self._entries.pop(slot)
+        self._by_scope[entry.scope].discard(slot)
+        for doc_id in entry.doc_versions:
+            self._by_doc[doc_id].discard(slot)
+        self._free.append(slot)
+
+    def _stale(self, entry: _Entry, now: float) -> Optional[str]:
+        if self._ttl_s is not None and now - entry.stored_at > self._ttl_s:
+            return "expired"
+        if self._doc_version is not None:
+            for doc_id, version in entry.doc_versions.items():
+                if self._doc_version(doc_id) != version:
+                    return "invalidated"
+        return None
+
+    def lookup(self, question_vec: npt.NDArray[np.float32], *, doc_id: Optional[str], top_k: int) -> Optional[ChatResult]:
+        q = _unit(question_vec)
+        now = self._clock()
+        with self._lock:
+            slots = self._by_scope.get((doc_id, top_k))
+            if self._vectors is None or not slots or q.shape[0] != self._vectors.shape[1]:
+                self.misses += 1
+                return None
+            candidates = np.fromiter(slots, dtype=np.int64, count=len(slots))
+            sims = self._vectors[candidates] @ q
+            order = np.argsort(-sims, kind="stable")
+            matches = [
+                (int(candidates[i]), self._entries[int(candidates[i])]) for i in order if sims[i] >= self._threshold
+            ]
+
+        # doc_version may query a database, so staleness is checked without holding the lock;
+        # best match first, stopping at the first entry that is still fresh
+        hit: Optional[Tuple[int, _Entry]] = None
+        stale: List[Tuple[int, _Entry, str]] = []
+        for slot, entry in matches:
+            reason = self._stale(entry, now)
+            if reason is None:
+                hit = (slot, entry)
+                break
+            stale.append((slot, entry, reason))
+
+        with self._lock:
+            for slot, entry, reason in stale:
+                if self._entries.get(slot) is not entry:
+                    continue  # already dropped or reused meanwhile
+                self._drop(slot)
+                if reason == "expired":
+                    self.expirations += 1
+                else:
+                    self.invalidations += 1
+            if hit is None:
+                self.misses += 1
+                return None
+            slot, entry = hit
+            if self._entries.get(slot) is entry:
+                self._entries.move_to_end(slot)
+            self.hits += 1
+            return entry.result
+
+    def put(
+            self,
+            question_vec: npt.NDArray[np.float32],
+            *,
+            doc_id: Optional[str],
+            top_k: int,
+            chunks: Iterable[RetrievedChunk],
+            result: ChatResult,
+    ) -> bool:
+        """Store `result` for the question; returns False if it was not cacheable."""
+        chunk_list = list(chunks)
+        if not chunk_list:
+            return False
+        q = _unit(question_vec)
+        docs = {c.doc_id for c in chunk_list}
+        if doc_id is not None:
+            docs.add(doc_id)
+        versions = {d: self._doc_version(d) if self._doc_version is not None else None for d in docs}
+        entry = _Entry(
+            scope=(doc_id, top_k),
+            source_ids=frozenset(make_point_id(c.doc_id, c.chunk_index) for c in chunk_list),
+            doc_versions=versions,
+            result=result,
+            stored_at=self._clock(),
+        )
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != q.shape[0]:
+                self._reset(q.shape[0])
+            if not self._free:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+            slot = self._free.pop()
+            assert self._vectors is not None
+            self._vectors[slot] = q
+            self._entries[slot] = entry
+            self._by_scope.setdefault(entry.scope, set()).add(slot)
+            for d in docs:
+                self._by_doc.setdefault(d, set()).add(slot)
+        return True
+
+    def invalidate_docs(self, doc_ids: Iterable[str]) -> int:
+        """Drop answers built from (or scoped to) any of `doc_ids`; call after re-ingesting them."""
+        dropped = 0
+        with self._lock:
+            for doc_id in set(doc_ids):
+                for slot in list(self._by_doc.get(doc_id, ())):
+                    self._drop(slot)
+                    dropped += 1
+            self.invalidations += dropped
+        return dropped
+
+    def invalidate_points(self, point_ids: Iterable[str]) -> int:
+        """Drop answers that used any of the given chunk point ids (make_point_id)."""
+        ids = set(point_ids)
+        with self._lock:
+            stale = [slot for slot, e in self._entries.items() if not e.source_ids.isdisjoint(ids)]
+            for slot in stale:
+                self._drop(slot)
+            self.invalidations += len(stale)
+        return len(stale)
+
+    def _reset(self, dim: int) -> None:
+        self._vectors = np.zeros((self._max_entries, dim), dtype=np.float32)
+        self._entries.clear()
+        self._by_scope.clear()
+        self._by_doc.clear()
+        self._free = list(range(self._max_entries - 1, -1, -1))
+
+    def clear(self) -> None:
+        with self._lock:
+            if self._vectors is not None:
+                self._reset(self._vectors.shape[1])
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+def _unit(v: npt.NDArray[np.float32]) -> npt.NDArray[np.float32]:
+    q = np.asarray(v, dtype=np.float32).reshape(-1)
+    return q / max(float(np.linalg.norm(q)), 1e-12)
@@ -1,15 +1,23 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-from typing import Optional, List, Dict, Set, Literal
+from contextlib import nullcontext
+from dataclasses import dataclass, field, replace
+from typing import ContextManager, Generator, Optional, List, Dict, Set, Literal
 
-from services.retriever import Retriever, RetrievalQuery
-from services.chat.prompt_builder import PromptBuilder
-from services.llm.openai_compat import OpenAICompatibleClient
+from services.retriever import AsyncRetriever, Retriever, RetrievalQuery, RetrievedChunk
+from services.chat.answer_cache import SemanticAnswerCache
+from services.chat.prompt_builder import PromptArtifacts, PromptBuilder
+from services.llm.openai_compat import LLMResponse, OpenAICompatibleClient
+from services.observability.metrics import collect_timings, stage_timer
 
+import asyncio
 import re
 
+import numpy as np
+import numpy.typing as npt
+
 _CITATION_RE = re.compile(r"\[(S\d+)\]")
+_PARTIAL_CITATION_RE = re.compile(r"\[(S\d*)?")
 
 CitationPolicy = Literal["off", "strip", "strict"]
 
@@ -22,26 +30,98 @@ def remove_invalid_citations(text: str, *, allowed: Set[str]) -> str:
         return m.group(0) if label in allowed else ""
     return _CITATION_RE.sub(repl, text)
 
+class CitationStreamFilter:
+    """
+    Applies a citation policy to an answer that arrives in pieces.
+
+    feed() returns the text that is safe to emit now: a trailing fragment
+    that could still complete into a citation (e.g. "[S1") is held back
+    until the next piece or flush(). With "strip", invalid citations are
+    removed before they are emitted; with "strict", feed()/flush() raise
+    ValueError instead of emitting one.
+    """
+
+    def __init__(self, *, allowed: Set[str], policy: CitationPolicy) -> None:
+        self._allowed = allowed
+        self._policy = policy
+        self._pending = ""
+        self._invalid: Set[str] = set()
+
+    @property
+    def invalid(self) -> List[str]:
+        return sorted(self._invalid)
+
+    def feed(self, delta: str) -> str:
+        text = self._pending + delta
+        cut = text.rfind("[")
+        # Citations cannot contain "[", so only the last one can be incomplete
+        if cut != -1 and _PARTIAL_CITATION_RE.fullmatch(text, cut):
+            text, self._pending = text[:cut], text[cut:]
+        else:
+            self._pending = ""
+        return self._apply(text)
+
+    def flush(self) -> str:
+        text, self._pending = self._pending, ""
+        return self._apply(text)
+
+    def _apply(self, text: str) -> str:
+        invalid = extract_citation_labels(text) - self._allowed
+        self._invalid |= invalid
+        if invalid and self._policy == "strict":
+            raise ValueError(f"Answer contained invalid citations: {sorted(invalid)}. Allowed: {sorted(self._allowed)}")
+        if invalid and self._policy == "strip":
+            return remove_invalid_citations(text, allowed=self._allowed)
+        return text
+
 @dataclass(frozen=True)
 class ChatResult:
     answer: str
     sources: List[Dict[str, object]]
     retrived: int
     invalid_citations: List[str] = field(default_factory=list)
+    timings: Optional[Dict[str, float]] = None  # stage -> seconds, with ChatService(include_timings=True)
+
+StreamEventType = Literal["sources", "delta", "done"]
+
+@dataclass(frozen=True)
+class ChatStreamEvent:
+    type: StreamEventType
+    text: str = ""                                                  # "delta": next piece of the answer
+    sources: List[Dict[str, object]] = field(default_factory=list)  # "sources"
+    result: Optional[ChatResult] = None                             # "done": the complete answer
 
 class ChatService:
     def __init__(
             self,
             *,
-            retriever: Retriever,
+            retriever: Retriever | AsyncRetriever,
             prompt_builder: PromptBuilder,
             llm: OpenAICompatibleClient,
-            citation_policy: CitationPolicy = "strip"
+            citation_policy: CitationPolicy = "strip",
+            answer_cache: Optional[SemanticAnswerCache] = None,
+            include_timings: bool = False,
+            async_retriever: Optional[AsyncRetriever] = None,
         ) -> None:
         self._retriever = retriever
+        self._async_retriever = async_retriever
         self._prompt_builder = prompt_builder
         self._llm = llm
         self._citation_policy = citation_policy
+        self._answer_cache = answer_cache
+        self._include_timings = include_timings
+
+    @property
+    def answer_cache(self) -> Optional[SemanticAnswerCache]:
+        return self._answer_cache
+
+    def close(self) -> None:
+        """Close the LLM client's pooled connections; the retriever belongs to the caller."""
+        self._llm.close()
+
+    async def aclose(self) -> None:
+        """Like close(), also closing the async connection pool achat used."""
+        await self._llm.aclose()
 
     def chat(
             self,
@@ -50,18 +130,158 @@ class ChatService:
             top_k: int = 5,
             doc_id: Optional[str] = None,
         ) -> ChatResult:
-        chunks = self._retriever.retrieve(RetrievalQuery(text=question, top_k=top_k, doc_id=doc_id))
+        with self._timings() as timings, stage_timer("chat"):
+            result = self._chat(question=question, top_k=top_k, doc_id=doc_id)
+        return result if timings is None else replace(result, timings=dict(timings))
+
+    async def achat(
+            self,
+            *,
+            question: str,
+            top_k: int = 5,
+            doc_id: Optional[str] = None,
+        ) -> ChatResult:
+        """
+        Non-blocking chat: awaits an AsyncRetriever (`async_retriever` if
+        given, else `retriever`) and the LLM's async client. A synchronous
+        Retriever is run in a worker thread.
+        """
+        with self._timings() as timings, stage_timer("chat"):
+            result = await self._achat(question=question, top_k=top_k, doc_id=doc_id)
+        return result if timings is None else replace(result, timings=dict(timings))
+
+    def _timings(self) -> ContextManager[Optional[Dict[str, float]]]:
+        return collect_timings() if self._include_timings else nullcontext()
+
+    def _chat(
+            self,
+            *,
+            question: str,
+            top_k: int,
+            doc_id: Optional[str],
+        ) -> ChatResult:
+        if isinstance(self._retriever, AsyncRetriever):
+            raise TypeError("chat() needs a synchronous Retriever; use achat() with an AsyncRetriever")
+        rq = RetrievalQuery(text=question, top_k=top_k, doc_id=doc_id)
+        qvec = None
+        if self._answer_cache is not None:
+            # The question is embedded once, for both the cache lookup and retrieval
+            qvec = self._retriever.embed_query(question)
+            cached = self._answer_cache.lookup(qvec, doc_id=doc_id, top_k=top_k)
+            if cached is not None:
+                return cached
+        chunks = self._retriever.retrieve(rq, query_vector=qvec)
 
         artifacts = self._prompt_builder.build(question=question, chunks=chunks)
 
         resp = self._llm.chat(messages=artifacts.messages, temperature=0.2, max_tokens=500)
+        return self._remember(qvec, rq, chunks, self._finish(artifacts, chunks, resp))
+
+    async def _achat(
+            self,
+            *,
+            question: str,
+            top_k: int,
+            doc_id: Optional[str],
+        ) -> ChatResult:
+        retriever = self._async_retriever or self._retriever
+        rq = RetrievalQuery(text=question, top_k=top_k, doc_id=doc_id)
+        qvec = None
+        if self._answer_cache is not None:
+            if isinstance(retriever, AsyncRetriever):
+                qvec = await retriever.embed_query(question)
+            else:
+                qvec = await asyncio.to_thread(retriever.embed_query, question)
+            cached = self._answer_cache.lookup(qvec, doc_id=doc_id, top_k=top_k)
+            if cached is not None:
+                return cached
+        if isinstance(retriever, AsyncRetriever):
+            chunks = await retriever.retrieve(rq, query_vector=qvec)
+        else:
+            chunks = await asyncio.to_thread(retriever.retrieve, rq, query_vector=qvec)
+
+        artifacts = self._prompt_builder.build(question=question, chunks=chunks)
+
+        resp = await self._llm.achat(messages=artifacts.messages, temperature=0.2, max_tokens=500)
+        return self._remember(qvec, rq, chunks, self._finish(artifacts, chunks, resp))
+
+    def _remember(
+            self,
+            qvec: Optional[npt.NDArray[np.float32]],
+            rq: RetrievalQuery,
+            chunks: List[RetrievedChunk],
+            result: ChatResult,
+        ) -> ChatResult:
+        if self._answer_cache is not None and qvec is not None:
+            self._answer_cache.put(qvec, doc_id=rq.doc_id, top_k=rq.top_k, chunks=chunks, result=result)
+        return result
+
+    def chat_stream(
+            self,
+            *,
+            question: str,
+            top_k: int = 5,
+            doc_id: Optional[str] = None,
+        ) -> Generator[ChatStreamEvent, None, None]:
+        """
+        Streaming chat: yields a "sources" event once retrieval is done,
+        "delta" events as the LLM produces the answer, and a final "done"
+        event with the ChatResult. The citation policy is applied to the
+        stream itself (see CitationStreamFilter), so invalid labels are
+        never emitted. Stage metrics are recorded, also when the LLM fails
+        or the consumer stops early, but the result carries no timings
+        breakdown.
+        """
+        if isinstance(self._retriever, AsyncRetriever):
+            raise TypeError("chat_stream() needs a synchronous Retriever")
+        rq = RetrievalQuery(text=question, top_k=top_k, doc_id=doc_id)
+        qvec = None
+        if self._answer_cache is not None:
+            qvec = self._retriever.embed_query(question)
+            cached = self._answer_cache.lookup(qvec, doc_id=doc_id, top_k=top_k)
+            if cached is not None:
+                yield ChatStreamEvent(type="sources", sources=cached.sources)
+                if cached.answer:
+                    yield ChatStreamEvent(type="delta", text=cached.answer)
+                yield ChatStreamEvent(type="done", result=cached)
+                return
+        chunks = self._retriever.retrieve(rq, query_vector=qvec)
+
+        artifacts = self._prompt_builder.build(question=question, chunks=chunks)
+        yield ChatStreamEvent(type="sources", sources=artifacts.sources)
+
+        citations = CitationStreamFilter(allowed=_allowed_labels(artifacts), policy=self._citation_policy)
+        parts: List[str] = []
+        deltas = self._llm.chat_stream(messages=artifacts.messages, temperature=0.2, max_tokens=500)
+        try:
+            for delta in deltas:
+                text = citations.feed(delta)
+                if text:
+                    parts.append(text)
+                    yield ChatStreamEvent(type="delta", text=text)
+        finally:
+            # Closed here rather than whenever it is collected, so the LLM stream's
+            # connection and metrics are settled as soon as our consumer stops
+            close = getattr(deltas, "close", None)
+            if close is not None:
+                close()
+        tail = citations.flush()
+        if tail:
+            parts.append(tail)
+            yield ChatStreamEvent(type="delta", text=tail)
+
+        result = ChatResult(
+            answer="".join(parts),
+            sources=artifacts.sources,
+            retrived=len(chunks),
+            invalid_citations=citations.invalid,
+        )
+        yield ChatStreamEvent(type="done", result=self._remember(qvec, rq, chunks, result))
+
+    def _finish(self, artifacts: PromptArtifacts, chunks: List[RetrievedChunk], resp: LLMResponse) -> ChatResult:
         answer = resp.text
 
-        allowed: Set[str] = {
-            v
-            for s in artifacts.sources
-            for (k, v) in s.items()
-            if k == "label" and isinstance(v, str)}
+        allowed = _allowed_labels(artifacts)
         used: Set[str] = extract_citation_labels(answer)
         invalid: List[str] = sorted(used - allowed)
 
@@ -72,8 +292,15 @@ class ChatService:
                 answer = remove_invalid_citations(answer, allowed=allowed)
 
         return ChatResult(
-            answer=resp.text,
+            answer=answer,
             sources=artifacts.sources,
             retrived=len(chunks),
             invalid_citations=invalid,
             )
+
+def _allowed_labels(artifacts: PromptArtifacts) -> Set[str]:
+    return {
+        v
+        for s in artifacts.sources
+        for (k, v) in s.items()
+        if k == "label" and isinstance(v, str)}
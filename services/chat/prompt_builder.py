@@ -1,25 +1,70 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import List, Dict
+from typing import List, Dict, Optional
+import re
 
+from services.ingest.chunk.tokenizer import get_tokenizer
+from services.observability.metrics import timed
 from services.retriever.models import RetrievedChunk
 
+_PAGES_PREFIX_RE = re.compile(r"^\[Pages \d+-\d+\] ")
+
 @dataclass(frozen=True)
 class PromptArtifacts:
     messages: List[Dict[str, str]]
     sources: List[Dict[str, object]]
 
 
+@dataclass
+class ContextSpan:
+    """Retrieved chunks of one document merged into a single stretch of text."""
+    doc_id: str
+    body: str
+    score: float
+    chunk_indices: List[int]
+    page_start: Optional[int]
+    page_end: Optional[int]
+    source: Optional[str]
+    char_start: Optional[int]
+    char_end: Optional[int]   # end of `body` in the document, which may fall short of the chunk's if text was cut
+
+
 class PromptBuilder:
-    def __init__(self, *, max_content_chars: int = 12_000) -> None:
+    """
+    Builds the chat messages and the source list for retrieved chunks.
+
+    By default the context is cut at `max_content_chars`. With
+    `max_context_tokens`, chunks of the same document that overlap or touch
+    (by char offsets, or by overlapping text for adjacent chunk indices) are
+    merged first, and the merged spans are then added best score first
+    while they fit the token budget, counted with `tokenizer_name` from the
+    chunk tokenizer registry.
+    """
+
+    def __init__(
+            self,
+            *,
+            max_content_chars: int = 12_000,
+            max_context_tokens: Optional[int] = None,
+            tokenizer_name: str = "cl100k_base",
+    ) -> None:
+        if max_context_tokens is not None and max_context_tokens <= 0:
+            raise ValueError("max_context_tokens must be positive")
         self._max_content_chars = max_content_chars
+        self._max_context_tokens = max_context_tokens
+        self._tokenizer_name = tokenizer_name
 
+    @timed("prompt_build")
     def build(self, question: str, chunks: List[RetrievedChunk]) -> PromptArtifacts:
         if not chunks:
             context_text = "No relevant context was found."
             sources: List[Dict[str, object]] = []
         else:
-            context_text, sources = self._format_context(chunks)
+            context_text, sources = (
+                self._format_context(chunks)
+                if self._max_context_tokens is None
+                else self._pack_context(chunks, self._max_context_tokens)
+            )
 
         system = self._system_prompt()
         user = self._user_prompt(question=question, context=context_text)
@@ -55,7 +100,7 @@ class PromptBuilder:
         total = 0
 
         for i, c in enumerate(chunks, start=1):
-            label = f"S[{i}]"
+            label = f"S{i}"
 
             sources.append(
                 {
@@ -98,3 +143,128 @@ class PromptBuilder:
 
         context = "\n\n".join(blocks).strip()
         return context, sources
+
+    def _pack_context(self, chunks: List[RetrievedChunk], budget: int) -> tuple[str, List[Dict[str, object]]]:
+        tok = get_tokenizer(self._tokenizer_name)
+        spans = sorted(merge_chunk_spans(chunks), key=lambda sp: -sp.score)
+        # Final labels depend on what fits; the label at the same rank has (nearly) the same token cost
+        blocks = [_span_header(sp, f"S{i}") + "\n" + sp.body.strip() for i, sp in enumerate(spans, start=1)]
+        costs = [len(t) for t in tok.encode_batch(blocks)]
+        sep = len(tok.encode("\n\n"))
+
+        chosen: List[tuple[ContextSpan, Optional[str]]] = []
+        remaining = budget
+        for sp, cost in zip(spans, costs):
+            if cost + sep <= remaining:
+                chosen.append((sp, None))
+                remaining -= cost + sep
+            elif not chosen:
+                # The best span alone is over budget: keep as much of it as fits
+                body_tokens = tok.encode(sp.body.strip())
+                keep = max(0, remaining - (cost - len(body_tokens)) - sep)
+                if keep > 0:
+                    chosen.append((sp, tok.decode(body_tokens[:keep]).rstrip()))
+                    remaining = 0
+
+        sources: List[Dict[str, object]] = []
+        out: List[str] = []
+        for i, (sp, truncated) in enumerate(chosen, start=1):
+            label = f"S{i}"
+            sources.append(
+                {
+                    "label": label,
+                    "doc_id": sp.doc_id,
+                    "chunk_index": sp.chunk_indices[0],
+                    "chunk_indices": list(sp.chunk_indices),
+                    "page_start": sp.page_start,
+                    "page_end": sp.page_end,
+                    "source": sp.source,
+                    "score": sp.score,
+                }
+            )
+            body = sp.body.strip() if truncated is None else truncated
+            out.append(f"{_span_header(sp, label)}\n{body}")
+        return "\n\n".join(out).strip(), sources
+
+
+def _span_header(sp: ContextSpan, label: str) -> str:
+    first, last = sp.chunk_indices[0], sp.chunk_indices[-1]
+    header = f"[{label}] doc_id={sp.doc_id} " + (f"chunk={first}" if first == last else f"chunks={first}-{last}")
+    if sp.page_start is not None and sp.page_end is not None:
+        header += f" pages={sp.page_start}-{sp.page_end}"
+    if sp.source:
+        header += f" source={sp.source}"
+    return header
+
+
+def _text_overlap(a: str, b: str, *, probe: int = 32) -> int:
+    """Length of the longest suffix of `a` that is a prefix of `b` (at least `probe` chars, else 0)."""
+    if len(a) < probe or len(b) < probe:
+        return 0
+    head = b[:probe]
+    start = max(0, len(a) - len(b))
+    pos = a.find(head, start)
+    while pos != -1:
+        if b.startswith(a[pos:]):
+            return len(a) - pos
+        pos = a.find(head, pos + 1)
+    return 0
+
+
+def _merge_into(cur: ContextSpan, c: RetrievedChunk, body: str) -> bool:
+    if cur.char_end is not None and c.char_start is not None and c.char_end is not None:
+        if c.char_start > cur.char_end:
+            return False
+        # Overlapping or touching spans: append only the part past the current end
+        skip = cur.char_end - c.char_start
+        if skip < len(body):
+            cur.body += body[skip:]
+            cur.char_end = c.char_start + len(body)
+    elif c.chunk_index == cur.chunk_indices[-1] + 1 and (overlap := _text_overlap(cur.body, body)):
+        cur.body += body[overlap:]
+    else:
+        return False
+    cur.chunk_indices.append(c.chunk_index)
+    cur.score = max(cur.score, c.score)
+    if c.page_start is not None:
+        cur.page_start = c.page_start if cur.page_start is None else min(cur.page_start, c.page_start)
+    if c.page_end is not None:
+        cur.page_end = c.page_end if cur.page_end is None else max(cur.page_end, c.page_end)
+    return True
+
+
+def merge_chunk_spans(chunks: List[RetrievedChunk]) -> List[ContextSpan]:
+    """
+    Merge retrieved chunks of the same doc_id whose text overlaps or
+    touches, in document order. Chunk texts carry the chunker's
+    "[Pages a-b] " prefix, which is dropped (pages go in the header).
+    Duplicate retrievals of the same chunk collapse into one.
+    """
+    by_doc: Dict[str, List[RetrievedChunk]] = {}
+    for c in chunks:
+        by_doc.setdefault(c.doc_id, []).append(c)
+
+    spans: List[ContextSpan] = []
+    for doc_id, group in by_doc.items():
+        group = sorted(
+            {c.chunk_index: c for c in sorted(group, key=lambda c: c.score)}.values(),
+            key=lambda c: (c.char_start if c.char_start is not None else -1, c.chunk_index),
+        )
+        cur: Optional[ContextSpan] = None
+        for c in group:
+            body = _PAGES_PREFIX_RE.sub("", c.text or "", count=1)
+            if cur is not None and _merge_into(cur, c, body):
+                continue
+            cur = ContextSpan(
+                doc_id=doc_id,
+                body=body,
+                score=c.score,
+                chunk_indices=[c.chunk_index],
+                page_start=c.page_start,
+                page_end=c.page_end,
+                source=c.source,
+                char_start=c.char_start,
+                char_end=c.char_start + len(body) if c.char_start is not None else None,
+            )
+            spans.append(cur)
+    return spans
@@ -1,4 +1,4 @@
 from .models import Chunk as Chunk, ChunkedDoc as ChunkedDoc
-from .chunker import chunk_rawdoc as chunk_rawdoc
+from .chunker import chunk_rawdoc as chunk_rawdoc, chunk_many as chunk_many
 
-__all__ = ["Chunk", "ChunkedDoc", "chunk_rawdoc"]
+__all__ = ["Chunk", "ChunkedDoc", "chunk_rawdoc", "chunk_many"]
@@ -1,28 +1,46 @@
 from __future__ import annotations
-from typing import List
+from typing import List, Sequence
+
+import numpy as np
+import numpy.typing as npt
 
 from .tokenizer import Tokenizer
-from ..pdf_reader import RawDoc
+from ..pdf_reader import PdfPageStream, RawDoc
 from .models import Chunk, ChunkedDoc
-from .pager import concat_pages, char_span_to_page_span
+from .pager import PageSpanIndex, concat_pages
 from .tokenizer import get_tokenizer
+from services.observability.metrics import timed
 
 
 MIN_CHARS = 50  # drop very small/boilerplate chunks
 MAX_CHARS = 4000  # safety cap after decode
 
-def _build_token_to_char_index(tokens: List[int], tok: Tokenizer, full_text: str) -> List[int]:
-    char_index: List[int] = [0]
-    buf_tokens: List[int] = []
-    buf_str = ""
-
-    for i, t in enumerate(tokens, start=1):
-        buf_tokens.append(t)
-        new_str = tok.decode([t])
-        buf_str += new_str
-        char_index.append(len(buf_str))
-
-    return char_index
+def _token_char_offsets(
+        tokens: List[int], tok: Tokenizer, full_text: str
+) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.int64]]:
+    """
+    Char offset of every token boundary (n_tokens + 1 entries) in one vectorized pass.
+
+    Token byte lengths are prefix-summed into byte offsets, which are mapped to
+    char offsets through a prefix count of UTF-8 lead bytes. A boundary that
+    falls inside a multi-byte character is rounded down in the first array
+    (use for window starts) and up in the second (use for window ends).
+    """
+    byte_offsets = np.zeros(len(tokens) + 1, dtype=np.int64)
+    np.cumsum(tok.token_byte_lengths(tokens), out=byte_offsets[1:])
+
+    raw = np.frombuffer(full_text.encode("utf-8"), dtype=np.uint8)
+    is_lead = (raw & 0xC0) != 0x80
+    # chars_before[b] = number of characters starting before byte b
+    chars_before = np.zeros(len(raw) + 1, dtype=np.int64)
+    np.cumsum(is_lead, out=chars_before[1:])
+
+    ceil = chars_before[byte_offsets]
+    inside_char = np.zeros(len(byte_offsets), dtype=bool)
+    interior = byte_offsets < len(raw)
+    inside_char[interior] = ~is_lead[byte_offsets[interior]]
+    floor = ceil - inside_char
+    return floor, ceil
 
 
 def _window_token_bounds(n_tokens: int, chunk_size: int, overlap: int) -> List[tuple[int, int]]:
@@ -40,17 +58,18 @@ def _window_token_bounds(n_tokens: int, chunk_size: int, overlap: int) -> List[t
     return bounds
 
 
-def make_chunks_fixed(full_text: str, tok: Tokenizer, chunk_size: int, overlap: int) -> List[tuple[int, int, str, int]]:
-    tokens = tok.encode(full_text)
+def _windows_from_tokens(
+        full_text: str, tokens: List[int], tok: Tokenizer, chunk_size: int, overlap: int
+) -> List[tuple[int, int, str, int]]:
     if not tokens:
         return []
-    char_index = _build_token_to_char_index(tokens, tok, full_text)
+    starts, ends = _token_char_offsets(tokens, tok, full_text)
     windows = _window_token_bounds(len(tokens), chunk_size, overlap)
     out: List[tuple[int, int, str, int]] = []
     for (ts, te) in windows:
-        char_start = char_index[ts]
-        char_end = char_index[te]
-        snippet = tok.decode(tokens[ts: te])[:MAX_CHARS]
+        char_start = int(starts[ts])
+        char_end = int(ends[te])
+        snippet = full_text[char_start:char_end][:MAX_CHARS]
         token_count = te - ts
         if len(snippet.strip()) < MIN_CHARS:
             continue
@@ -59,23 +78,29 @@ def make_chunks_fixed(full_text: str, tok: Tokenizer, chunk_size: int, overlap:
     return out
 
 
-def chunk_rawdoc(
-        raw: RawDoc,
-        tokenizer_name: str = "cl100k_base",
-        chunk_size: int = 800,
-        overlap: int = 160,
+def make_chunks_fixed(full_text: str, tok: Tokenizer, chunk_size: int, overlap: int) -> List[tuple[int, int, str, int]]:
+    return _windows_from_tokens(full_text, tok.encode(full_text), tok, chunk_size, overlap)
+
+
+def _build_chunked_doc(
+        doc_id: str,
+        full_text: str,
+        page_spans: List[tuple[int, int]],
+        tokens: List[int],
+        tok: Tokenizer,
+        chunk_size: int,
+        overlap: int,
     ) -> ChunkedDoc:
-    full_text, page_spans = concat_pages(raw.pages)
-    tok = get_tokenizer(tokenizer_name)
-    windows = make_chunks_fixed(full_text, tok, chunk_size, overlap)
+    windows = _windows_from_tokens(full_text, tokens, tok, chunk_size, overlap)
 
+    pages = PageSpanIndex(page_spans)
     chunks: List[Chunk] = []
     for idx, (c_start, c_end, snippet, tcount) in enumerate(windows):
-        p_start, p_end = char_span_to_page_span(c_start, c_end, page_spans)
+        p_start, p_end = pages.lookup(c_start, c_end)
         snippet = f"[Pages {p_start}-{p_end}] " + snippet
         chunks.append(
             Chunk(
-                doc_id=raw.doc_id,
+                doc_id=doc_id,
                 chunk_index=idx,
                 text=snippet,
                 token_count=tcount,
@@ -88,9 +113,48 @@ def chunk_rawdoc(
         )
 
     return ChunkedDoc(
-        doc_id=raw.doc_id,
+        doc_id=doc_id,
         chunks=chunks,
         chunk_size=chunk_size,
         chunk_overlap=overlap,
         tokenizer_name=tok.name,
     )
+
+
+@timed("chunk")
+def chunk_rawdoc(
+        raw: RawDoc | PdfPageStream,
+        tokenizer_name: str = "cl100k_base",
+        chunk_size: int = 800,
+        overlap: int = 160,
+    ) -> ChunkedDoc:
+    full_text, page_spans = concat_pages(raw.pages)
+    tok = get_tokenizer(tokenizer_name)
+    return _build_chunked_doc(
+        raw.doc_id, full_text, page_spans, tok.encode(full_text), tok, chunk_size, overlap
+    )
+
+
+def chunk_many(
+        raw_docs: Sequence[RawDoc | PdfPageStream],
+        tokenizer_name: str = "cl100k_base",
+        chunk_size: int = 800,
+        overlap: int = 160,
+    ) -> List[ChunkedDoc]:
+    """
+    chunk_rawdoc for a batch of documents: all texts are tokenized in a single
+    multi-threaded encode_batch call, so per-document setup is paid once.
+    """
+    tok = get_tokenizer(tokenizer_name)
+    texts: List[str] = []
+    spans: List[List[tuple[int, int]]] = []
+    for raw in raw_docs:
+        full_text, page_spans = concat_pages(raw.pages)
+        texts.append(full_text)
+        spans.append(page_spans)
+
+    token_lists = tok.encode_batch(texts)
+    return [
+        _build_chunked_doc(raw.doc_id, full_text, page_spans, tokens, tok, chunk_size, overlap)
+        for raw, full_text, page_spans, tokens in zip(raw_docs, texts, spans, token_lists)
+    ]
@@ -1,35 +1,40 @@
 from __future__ import annotations
-from typing import List, Optional, Tuple
+from bisect import bisect_left, bisect_right
+from typing import Iterable, List, Tuple
 
 from services.ingest.pdf_reader import PageText
-from typing import cast
 
 PAGE_BREAK = "\n\n[PAGE_BREAK]\n\n"
 
-def concat_pages(pages: List[PageText]) -> tuple[str, List[tuple[int, int]]]:
+def concat_pages(pages: Iterable[PageText]) -> tuple[str, List[tuple[int, int]]]:
+    # Accepts any iterable so a lazy page stream is consumed once and never held as a list
     parts: List[str] = []
     spans: List[tuple[int, int]] = []
     cursor = 0
     for i, p in enumerate(pages):
+        if i > 0:
+            parts.append(PAGE_BREAK)
+            cursor += len(PAGE_BREAK)
         start = cursor
         parts.append(p.text.strip())
         cursor += len(p.text)
         spans.append((start, cursor))
-        if i < len(pages) - 1:
-            parts.append(PAGE_BREAK)
-            cursor += len(PAGE_BREAK)
     return "".join(parts), spans
 
-def char_span_to_page_span(char_start: int, char_end: int, page_spans: List[Tuple[int, int]]) -> Tuple[int, int]:
-    first: Optional[int] = None
-    last: Optional[int] = None
+class PageSpanIndex:
+    """Bisect index over sorted page spans: O(log pages) per chunk lookup."""
 
-    for idx, (p_start, p_end) in enumerate(page_spans, start=1):
-        if not (char_end <= p_start or char_start >= p_end):
-            first = idx if first is None else first
-            last = idx
+    def __init__(self, page_spans: List[Tuple[int, int]]) -> None:
+        self._starts = [s for s, _ in page_spans]
+        self._ends = [e for _, e in page_spans]
 
-    if first is None:
-        first = last = 1
+    def lookup(self, char_start: int, char_end: int) -> Tuple[int, int]:
+        # First page ending after char_start; last page starting before char_end (1-based)
+        first = bisect_right(self._ends, char_start)
+        last = bisect_left(self._starts, char_end)
+        if first >= len(self._ends) or self._starts[first] >= char_end:
+            return (1, 1)
+        return (first + 1, last)
 
-    return cast(Tuple[int, int], (first, last))
+def char_span_to_page_span(char_start: int, char_end: int, page_spans: List[Tuple[int, int]]) -> Tuple[int, int]:
+    return PageSpanIndex(page_spans).lookup(char_start, char_end)
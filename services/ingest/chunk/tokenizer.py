@@ -1,5 +1,9 @@
 from __future__ import annotations
-from typing import List, Protocol, runtime_checkable, cast
+from typing import Dict, List, Protocol, Sequence, runtime_checkable, cast
+import threading
+
+import numpy as np
+import numpy.typing as npt
 
 
 @runtime_checkable
@@ -7,17 +11,43 @@ class Tokenizer(Protocol):
     name: str
     def encode(self, text: str) -> List[int]: ...
     def decode(self, tokens: List[int]) -> str: ...
+    def encode_batch(self, texts: List[str]) -> List[List[int]]: ...
+    def decode_batch(self, batch: List[List[int]]) -> List[str]: ...
+    def token_byte_lengths(self, tokens: Sequence[int]) -> npt.NDArray[np.int64]: ...
 
 
 class _EncProtocol(Protocol):
+    @property
+    def n_vocab(self) -> int: ...
     def encode(self, text: str) -> List[int]: ...
     def decode(self, tokens: List[int]) -> str: ...
+    def encode_batch(self, text: List[str], *, num_threads: int = 8) -> List[List[int]]: ...
+    def decode_batch(self, batch: Sequence[Sequence[int]], *, num_threads: int = 8) -> List[str]: ...
+    def decode_single_token_bytes(self, token: int) -> bytes: ...
+
+
+# UTF-8 byte length of every token id, per encoding name; built once per process
+_BYTE_LENGTH_TABLES: Dict[str, npt.NDArray[np.int64]] = {}
+
+
+def _byte_length_table(enc: _EncProtocol, name: str) -> npt.NDArray[np.int64]:
+    table = _BYTE_LENGTH_TABLES.get(name)
+    if table is None:
+        table = np.zeros(enc.n_vocab, dtype=np.int64)
+        for i in range(enc.n_vocab):
+            try:
+                table[i] = len(enc.decode_single_token_bytes(i))
+            except KeyError:  # unused ids between the BPE ranks and special tokens
+                pass
+        _BYTE_LENGTH_TABLES[name] = table
+    return table
 
 
 class _TikTok:
-    def __init__(self, enc: _EncProtocol, name: str) -> None:
+    def __init__(self, enc: _EncProtocol, name: str, *, num_threads: int = 8) -> None:
         self._enc: _EncProtocol = enc
         self.name: str = name
+        self._num_threads = num_threads
 
     def encode(self, text: str) -> List[int]:
         return self._enc.encode(text)
@@ -25,8 +55,37 @@ class _TikTok:
     def decode(self, tokens: List[int]) -> str:
         return self._enc.decode(tokens)
 
+    def encode_batch(self, texts: List[str]) -> List[List[int]]:
+        # tiktoken releases the GIL, so its thread pool encodes texts in parallel
+        return self._enc.encode_batch(texts, num_threads=self._num_threads)
+
+    def decode_batch(self, batch: List[List[int]]) -> List[str]:
+        return self._enc.decode_batch(batch, num_threads=self._num_threads)
+
+    def token_byte_lengths(self, tokens: Sequence[int]) -> npt.NDArray[np.int64]:
+        table = _byte_length_table(self._enc, self.name)
+        return table[np.asarray(tokens, dtype=np.int64)]
+
+
+# Process-wide registry: encodings are loaded once per name and shared
+_REGISTRY: Dict[str, Tokenizer] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def register_tokenizer(tokenizer: Tokenizer) -> None:
+    with _REGISTRY_LOCK:
+        _REGISTRY[tokenizer.name] = tokenizer
+
 
 def get_tokenizer(name: str = "cl100k_base") -> Tokenizer:
-    import tiktoken
-    enc = cast(_EncProtocol, tiktoken.get_encoding(name))
-    return _TikTok(enc, name)
+    tok = _REGISTRY.get(name)
+    if tok is not None:
+        return tok
+    with _REGISTRY_LOCK:
+        tok = _REGISTRY.get(name)
+        if tok is None:
+            import tiktoken
+            enc = cast(_EncProtocol, tiktoken.get_encoding(name))
+            tok = _TikTok(enc, name)
+            _REGISTRY[name] = tok
+        return tok
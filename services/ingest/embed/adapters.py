@@ -1,9 +1,10 @@
 from __future__ import annotations
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from .interfaces import Embedder
-from .models import EmbeddedChunk, EmbedBatchResult
+from .models import EmbedBatchResult
 from ..chunk.models import ChunkedDoc
+from services.observability.metrics import stage_timer
 
 def embed_chunked_doc(
         embedder: Embedder,
@@ -19,30 +20,24 @@ def embed_chunked_doc(
             text = text[:max_chars]
         texts.append(text)
 
-    vectors = embedder.embed_texts(texts)
+    with stage_timer("embed_chunks"):
+        matrix = embedder.embed_array(texts)
 
-    embedded_chunks: List[EmbeddedChunk] = []
-    for c, v, truncated_text in zip(doc.chunks, vectors, texts):
-        payload = {
-            "doc_id": c.doc_id,
-            "chunk_index": c.chunk_index,
-            "page_start": c.page_start,
-            "page_end": c.page_end,
-            "token_count": c.token_count,
-            "text": truncated_text,
-        }
-        embedded_chunks.append(
-            EmbeddedChunk(
-                doc_id=c.doc_id,
-                chunk_index=c.chunk_index,
-                vector=v,
-                embedding_model=embedder.model_name,
-                payload=payload,
-            )
-        )
+    columns: Dict[str, List[object]] = {
+        "doc_id": [c.doc_id for c in doc.chunks],
+        "chunk_index": [c.chunk_index for c in doc.chunks],
+        "page_start": [c.page_start for c in doc.chunks],
+        "page_end": [c.page_end for c in doc.chunks],
+        "token_count": [c.token_count for c in doc.chunks],
+        "char_start": [c.char_start for c in doc.chunks],
+        "char_end": [c.char_end for c in doc.chunks],
+        "text": list(texts),
+    }
 
     return EmbedBatchResult(
         doc_id=doc.doc_id,
         model_name=embedder.model_name,
-        vectors=embedded_chunks,
+        matrix=matrix,
+        chunk_indices=[c.chunk_index for c in doc.chunks],
+        payload_columns=columns,
     )
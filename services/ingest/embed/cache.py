@@ -0,0 +1,259 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, cast
+import hashlib
+import re
+import sqlite3
+import threading
+
+import numpy as np
+import numpy.typing as npt
+
+from .interfaces import Embedder
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    slot INTEGER NOT NULL UNIQUE,
+    last_used INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+CREATE TABLE IF NOT EXISTS store_meta (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_SQL_BATCH = 500  # keys per IN (...) query, well under SQLite's variable limit
+_INITIAL_ROWS = 1024
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Size-bounded, LRU-evicting vector store on disk.
+
+    Vectors live in a memory-mapped float32 matrix (`vectors.f32`) that grows
+    by doubling up to `max_entries` rows; an SQLite index maps each key to its
+    row and a last-used counter. When full, the least recently used rows are
+    reused for new keys.
+    """
+
+    def __init__(self, path: str | Path, *, dim: int, max_entries: int, namespace: str = "") -> None:
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self._dir = Path(path)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._dim = dim
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+
+        self._db = sqlite3.connect(str(self._dir / "index.sqlite"), check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._check_meta({"dim": str(dim), "namespace": namespace})
+
+        self._vec_path = self._dir / "vectors.f32"
+        self._vec_path.touch(exist_ok=True)
+        self._capacity = self._vec_path.stat().st_size // (4 * dim)
+        self._mm: Optional[np.memmap] = None
+        self._map()
+
+        row = self._db.execute("SELECT COALESCE(MAX(last_used), 0) FROM entries").fetchone()
+        self._clock = int(row[0])
+
+    def _check_meta(self, expected: Dict[str, str]) -> None:
+        stored = dict(self._db.execute("SELECT name, value FROM store_meta").fetchall())
+        for name, value in expected.items():
+            if name in stored and stored[name] != value:
+                raise ValueError(f"Embedding cache at {self._dir} has {name}={stored[name]!r}, expected {value!r}")
+        with self._db:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO store_meta (name, value) VALUES (?, ?)", list(expected.items())
+            )
+
+    def _map(self) -> None:
+        self._mm = (
+            np.memmap(self._vec_path, dtype=np.float32, mode="r+", shape=(self._capacity, self._dim))
+            if self._capacity
+            else None
+        )
+
+    def _grow(self, rows: int) -> None:
+        if rows <= self._capacity:
+            return
+        new_capacity = min(self._max_entries, max(rows, 2 * self._capacity, _INITIAL_ROWS))
+        if self._mm is not None:
+            self._mm.flush()
+        with self._vec_path.open("r+b") as f:
+            f.truncate(new_capacity * self._dim * 4)
+        self._capacity = new_capacity
+        self._map()
+
+    def __len__(self) -> int:
+        return int(self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0])
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, npt.NDArray[np.float32]]:
+        if not keys:
+            return {}
+        with self._lock:
+            slots: Dict[str, int] = {}
+            unique = list(dict.fromkeys(keys))
+            for i in range(0, len(unique), _SQL_BATCH):
+                part = unique[i : i + _SQL_BATCH]
+                rows = self._db.execute(
+                    f"SELECT key, slot FROM entries WHERE key IN ({', '.join('?' for _ in part)})", part
+                ).fetchall()
+                slots.update(rows)
+            if not slots or self._mm is None:
+                return {}
+
+            self._clock += 1
+            with self._db:
+                self._db.executemany(
+                    "UPDATE entries SET last_used = ? WHERE key = ?", [(self._clock, k) for k in slots]
+                )
+            found = list(slots)
+            vecs = np.array(self._mm[[slots[k] for k in found]], dtype=np.float32)
+            return dict(zip(found, vecs))
+
+    def put_many(self, keys: Sequence[str], vectors: npt.NDArray[np.float32]) -> None:
+        if len(keys) != len(vectors):
+            raise ValueError("keys and vectors must have the same length")
+        if not keys:
+            return
+        # Keep the last vector per key, and at most max_entries of them
+        latest = {k: i for i, k in enumerate(keys)}
+        items = list(latest.items())[-self._max_entries :]
+        with self._lock:
+            existing: Dict[str, int] = {}
+            for i in range(0, len(items), _SQL_BATCH):
+                part = [k for k, _ in items[i : i + _SQL_BATCH]]
+                existing.update(
+                    self._db.execute(
+                        f"SELECT key, slot FROM entries WHERE key IN ({', '.join('?' for _ in part)})", part
+                    ).fetchall()
+                )
+            new_keys = [k for k, _ in items if k not in existing]
+            slots = self._allocate(len(new_keys), protected=set(existing))
+            assignment = {**existing, **dict(zip(new_keys, slots))}
+
+            self._grow(max(assignment.values()) + 1)
+            assert self._mm is not None
+            order = [k for k, _ in items]
+            self._mm[[assignment[k] for k in order]] = vectors[[i for _, i in items]]
+
+            self._clock += 1
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO entries (key, slot, last_used) VALUES (?, ?, ?)",
+                    [(k, assignment[k], self._clock) for k in order],
+                )
+
+    def _allocate(self, n: int, *, protected: set[str]) -> List[int]:
+        if n == 0:
+            return []
+        next_slot = int(self._db.execute("SELECT COALESCE(MAX(slot) + 1, 0) FROM entries").fetchone()[0])
+        free = max(0, min(n, self._max_entries - next_slot))
+        slots = list(range(next_slot, next_slot + free))  # rows are filled in order until eviction starts
+        if free < n:
+            victims = [
+                (k, s)
+                for k, s in self._db.execute(
+                    "SELECT key, slot FROM entries ORDER BY last_used LIMIT ?", (n - free + len(protected),)
+                ).fetchall()
+                if k not in protected
+            ][: n - free]
+            with self._db:
+                self._db.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k, _ in victims])
+            slots.extend(s for _, s in victims)
+        return slots
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._mm is not None:
+                self._mm.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self._db.close()
+
+
+class CachedEmbedder:
+    """
+    Embedder wrapper backed by an EmbeddingStore.
+
+    Cache keys are sha256 of the text within a namespace of (model name,
+    `variant`, normalize flag, max_length), so vectors are reused across runs
+    for byte-identical chunks. `variant` names the inference backend and
+    precision (e.g. "sbert", "onnx-int8"): the same model run differently
+    gives slightly different vectors, which must not be mixed in one index. Each call looks up the whole batch at once and
+    sends only the misses (deduplicated) to the wrapped embedder.
+    """
+
+    def __init__(
+            self,
+            inner: Embedder,
+            *,
+            cache_dir: str | Path,
+            normalize: bool,
+            max_length: Optional[int],
+            variant: str = "sbert",
+            max_entries: int = 1_000_000,
+    ) -> None:
+        self._inner = inner
+        self._variant = variant
+        namespace = f"{inner.model_name}|{variant}|normalize={normalize}|max_length={max_length}"
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", inner.model_name)
+        store_dir = Path(cache_dir) / f"{safe_name}-{variant}-{text_key(namespace)[:12]}"
+        self._store = EmbeddingStore(store_dir, dim=inner.dimension, max_entries=max_entries, namespace=namespace)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def model_name(self) -> str:
+        return self._inner.model_name
+
+    @property
+    def dimension(self) -> int:
+        return self._inner.dimension
+
+    @property
+    def variant(self) -> str:
+        return self._variant
+
+    @property
+    def store(self) -> EmbeddingStore:
+        return self._store
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        return cast(List[List[float]], self.embed_array(texts).tolist())
+
+    def embed_array(self, texts: List[str]) -> npt.NDArray[np.float32]:
+        out = np.empty((len(texts), self.dimension), dtype=np.float32)
+        if not texts:
+            return out
+        keys = [text_key(t) for t in texts]
+        cached = self._store.get_many(keys)
+
+        missing: Dict[str, str] = {}
+        for k, t in zip(keys, texts):
+            if k not in cached and k not in missing:
+                missing[k] = t
+        if missing:
+            fresh = self._inner.embed_array(list(missing.values()))
+            self._store.put_many(list(missing), fresh)
+            cached.update(zip(missing, fresh))
+
+        # A miss is a text that went to the model; repeats within a batch count as hits
+        self.misses += len(missing)
+        self.hits += len(keys) - len(missing)
+
+        for row, k in enumerate(keys):
+            out[row] = cached[k]
+        return out
+
+    def close(self) -> None:
+        self._store.close()
@@ -1,16 +1,62 @@
 from __future__ import annotations
-from typing import Literal, Any
+from pathlib import Path
+from typing import Literal, Any, Optional
 
 from .interfaces import Embedder
 from .sbert_embedder import SentenceTransformerEmbedder
 
-EmbedBackend = Literal["sbert"]
+EmbedBackend = Literal["sbert", "sbert-pool", "onnx"]
 
 def create_embedder(
         backend: EmbedBackend = "sbert",
         model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        *,
+        cache_dir: Optional[str | Path] = None,
+        cache_max_entries: int = 1_000_000,
         **kwargs: Any,
 ) -> Embedder:
+    """
+    Build an embedder for `backend`. With `cache_dir` set, it is wrapped in a
+    persistent CachedEmbedder so previously embedded texts skip the model.
+    """
+    embedder: Embedder
     if backend == "sbert":
-        return SentenceTransformerEmbedder(model_name=model_name, **kwargs)
-    raise ValueError(f"Unknown backend: {backend}")
+        embedder = SentenceTransformerEmbedder(model_name=model_name, **kwargs)
+    elif backend == "sbert-pool":
+        # kwargs: workers, threads_per_worker, plus SentenceTransformerEmbedder options
+        from .pool_embedder import ProcessPoolEmbedder
+        embedder = ProcessPoolEmbedder(model_name=model_name, **kwargs)
+    elif backend == "onnx":
+        # kwargs: model_dir, quantize, intra_op_threads, batch_size, normalize, max_length
+        from .onnx_embedder import OnnxEmbedder
+        embedder = OnnxEmbedder(model_name=model_name, **kwargs)
+    else:
+        raise ValueError(f"Unknown backend: {backend}")
+
+    if cache_dir is None:
+        return embedder
+
+    from .cache import CachedEmbedder
+    return CachedEmbedder(
+        embedder,
+        cache_dir=cache_dir,
+        normalize=kwargs.get("normalize", True),
+        max_length=kwargs.get("max_length", 1024),
+        variant=cache_variant(backend, quantize=bool(kwargs.get("quantize", False))),
+        max_entries=cache_max_entries,
+    )
+
+
+def embedder_variant(embedder: Embedder) -> str:
+    """
+    Backend/precision variant of a built embedder, as cache_variant names it.
+    Embedders that do not report one (custom or test embedders) count as "sbert".
+    """
+    return str(getattr(embedder, "variant", "sbert"))
+
+
+def cache_variant(backend: EmbedBackend, *, quantize: bool = False) -> str:
+    """Embedding cache namespace part for a backend; sbert-pool runs the same fp32 torch model as sbert."""
+    if backend == "onnx":
+        return "onnx-int8" if quantize else "onnx"
+    return "sbert"
@@ -1,6 +1,9 @@
 from __future__ import annotations
 from typing import List, Protocol
 
+import numpy as np
+import numpy.typing as npt
+
 
 class Embedder(Protocol):
     @property
@@ -8,3 +11,4 @@ class Embedder(Protocol):
     @property
     def dimension(self) -> int: ...
     def embed_texts(self, text: List[str]) -> List[List[float]]: ...
+    def embed_array(self, texts: List[str]) -> npt.NDArray[np.float32]: ...
@@ -2,6 +2,9 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Dict, List
 
+import numpy as np
+import numpy.typing as npt
+
 
 @dataclass(frozen=True)
 class EmbeddedChunk:
@@ -15,4 +18,26 @@ class EmbeddedChunk:
 class EmbedBatchResult:
     doc_id: str
     model_name: str
-    vectors: List[EmbeddedChunk]
+    matrix: npt.NDArray[np.float32]            # (n_chunks, dim), one contiguous float32 block
+    chunk_indices: List[int]                   # row i belongs to chunk_indices[i]
+    payload_columns: Dict[str, List[object]]   # column name -> one value per row
+
+    def __len__(self) -> int:
+        return len(self.chunk_indices)
+
+    def payload(self, row: int) -> Dict[str, object]:
+        return {name: col[row] for name, col in self.payload_columns.items()}
+
+    @property
+    def vectors(self) -> List[EmbeddedChunk]:
+        # Per-chunk view with Python-list vectors; allocates, so avoid on large batches
+        return [
+            EmbeddedChunk(
+                doc_id=self.doc_id,
+                chunk_index=idx,
+                vector=self.matrix[row].tolist(),
+                embedding_model=self.model_name,
+                payload=self.payload(row),
+            )
+            for row, idx in enumerate(self.chunk_indices)
+        ]
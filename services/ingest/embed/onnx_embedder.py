@@ -0,0 +1,198 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Dict, List, Optional, cast
+import json
+import re
+
+import numpy as np
+import numpy.typing as npt
+
+META_FILE = "rag_onnx.json"
+MODEL_FILE = "model.onnx"
+QUANTIZED_MODEL_FILE = "model.int8.onnx"
+DEFAULT_ONNX_DIR = Path("~/.cache/rag-mlops/onnx")
+
+_INPUT_NAMES = ("input_ids", "attention_mask", "token_type_ids")
+
+
+def default_model_dir(model_name: str, *, quantize: bool = False) -> Path:
+    """Export directory under DEFAULT_ONNX_DIR; fp32 and int8 builds get separate ones."""
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+    return DEFAULT_ONNX_DIR / f"{safe_name}-{'int8' if quantize else 'fp32'}"
+
+
+def _position_limit(st: Any) -> Optional[int]:
+    limits: List[int] = []
+    config = getattr(getattr(st[0], "auto_model", None), "config", None)
+    max_pos = getattr(config, "max_position_embeddings", None)
+    if isinstance(max_pos, int):
+        limits.append(max_pos)
+    model_max = getattr(st.tokenizer, "model_max_length", None)
+    if isinstance(model_max, int) and model_max < 1_000_000:  # HF uses a huge sentinel for "no limit"
+        limits.append(model_max)
+    return min(limits) if limits else None
+
+
+def export_onnx(
+        model_name: str,
+        out_dir: str | Path,
+        *,
+        max_length: Optional[int] = 1024,
+        opset: int = 17,
+) -> Path:
+    """
+    Export the full SentenceTransformer pipeline (transformer + pooling, and
+    Normalize if the model has it) to `out_dir/model.onnx`, next to its
+    tokenizer.json and a small metadata file. Needs torch and
+    sentence-transformers; serving the result needs only onnxruntime and
+    tokenizers.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    out = Path(out_dir).expanduser()
+    out.mkdir(parents=True, exist_ok=True)
+
+    st = SentenceTransformer(model_name, device="cpu")
+    limit = _position_limit(st)
+    if max_length is not None:
+        st.max_seq_length = min(int(max_length), limit) if limit else int(max_length)
+    st.eval()
+
+    features = st.tokenize(["probe sentence for export"])
+    names = [n for n in _INPUT_NAMES if n in features]
+
+    class _Pipeline(torch.nn.Module):
+        def __init__(self) -> None:
+            super().__init__()
+            self.st = st
+
+        def forward(self, *inputs: torch.Tensor) -> torch.Tensor:
+            return cast(torch.Tensor, self.st(dict(zip(names, inputs)))["sentence_embedding"])
+
+    dynamic_axes: Dict[str, Dict[int, str]] = {n: {0: "batch", 1: "sequence"} for n in names}
+    dynamic_axes["sentence_embedding"] = {0: "batch"}
+    with torch.no_grad():
+        torch.onnx.export(
+            _Pipeline(),
+            tuple(features[n] for n in names),
+            str(out / MODEL_FILE),
+            input_names=names,
+            output_names=["sentence_embedding"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            dynamo=False,
+        )
+
+    st.tokenizer.save_pretrained(str(out))
+    meta = {
+        "model_name": model_name,
+        "dimension": int(st.get_sentence_embedding_dimension() or 0),
+        "max_seq_length": int(st.max_seq_length),
+        "pad_token": st.tokenizer.pad_token,
+        "pad_token_id": int(st.tokenizer.pad_token_id or 0),
+    }
+    (out / META_FILE).write_text(json.dumps(meta, indent=2))
+    return out / MODEL_FILE
+
+
+def quantize_onnx(model_path: str | Path, out_path: str | Path) -> Path:
+    """Dynamic int8 weight quantization; activations stay float and are quantized at runtime."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(str(model_path), str(out_path), weight_type=QuantType.QInt8)
+    return Path(out_path)
+
+
+class OnnxEmbedder:
+    """
+    Embedder running an exported SentenceTransformer through onnxruntime.
+
+    `model_dir` defaults to ~/.cache/rag-mlops/onnx/<model>-<fp32|int8>; the
+    model is exported there on first use. With quantize=True an int8 copy is made
+    once and used instead. Tokenization, truncation length, the normalize
+    flag and `dimension` match SentenceTransformerEmbedder.
+    """
+
+    def __init__(
+            self,
+            model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+            *,
+            model_dir: Optional[str | Path] = None,
+            quantize: bool = False,
+            batch_size: int = 64,
+            normalize: bool = True,
+            max_length: int | None = 1024,
+            intra_op_threads: Optional[int] = None,
+    ) -> None:
+        import onnxruntime as ort
+        from tokenizers import Tokenizer as HFTokenizer
+
+        if model_dir is None:
+            model_dir = default_model_dir(model_name, quantize=quantize)
+        self._dir = Path(model_dir).expanduser()
+        if not (self._dir / MODEL_FILE).exists():
+            export_onnx(model_name, self._dir, max_length=max_length)
+
+        model_path = self._dir / MODEL_FILE
+        if quantize:
+            quantized = self._dir / QUANTIZED_MODEL_FILE
+            if not quantized.exists():
+                quantize_onnx(model_path, quantized)
+            model_path = quantized
+
+        meta = json.loads((self._dir / META_FILE).read_text())
+        self._model_name = model_name
+        self._variant = "onnx-int8" if quantize else "onnx"
+        self._batch_size = batch_size
+        self._normalize = normalize
+
+        seq_len = int(meta["max_seq_length"])
+        if max_length is not None:
+            seq_len = min(seq_len, int(max_length))
+        self._tokenizer = HFTokenizer.from_file(str(self._dir / "tokenizer.json"))
+        self._tokenizer.enable_truncation(max_length=seq_len)
+        self._tokenizer.enable_padding(pad_id=int(meta["pad_token_id"]), pad_token=str(meta["pad_token"]))
+
+        options = ort.SessionOptions()
+        if intra_op_threads is not None:
+            options.intra_op_num_threads = intra_op_threads
+        self._session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self._input_names = [i.name for i in self._session.get_inputs()]
+
+        self._dim = int(meta.get("dimension") or 0) or int(self._run(["probe"]).shape[1])
+
+    @property
+    def model_name(self) -> str:
+        return self._model_name
+
+    @property
+    def dimension(self) -> int:
+        return self._dim
+
+    @property
+    def variant(self) -> str:
+        return self._variant
+
+    def _run(self, batch: List[str]) -> npt.NDArray[np.float32]:
+        encodings = self._tokenizer.encode_batch(batch)
+        columns = {
+            "input_ids": [e.ids for e in encodings],
+            "attention_mask": [e.attention_mask for e in encodings],
+            "token_type_ids": [e.type_ids for e in encodings],
+        }
+        feed = {name: np.asarray(columns[name], dtype=np.int64) for name in self._input_names}
+        arr = np.asarray(self._session.run(None, feed)[0], dtype=np.float32)
+        if self._normalize:
+            denom = np.maximum(np.linalg.norm(arr, axis=1, keepdims=True), 1e-12)
+            arr = arr / denom
+        return arr
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        return cast(List[List[float]], self.embed_array(texts).tolist())
+
+    def embed_array(self, texts: List[str]) -> npt.NDArray[np.float32]:
+        out = np.empty((len(texts), self._dim), dtype=np.float32)
+        for i in range(0, len(texts), self._batch_size):
+            out[i : i + self._batch_size] = self._run(texts[i : i + self._batch_size])
+        return out
@@ -0,0 +1,176 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing.context import SpawnContext, SpawnProcess
+from typing import Any, Callable, Dict, List, Optional, Tuple, cast
+import os
+import threading
+
+import numpy as np
+import numpy.typing as npt
+
+from .interfaces import Embedder
+from .sbert_embedder import SentenceTransformerEmbedder
+
+EmbedderFactory = Callable[[], Embedder]
+
+# Per-process model instance, created by _init_worker
+_WORKER_EMBEDDER: Optional[Embedder] = None
+
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+# Serializes the temporary os.environ change around each worker spawn
+_SPAWN_ENV_LOCK = threading.Lock()
+
+
+class _ThreadPinnedProcess(SpawnProcess):
+    """
+    Spawn process started with the BLAS/OpenMP thread variables in its environment.
+
+    numpy and torch read these once, when they load; a spawned worker imports
+    numpy while unpickling its initializer, so setting them from inside the
+    worker is too late. The child inherits os.environ at exec time instead.
+    """
+    thread_env: Dict[str, str] = {}
+
+    def start(self) -> None:
+        with _SPAWN_ENV_LOCK:
+            saved = {var: os.environ.get(var) for var in self.thread_env}
+            os.environ.update(self.thread_env)
+            try:
+                super().start()
+            finally:
+                for var, value in saved.items():
+                    if value is None:
+                        os.environ.pop(var, None)
+                    else:
+                        os.environ[var] = value
+
+
+# spawn, not fork: torch thread pools do not survive a fork safely
+class _ThreadPinnedContext(SpawnContext):
+    def __init__(self, threads: int) -> None:
+        self._thread_env = {var: str(threads) for var in THREAD_ENV_VARS}
+
+    def Process(self, *args: Any, **kwargs: Any) -> _ThreadPinnedProcess:  # type: ignore[override]
+        proc = _ThreadPinnedProcess(*args, **kwargs)
+        proc.thread_env = self._thread_env
+        return proc
+
+
+def _init_worker(factory: EmbedderFactory, threads: int) -> None:
+    # Env vars were set at spawn (see _ThreadPinnedProcess); torch also takes them at runtime
+    try:
+        import torch
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+    except (ImportError, RuntimeError):
+        pass
+
+    global _WORKER_EMBEDDER
+    _WORKER_EMBEDDER = factory()
+
+
+def _worker() -> Embedder:
+    if _WORKER_EMBEDDER is None:
+        raise RuntimeError("embedding worker was not initialized")
+    return _WORKER_EMBEDDER
+
+
+def _worker_info() -> Tuple[str, int]:
+    w = _worker()
+    return w.model_name, w.dimension
+
+
+def _worker_embed(texts: List[str]) -> npt.NDArray[np.float32]:
+    return _worker().embed_array(texts)
+
+
+class ProcessPoolEmbedder:
+    """
+    Runs one embedder per worker process for CPU-only hosts.
+
+    Batches are spread over `workers` spawned processes, each holding its own
+    model copy with `threads_per_worker` torch/BLAS threads, and results are
+    gathered in input order. All workers are started and load their model in
+    the constructor. By default every worker builds a CPU
+    SentenceTransformerEmbedder from `model_name` and `embedder_kwargs`;
+    `embedder_factory` (a picklable zero-argument callable) replaces that.
+    """
+
+    def __init__(
+            self,
+            model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+            *,
+            workers: Optional[int] = None,
+            threads_per_worker: int = 1,
+            batch_size: int = 64,
+            embedder_factory: Optional[EmbedderFactory] = None,
+            **embedder_kwargs: Any,
+    ) -> None:
+        if threads_per_worker < 1:
+            raise ValueError("threads_per_worker must be >= 1")
+        if workers is None:
+            workers = max(1, (os.cpu_count() or 1) // threads_per_worker)
+        if embedder_factory is None:
+            embedder_kwargs.setdefault("device", "cpu")
+            embedder_factory = partial(
+                SentenceTransformerEmbedder, model_name=model_name, batch_size=batch_size, **embedder_kwargs
+            )
+
+        self._workers = workers
+        self._batch_size = batch_size
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=_ThreadPinnedContext(threads_per_worker),
+            initializer=_init_worker,
+            initargs=(embedder_factory, threads_per_worker),
+        )
+        # One task per worker, submitted together: the executor spawns a process for each
+        # submit while none is idle, so all models load now, in parallel, not on first use
+        infos = [self._pool.submit(_worker_info) for _ in range(workers)]
+        self._model_name, self._dim = infos[0].result()
+        for f in infos[1:]:
+            f.result()
+
+    @property
+    def model_name(self) -> str:
+        return self._model_name
+
+    @property
+    def dimension(self) -> int:
+        return self._dim
+
+    @property
+    def variant(self) -> str:
+        return "sbert"
+
+    @property
+    def workers(self) -> int:
+        return self._workers
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        return cast(List[List[float]], self.embed_array(texts).tolist())
+
+    def embed_array(self, texts: List[str]) -> npt.NDArray[np.float32]:
+        out = np.empty((len(texts), self._dim), dtype=np.float32)
+        if not texts:
+            return out
+        # Smaller batches for small inputs so every worker gets a share
+        size = max(1, min(self._batch_size, -(-len(texts) // self._workers)))
+        batches = [texts[i : i + size] for i in range(0, len(texts), size)]
+
+        row = 0
+        for arr in self._pool.map(_worker_embed, batches):
+            out[row : row + len(arr)] = arr
+            row += len(arr)
+        return out
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> ProcessPoolEmbedder:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
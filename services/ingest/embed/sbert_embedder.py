@@ -1,16 +1,43 @@
 from __future__ import annotations
-from typing import Optional, List, Iterable, cast
-import torch
+from typing import Any, Optional, List, Iterable, Sequence, cast
 import numpy as np
+import numpy.typing as npt
 
 from .interfaces import Embedder
 
 
+MAX_DYNAMIC_BATCH = 512  # upper bound on texts per batch in token-budget mode
+
+
 def _batch_iter(xs: List[str], batch_size: int) -> Iterable[List[str]]:
     for i in range(0, len(xs), batch_size):
         yield xs[i : i + batch_size]
 
 
+def _token_budget_batches(
+        lengths: Sequence[int], max_batch_tokens: int, max_batch_size: int = MAX_DYNAMIC_BATCH
+) -> List[List[int]]:
+    """
+    Group text indices, longest first, so that each batch's padded size
+    (rows x longest row) stays within `max_batch_tokens`. A single text longer
+    than the budget still gets a batch of its own.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    batches: List[List[int]] = []
+    current: List[int] = []
+    longest = 0
+    for i in order:
+        n = max(1, lengths[i])
+        if current and (max(longest, n) * (len(current) + 1) > max_batch_tokens or len(current) >= max_batch_size):
+            batches.append(current)
+            current, longest = [], 0
+        current.append(i)
+        longest = max(longest, n)
+    if current:
+        batches.append(current)
+    return batches
+
+
 class SentenceTransformerEmbedder(Embedder):
     def __init__(
             self,
@@ -19,7 +46,9 @@ class SentenceTransformerEmbedder(Embedder):
             device: Optional[str] = None,
             batch_size: int = 64,
             normalize: bool = True,
-            max_length: int | None = 1024) -> None:
+            max_length: int | None = 1024,
+            max_batch_tokens: int | None = None) -> None:
+        import torch
         from sentence_transformers import SentenceTransformer
 
         if device is None:
@@ -32,6 +61,8 @@ class SentenceTransformerEmbedder(Embedder):
         self._model_name = model_name
         self._batch_size = batch_size
         self._normalize = normalize
+        # When set, batches are formed by padded token count instead of batch_size
+        self._max_batch_tokens = max_batch_tokens
 
         if max_length is not None:
             cap = int(max_length)
@@ -55,21 +86,52 @@ class SentenceTransformerEmbedder(Embedder):
     def dimension(self) -> int:
         return self._dim
 
-    def embed_texts(self, texts: List[str]) -> List[List[float]]:
-        vecs: List[np.ndarray] = []
+    @property
+    def variant(self) -> str:
+        return "sbert"
 
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        return cast(List[List[float]], self.embed_array(texts).tolist())
+
+    def _token_lengths(self, texts: List[str]) -> List[int]:
+        tokenizer = getattr(self._model, "tokenizer", None)
+        if tokenizer is None:
+            return [len(t) // 4 + 1 for t in texts]  # rough chars-per-token fallback
+        encoded = tokenizer(
+            texts,
+            add_special_tokens=True,
+            truncation=True,
+            max_length=self._model.max_seq_length,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+        )
+        return [len(ids) for ids in encoded["input_ids"]]
+
+    def _encode(self, batch: List[str], **encode_kwargs: Any) -> npt.NDArray[np.float32]:
+        arr = self._model.encode(
+            batch,
+            convert_to_numpy=True,
+            normalize_embeddings=False,
+            show_progress_bar=False,
+            **encode_kwargs,
+        )
+        if self._normalize:
+            denom = np.maximum(np.linalg.norm(arr, axis=1, keepdims=True), 1e-12)
+            arr = arr / denom
+        return cast(npt.NDArray[np.float32], arr)
+
+    def embed_array(self, texts: List[str]) -> npt.NDArray[np.float32]:
+        out = np.empty((len(texts), self._dim), dtype=np.float32)
+
+        if self._max_batch_tokens is not None:
+            # Similar lengths share a batch, so little compute is spent on padding
+            for idx in _token_budget_batches(self._token_lengths(texts), self._max_batch_tokens):
+                out[idx] = self._encode([texts[i] for i in idx], batch_size=len(idx))
+            return out
+
+        row = 0
         for batch in _batch_iter(texts, self._batch_size):
-            arr = self._model.encode(
-                batch,
-                convert_to_numpy=True,
-                normalize_embeddings=False,
-                show_progress_bar=False,
-            )
-            if self._normalize:
-                denom = np.maximum(np.linalg.norm(arr, axis=1, keepdims=True), 1e-12)
-                arr = arr / denom
-
-            vecs.append(arr)
-
-        out = np.vstack(vecs) if vecs else np.zeros((0, self._dim), dtype=np.float32)
-        return cast(List[List[float]], out.astype(np.float32).tolist())
+            out[row : row + len(batch)] = self._encode(batch)
+            row += len(batch)
+
+        return out
@@ -0,0 +1,160 @@
+from __future__ import annotations
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Literal, Optional
+
+from services.ingest.chunk import chunk_rawdoc
+from services.ingest.embed.adapters import embed_chunked_doc
+from services.ingest.embed.factory import embedder_variant
+from services.ingest.embed.interfaces import Embedder
+from services.ingest.index.chunk_store import ChunkTextStore
+from services.ingest.index.qdrant_client import delete_chunks, upsert_embedded_chunks
+from services.ingest.manifest import IngestManifest, ManifestEntry
+from services.ingest.normalize.cleaner import NORMALIZATION_VERSION
+from services.ingest.pdf_reader import iter_pdf_pages
+
+IngestStatus = Literal["skipped", "added", "updated"]
+
+@dataclass(frozen=True)
+class IngestOutcome:
+    doc_id: str
+    status: IngestStatus
+    chunk_count: int
+    deleted_chunks: int = 0
+
+
+def plan_entry(
+        *,
+        doc_id: str,
+        source_value: str,
+        content_hash: str,
+        embedder: Embedder,
+        tokenizer_name: str,
+        chunk_size: int,
+        overlap: int,
+        max_chars: Optional[int],
+    ) -> ManifestEntry:
+    """Manifest entry for a document about to be ingested; normalized_hash and chunk_count are filled in later."""
+    return ManifestEntry(
+        doc_id=doc_id,
+        source_value=source_value,
+        content_hash=content_hash,
+        normalized_hash="",
+        normalization_version=NORMALIZATION_VERSION,
+        tokenizer_name=tokenizer_name,
+        chunk_size=chunk_size,
+        chunk_overlap=overlap,
+        embedding_model=embedder.model_name,
+        chunk_count=0,
+        embedding_variant=embedder_variant(embedder),
+        max_chars=max_chars,
+    )
+
+
+def is_up_to_date(previous: Optional[ManifestEntry], planned: ManifestEntry) -> bool:
+    """True if `previous` was ingested with `planned`'s settings and no page failed."""
+    # A document with failed pages is never up to date: the next run tries those pages again
+    return previous is not None and previous.complete and previous.same_settings(planned)
+
+
+def finish_document(
+        manifest: IngestManifest,
+        client: Any,
+        collection: str,
+        previous: Optional[ManifestEntry],
+        current: ManifestEntry,
+        *,
+        text_store: Optional[ChunkTextStore] = None,
+    ) -> int:
+    """
+    Called once `current`'s chunks are upserted: deletes chunk indices the
+    document no longer has and any other doc_id stored for the same source,
+    then records `current`. Returns the number of chunks deleted.
+    """
+    deleted = 0
+    if previous is not None and previous.chunk_count > current.chunk_count:
+        deleted += delete_chunks(
+            client,
+            collection,
+            current.doc_id,
+            range(current.chunk_count, previous.chunk_count),
+            text_store=text_store,
+        )
+    for old in manifest.find_by_source(current.source_value):
+        if old.doc_id != current.doc_id:
+            deleted += delete_chunks(
+                client, collection, old.doc_id, range(old.chunk_count), text_store=text_store
+            )
+            manifest.remove(old.doc_id)
+
+    manifest.record(current)
+    return deleted
+
+
+def ingest_pdf_incremental(
+        path: str | Path,
+        *,
+        manifest: IngestManifest,
+        client: Any,
+        collection: str,
+        embedder: Embedder,
+        doc_id: Optional[str] = None,
+        tokenizer_name: str = "cl100k_base",
+        chunk_size: int = 800,
+        overlap: int = 160,
+        max_chars: Optional[int] = 1500,
+        text_store: Optional[ChunkTextStore] = None,
+    ) -> IngestOutcome:
+    """
+    Ingest one PDF unless the manifest shows it is already indexed as-is.
+
+    The file is hashed before parsing; if the hash and all chunking/embedding
+    settings (model, backend variant, max_chars) match the manifest, and no
+    page failed to extract last time, the document is skipped without being read.
+    Otherwise it is re-chunked and re-embedded, points for chunk indices that
+    no longer exist are deleted, and the manifest is updated. If the same
+    source was previously stored under another doc_id (the default doc_id
+    contains the content hash), that doc's points are removed as well.
+    With `text_store`, chunk texts are kept there instead of in payloads.
+    """
+    stream = iter_pdf_pages(path, doc_id=doc_id, keep_raw=False)
+    planned = plan_entry(
+        doc_id=stream.doc_id,
+        source_value=stream.source_value,
+        content_hash=stream.content_hash,
+        embedder=embedder,
+        tokenizer_name=tokenizer_name,
+        chunk_size=chunk_size,
+        overlap=overlap,
+        max_chars=max_chars,
+    )
+
+    previous = manifest.get(stream.doc_id)
+    up_to_date = is_up_to_date(previous, planned)
+    if previous is not None and up_to_date and previous.content_hash == planned.content_hash:
+        return IngestOutcome(doc_id=stream.doc_id, status="skipped", chunk_count=previous.chunk_count)
+
+    chunked = chunk_rawdoc(stream, tokenizer_name=tokenizer_name, chunk_size=chunk_size, overlap=overlap)
+    current = replace(
+        planned,
+        normalized_hash=stream.meta["normalized_hash"],
+        chunk_count=len(chunked.chunks),
+        failed_pages=stream.meta.get("failed_pages", ""),
+    )
+
+    # File bytes changed (e.g. re-saved metadata) but the extracted text did not
+    if previous is not None and up_to_date and previous.normalized_hash == current.normalized_hash:
+        manifest.record(current)
+        return IngestOutcome(doc_id=current.doc_id, status="skipped", chunk_count=current.chunk_count)
+
+    upsert_embedded_chunks(
+        client, collection, embed_chunked_doc(embedder, chunked, max_chars=max_chars), text_store=text_store
+    )
+
+    deleted = finish_document(manifest, client, collection, previous, current, text_store=text_store)
+    return IngestOutcome(
+        doc_id=current.doc_id,
+        status="added" if previous is None else "updated",
+        chunk_count=current.chunk_count,
+        deleted_chunks=deleted,
+    )
@@ -1,18 +1,43 @@
 from .qdrant_client import (
     connect_qdrant as connect_qdrant,
     ensure_collection as ensure_collection,
+    collection_drift as collection_drift,
     upsert_embedded_chunks as upsert_embedded_chunks,
+    bulk_upsert as bulk_upsert,
+    delete_chunks as delete_chunks,
     search as search,
+    asearch as asearch,
+    search_batch as search_batch,
+    search_params as search_params,
     make_point_id as make_point_id,
 )
-from .schemas import CollectionSpec as CollectionSpec, DEFAULT_COLLECTION as DEFAULT_COLLECTION
+from .chunk_store import ChunkTextStore as ChunkTextStore
+from .local_index import LocalIndexClient as LocalIndexClient
+from .schemas import (
+    CollectionSpec as CollectionSpec,
+    QuantizationSpec as QuantizationSpec,
+    HnswSpec as HnswSpec,
+    OptimizerSpec as OptimizerSpec,
+    DEFAULT_COLLECTION as DEFAULT_COLLECTION,
+)
 
 __all__ = [
     "connect_qdrant",
     "ensure_collection",
+    "collection_drift",
     "upsert_embedded_chunks",
+    "bulk_upsert",
+    "delete_chunks",
     "search",
+    "asearch",
+    "search_batch",
+    "search_params",
     "make_point_id",
+    "ChunkTextStore",
+    "LocalIndexClient",
     "CollectionSpec",
+    "QuantizationSpec",
+    "HnswSpec",
+    "OptimizerSpec",
     "DEFAULT_COLLECTION",
 ]
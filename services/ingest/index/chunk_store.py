@@ -0,0 +1,76 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple
+import sqlite3
+import threading
+
+from .qdrant_client import make_point_id
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    point_id TEXT PRIMARY KEY,
+    doc_id TEXT NOT NULL,
+    chunk_index INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+"""
+
+_SQL_BATCH = 500  # ids per IN (...) query, well under SQLite's variable limit
+
+
+class ChunkTextStore:
+    """
+    SQLite store of chunk texts keyed by Qdrant point id (make_point_id).
+
+    Keeping texts here instead of in Qdrant payloads keeps the index's
+    memory and search responses small; the Retriever fetches texts for its
+    final hits in one query. Safe to share between threads.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self._path = str(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self._path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def put_many(self, items: Iterable[Tuple[str, int, str]]) -> None:
+        """Store (doc_id, chunk_index, text) triples, replacing existing texts for the same chunk."""
+        rows = [(make_point_id(doc_id, i), doc_id, int(i), t) for doc_id, i, t in items]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (point_id, doc_id, chunk_index, text) VALUES (?, ?, ?, ?)", rows
+            )
+
+    def get_many(self, point_ids: Sequence[str]) -> Dict[str, str]:
+        ids = list(dict.fromkeys(str(p) for p in point_ids))
+        out: Dict[str, str] = {}
+        with self._lock:
+            for i in range(0, len(ids), _SQL_BATCH):
+                part = ids[i : i + _SQL_BATCH]
+                out.update(
+                    self._conn.execute(
+                        f"SELECT point_id, text FROM chunks WHERE point_id IN ({', '.join('?' for _ in part)})", part
+                    ).fetchall()
+                )
+        return out
+
+    def delete(self, doc_id: str, chunk_indices: Iterable[int]) -> None:
+        ids: List[tuple[str]] = [(make_point_id(doc_id, i),) for i in chunk_indices]
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM chunks WHERE point_id = ?", ids)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0])
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> ChunkTextStore:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
@@ -0,0 +1,491 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import copy
+import json
+import shutil
+import sqlite3
+import threading
+
+import numpy as np
+import numpy.typing as npt
+from pydantic import TypeAdapter
+from qdrant_client.http.models import (
+    Batch, CollectionConfig, CollectionDescription, CollectionInfo, CollectionParams, CollectionParamsDiff,
+    CollectionsResponse, CollectionStatus, CountResult, Distance, FieldCondition, Filter, FilterSelector, HnswConfig,
+    HnswConfigDiff, MatchValue, OptimizersConfig, OptimizersConfigDiff, OptimizersStatusOneOf, PointIdsList,
+    PointStruct, QuantizationConfig, QueryRequest, QueryResponse, ScoredPoint, UpdateResult, UpdateStatus,
+    VectorParams, VectorParamsDiff,
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS points (
+    point_id TEXT PRIMARY KEY,
+    row INTEGER NOT NULL UNIQUE,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS collection_meta (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_INITIAL_ROWS = 1024
+
+# Reported for settings a collection was not given, matching Qdrant's server defaults
+_DEFAULT_HNSW: Dict[str, Any] = {"m": 16, "ef_construct": 100, "full_scan_threshold": 10_000}
+_DEFAULT_OPTIMIZERS: Dict[str, Any] = {
+    "deleted_threshold": 0.2, "vacuum_min_vector_number": 1000, "default_segment_number": 0,
+    "indexing_threshold": 20_000, "flush_interval_sec": 5,
+}
+_QUANTIZATION: TypeAdapter[QuantizationConfig] = TypeAdapter(QuantizationConfig)
+
+
+class LocalCollection:
+    """
+    One collection stored as a memory-mapped float32 matrix (`vectors.f32`)
+    plus an SQLite payload sidecar mapping point ids to rows. Search is
+    exact: a matrix-vector product over all live rows and an argpartition
+    top-k. Cosine collections store unit vectors, so their score is a dot
+    product; Euclid scores are distances (smaller is closer), as in Qdrant.
+    """
+
+    def __init__(self, path: Path, *, dim: Optional[int] = None, distance: Optional[str] = None) -> None:
+        self._dir = path
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self._dir / "payloads.sqlite"), check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+        meta = dict(self._db.execute("SELECT name, value FROM collection_meta").fetchall())
+        if not meta:
+            if dim is None or distance is None:
+                raise ValueError(f"No local collection at {self._dir}")
+            with self._db:
+                self._db.executemany(
+                    "INSERT INTO collection_meta (name, value) VALUES (?, ?)",
+                    [("dim", str(dim)), ("distance", distance)],
+                )
+            meta = {"dim": str(dim), "distance": distance}
+        self.dim = int(meta["dim"])
+        self.distance = Distance(meta["distance"])
+        self._settings: Dict[str, Any] = json.loads(meta.get("settings", "{}"))
+
+        self._vec_path = self._dir / "vectors.f32"
+        self._vec_path.touch(exist_ok=True)
+        self._capacity = self._vec_path.stat().st_size // (4 * self.dim)
+        self._mm: Optional[np.memmap] = None
+        self._map()
+
+        # In-memory view of the sidecar: row <-> id, payloads, and which rows are live
+        self._rows: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = [None] * self._capacity
+        self._payloads: List[Optional[Dict[str, Any]]] = [None] * self._capacity
+        for pid, row, payload in self._db.execute("SELECT point_id, row, payload FROM points"):
+            self._rows[pid] = row
+            self._ids[row] = pid
+            self._payloads[row] = json.loads(payload)
+        self._high = max(self._rows.values(), default=-1) + 1
+        self._free = [r for r in range(self._high) if self._ids[r] is None]
+        self._sqnorms = np.zeros(self._capacity, dtype=np.float32)
+        if self._high:
+            assert self._mm is not None
+            block = self._mm[: self._high]
+            self._sqnorms[: self._high] = np.einsum("ij,ij->i", block, block)
+        self._columns: Dict[str, npt.NDArray[Any]] = {}
+
+    def _map(self) -> None:
+        self._mm = (
+            np.memmap(self._vec_path, dtype=np.float32, mode="r+", shape=(self._capacity, self.dim))
+            if self._capacity
+            else None
+        )
+
+    def _grow(self, rows: int) -> None:
+        if rows <= self._capacity:
+            return
+        new_capacity = max(rows, 2 * self._capacity, _INITIAL_ROWS)
+        if self._mm is not None:
+            self._mm.flush()
+        with self._vec_path.open("r+b") as f:
+            f.truncate(new_capacity * self.dim * 4)
+        extra = new_capacity - self._capacity
+        self._ids.extend([None] * extra)
+        self._payloads.extend([None] * extra)
+        self._sqnorms = np.concatenate([self._sqnorms, np.zeros(extra, dtype=np.float32)])
+        self._capacity = new_capacity
+        self._map()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def settings(self) -> Dict[str, Any]:
+        """Index/storage settings as last created or updated; reported, not applied (search is always exact)."""
+        return copy.deepcopy(self._settings)
+
+    def set_settings(self, settings: Dict[str, Any]) -> None:
+        with self._lock:
+            self._settings = copy.deepcopy(settings)
+            with self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO collection_meta (name, value) VALUES ('settings', ?)",
+                    (json.dumps(self._settings),),
+                )
+
+    def upsert(self, ids: Sequence[Any], vectors: npt.NDArray[np.float32], payloads: Sequence[Dict[str, Any]]) -> None:
+        vecs = np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dim)
+        if self.distance == Distance.COSINE:
+            vecs = (vecs / np.maximum(np.linalg.norm(vecs, axis=1, keepdims=True), 1e-12)).astype(np.float32, copy=False)
+        keys = [json.dumps(i) for i in ids]
+        with self._lock:
+            rows: List[int] = []
+            for key in keys:
+                row = self._rows.get(key)
+                if row is None:
+                    row = self._free.pop() if self._free else self._high
+                    self._high = max(self._high, row + 1)
+                    self._rows[key] = row
+                rows.append(row)
+            self._grow(self._high)
+            assert self._mm is not None
+            self._mm[rows] = vecs
+            self._sqnorms[rows] = np.einsum("ij,ij->i", vecs, vecs)
+            for key, row, payload in zip(keys, rows, payloads):
+                self._ids[row] = key
+                self._payloads[row] = dict(payload)
+            self._columns.clear()
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO points (point_id, row, payload) VALUES (?, ?, ?)",
+                    [(k, r, json.dumps(p)) for k, r, p in zip(keys, rows, payloads)],
+                )
+
+    def delete(self, ids: Sequence[Any]) -> None:
+        with self._lock:
+            self._delete_keys([json.dumps(i) for i in ids])
+
+    def delete_where(self, filter_eq: Optional[Dict[str, Any]]) -> int:
+        """Delete the points whose payload matches `filter_eq`; returns how many there were."""
+        with self._lock:
+            keys = [k for k in (self._ids[row] for row in np.flatnonzero(self._mask(filter_eq))) if k is not None]
+            self._delete_keys(keys)
+            return len(keys)
+
+    def _delete_keys(self, keys: List[str]) -> None:
+        for key in keys:
+            row = self._rows.pop(key, None)
+            if row is not None:
+                self._ids[row] = None
+                self._payloads[row] = None
+                self._free.append(row)
+        self._columns.clear()
+        with self._db:
+            self._db.executemany("DELETE FROM points WHERE point_id = ?", [(k,) for k in keys])
+
+    def _column(self, key: str) -> npt.NDArray[Any]:
+        # Payload field as an object array over rows, rebuilt after writes; equality filters compare against it
+        col = self._columns.get(key)
+        if col is None:
+            col = np.empty(self._high, dtype=object)
+            col[:] = [p.get(key) if p is not None else None for p in self._payloads[: self._high]]
+            self._columns[key] = col
+        return col
+
+    def _mask(self, filter_eq: Optional[Dict[str, Any]]) -> npt.NDArray[np.bool_]:
+        mask = np.fromiter((i is not None for i in self._ids[: self._high]), dtype=bool, count=self._high)
+        for key, value in (filter_eq or {}).items():
+            mask &= self._column(key) == value
+        return mask
+
+    def search_many(
+            self,
+            queries: npt.NDArray[np.float32],
+            top_ks: Sequence[int],
+            filters_eq: Sequence[Optional[Dict[str, Any]]],
+    ) -> List[List[Tuple[str, float, Dict[str, Any]]]]:
+        q = np.asarray(queries, dtype=np.float32).reshape(len(top_ks), self.dim)
+        if self.distance == Distance.COSINE:
+            q = (q / np.maximum(np.linalg.norm(q, axis=1, keepdims=True), 1e-12)).astype(np.float32, copy=False)
+        with self._lock:
+            if self._high == 0 or self._mm is None:
+                return [[] for _ in top_ks]
+            # (n_rows, n_queries) in one product; higher is better in `rank`
+            dots = self._mm[: self._high] @ q.T
+            if self.distance == Distance.EUCLID:
+                sq = self._sqnorms[: self._high, None] - 2 * dots + np.einsum("ij,ij->i", q, q)[None, :]
+                rank = -sq
+            else:
+                rank = dots
+
+            out: List[List[Tuple[str, float, Dict[str, Any]]]] = []
+            masks: Dict[str, npt.NDArray[np.bool_]] = {}
+            for j, (k, f) in enumerate(zip(top_ks, filters_eq)):
+                fkey = json.dumps(f or {}, sort_keys=True)
+                if fkey not in masks:
+                    masks[fkey] = self._mask(f)
+                mask = masks[fkey]
+                candidates = np.flatnonzero(mask)
+                k = min(int(k), len(candidates))
+                if k <= 0:
+                    out.append([])
+                    continue
+                col = rank[candidates, j]
+                top = np.argpartition(-col, k - 1)[:k]
+                top = top[np.argsort(-col[top], kind="stable")]
+                hits: List[Tuple[str, float, Dict[str, Any]]] = []
+                for t in top:
+                    row = int(candidates[t])
+                    score = float(np.sqrt(max(-col[t], 0.0))) if self.distance == Distance.EUCLID else float(col[t])
+                    hits.append((self._ids[row], score, self._payloads[row]))  # type: ignore[arg-type]
+                out.append(hits)
+            return out
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._mm is not None:
+                self._mm.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self._db.close()
+
+
+def _filter_to_eq(query_filter: Optional[Filter]) -> Optional[Dict[str, Any]]:
+    if query_filter is None:
+        return None
+    must = query_filter.must or []
+    conditions = must if isinstance(must, list) else [must]
+    if query_filter.should or query_filter.must_not:
+        raise NotImplementedError("LocalIndexClient only supports `must` equality filters")
+    out: Dict[str, Any] = {}
+    for c in conditions:
+        if not (isinstance(c, FieldCondition) and isinstance(c.match, MatchValue)):
+            raise NotImplementedError("LocalIndexClient only supports `must` equality filters")
+        out[c.key] = c.match.value
+    return out
+
+
+def _merge_settings(
+        settings: Dict[str, Any],
+        *,
+        hnsw_config: Optional[HnswConfigDiff] = None,
+        optimizers_config: Optional[OptimizersConfigDiff] = None,
+        quantization_config: Optional[QuantizationConfig] = None,
+        vectors_on_disk: Optional[bool] = None,
+        on_disk_payload: Optional[bool] = None,
+) -> Dict[str, Any]:
+    # Same semantics as a Qdrant update: only the fields that are set change
+    out = dict(settings)
+    if hnsw_config is not None:
+        out["hnsw"] = {**out.get("hnsw", {}), **hnsw_config.model_dump(mode="json", exclude_none=True)}
+    if optimizers_config is not None:
+        diff = optimizers_config.model_dump(mode="json", exclude_none=True)
+        if not isinstance(diff.get("max_optimization_threads", 0), int):
+            diff.pop("max_optimization_threads")  # "auto" has no OptimizersConfig equivalent
+        out["optimizers"] = {**out.get("optimizers", {}), **diff}
+    if quantization_config is not None:
+        out["quantization"] = _QUANTIZATION.dump_python(quantization_config, mode="json", exclude_none=True)
+    if vectors_on_disk is not None:
+        out["vectors_on_disk"] = vectors_on_disk
+    if on_disk_payload is not None:
+        out["on_disk_payload"] = on_disk_payload
+    return out
+
+
+def _select_payload(payload: Dict[str, Any], with_payload: Any) -> Optional[Dict[str, Any]]:
+    if with_payload is True:
+        return dict(payload)
+    if not with_payload:
+        return None
+    return {k: payload[k] for k in with_payload if k in payload}
+
+
+class LocalIndexClient:
+    """
+    In-process, exact vector index that stands in for QdrantClient.
+
+    Implements the subset of the QdrantClient API used by this package
+    (collections, upsert, delete, query_points, query_batch_points, count),
+    so ensure_collection, upsert_embedded_chunks, bulk_upsert, delete_chunks,
+    search, search_batch and the Retriever all work with it unchanged. Each
+    collection is a LocalCollection directory below `path`. Only `must`
+    equality filters (what `filter_eq` builds) are supported, in queries and
+    in deletes by FilterSelector (bulk_upsert's wait=False barrier). HNSW,
+    quantization, optimizer and on-disk settings are stored and reported
+    back by get_collection, so collection_drift sees what was asked for,
+    but search is always exact and storage always memory-mapped.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self._root = Path(path)
+        self._root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._collections: Dict[str, LocalCollection] = {}
+        for d in sorted(self._root.iterdir()):
+            if (d / "payloads.sqlite").exists():
+                self._collections[d.name] = LocalCollection(d)
+
+    def _get(self, name: str) -> LocalCollection:
+        coll = self._collections.get(name)
+        if coll is None:
+            raise ValueError(f"Collection {name} not found")
+        return coll
+
+    def get_collections(self) -> CollectionsResponse:
+        return CollectionsResponse(collections=[CollectionDescription(name=n) for n in self._collections])
+
+    def collection_exists(self, collection_name: str) -> bool:
+        return collection_name in self._collections
+
+    def create_collection(
+            self,
+            collection_name: str,
+            vectors_config: VectorParams,
+            *,
+            hnsw_config: Optional[HnswConfigDiff] = None,
+            optimizers_config: Optional[OptimizersConfigDiff] = None,
+            quantization_config: Optional[QuantizationConfig] = None,
+            on_disk_payload: Optional[bool] = None,
+            **_: Any,
+    ) -> bool:
+        with self._lock:
+            if collection_name in self._collections:
+                raise ValueError(f"Collection {collection_name} already exists")
+            coll = LocalCollection(
+                self._root / collection_name, dim=vectors_config.size, distance=Distance(vectors_config.distance).value
+            )
+            coll.set_settings(_merge_settings(
+                {},
+                hnsw_config=hnsw_config,
+                optimizers_config=optimizers_config,
+                quantization_config=quantization_config,
+                vectors_on_disk=vectors_config.on_disk,
+                on_disk_payload=on_disk_payload,
+            ))
+            self._collections[collection_name] = coll
+        return True
+
+    def delete_collection(self, collection_name: str, **_: Any) -> bool:
+        with self._lock:
+            coll = self._collections.pop(collection_name, None)
+        if coll is None:
+            return False
+        coll.close()
+        shutil.rmtree(self._root / collection_name)
+        return True
+
+    def get_collection(self, collection_name: str) -> CollectionInfo:
+        coll = self._get(collection_name)
+        settings = coll.settings
+        quantization = settings.get("quantization")
+        return CollectionInfo(
+            status=CollectionStatus.GREEN,
+            optimizer_status=OptimizersStatusOneOf.OK,
+            points_count=len(coll),
+            segments_count=1,
+            payload_schema={},
+            config=CollectionConfig(
+                params=CollectionParams(
+                    vectors=VectorParams(size=coll.dim, distance=coll.distance, on_disk=settings.get("vectors_on_disk")),
+                    on_disk_payload=settings.get("on_disk_payload"),
+                ),
+                hnsw_config=HnswConfig(**{**_DEFAULT_HNSW, **settings.get("hnsw", {})}),
+                optimizer_config=OptimizersConfig(**{**_DEFAULT_OPTIMIZERS, **settings.get("optimizers", {})}),
+                quantization_config=_QUANTIZATION.validate_python(quantization) if quantization else None,
+            ),
+        )
+
+    def create_payload_index(self, *_: Any, **__: Any) -> None:
+        return None  # filters are evaluated on payload columns; there is nothing to index
+
+    def update_collection(
+            self,
+            collection_name: str,
+            *,
+            optimizers_config: Optional[OptimizersConfigDiff] = None,
+            hnsw_config: Optional[HnswConfigDiff] = None,
+            quantization_config: Optional[QuantizationConfig] = None,
+            vectors_config: Optional[Dict[str, VectorParamsDiff]] = None,
+            collection_params: Optional[CollectionParamsDiff] = None,
+            **_: Any,
+    ) -> bool:
+        coll = self._get(collection_name)
+        vectors = (vectors_config or {}).get("")
+        coll.set_settings(_merge_settings(
+            coll.settings,
+            hnsw_config=hnsw_config,
+            optimizers_config=optimizers_config,
+            quantization_config=quantization_config,
+            vectors_on_disk=vectors.on_disk if vectors is not None else None,
+            on_disk_payload=collection_params.on_disk_payload if collection_params is not None else None,
+        ))
+        return True
+
+    def upsert(self, collection_name: str, points: Batch | Sequence[PointStruct], wait: bool = True, **_: Any) -> UpdateResult:
+        coll = self._get(collection_name)
+        if isinstance(points, Batch):
+            ids = list(points.ids)
+            vectors = np.asarray(points.vectors, dtype=np.float32)
+            payloads = list(points.payloads) if points.payloads is not None else [{} for _ in ids]
+        else:
+            ids = [p.id for p in points]
+            vectors = np.asarray([p.vector for p in points], dtype=np.float32)
+            payloads = [p.payload or {} for p in points]
+        coll.upsert(ids, vectors, [p or {} for p in payloads])
+        return UpdateResult(operation_id=0, status=UpdateStatus.COMPLETED)
+
+    def delete(
+            self,
+            collection_name: str,
+            points_selector: PointIdsList | FilterSelector,
+            wait: bool = True,
+            **_: Any,
+    ) -> UpdateResult:
+        coll = self._get(collection_name)
+        if isinstance(points_selector, PointIdsList):
+            coll.delete(list(points_selector.points))
+        elif isinstance(points_selector, FilterSelector):
+            coll.delete_where(_filter_to_eq(points_selector.filter))
+        else:
+            raise NotImplementedError("LocalIndexClient only deletes by PointIdsList or FilterSelector")
+        return UpdateResult(operation_id=0, status=UpdateStatus.COMPLETED)
+
+    def count(self, collection_name: str, **_: Any) -> CountResult:
+        return CountResult(count=len(self._get(collection_name)))
+
+    def _response(self, hits: List[Tuple[str, float, Dict[str, Any]]], with_payload: Any) -> QueryResponse:
+        return QueryResponse(points=[
+            ScoredPoint(id=json.loads(pid), version=0, score=score, payload=_select_payload(payload, with_payload))
+            for pid, score, payload in hits
+        ])
+
+    def query_points(
+            self,
+            collection_name: str,
+            query: Any,
+            query_filter: Optional[Filter] = None,
+            limit: int = 10,
+            with_payload: Any = True,
+            **_: Any,
+    ) -> QueryResponse:
+        hits = self._get(collection_name).search_many(
+            np.asarray(query, dtype=np.float32)[None, :], [limit], [_filter_to_eq(query_filter)]
+        )[0]
+        return self._response(hits, with_payload)
+
+    def query_batch_points(self, collection_name: str, requests: Sequence[QueryRequest], **_: Any) -> List[QueryResponse]:
+        if not requests:
+            return []
+        results = self._get(collection_name).search_many(
+            np.asarray([r.query for r in requests], dtype=np.float32),
+            [r.limit or 10 for r in requests],
+            [_filter_to_eq(r.filter) for r in requests],
+        )
+        return [self._response(hits, r.with_payload if r.with_payload is not None else False)
+                for hits, r in zip(results, requests)]
+
+    def close(self) -> None:
+        with self._lock:
+            for coll in self._collections.values():
+                coll.close()
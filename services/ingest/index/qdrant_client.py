@@ -1,36 +1,170 @@
 from __future__ import annotations
-from typing import Any, List, Iterable, Dict, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, List, Iterable, Iterator, Dict, Literal, Optional, Sequence, Set
 from qdrant_client import QdrantClient
+import threading
 import time
 import uuid
 
 from qdrant_client.models import (
-    Distance, VectorParams, PointStruct, Condition, FieldCondition, MatchValue, Filter
+    Batch, Distance, VectorParams, PointStruct, PointIdsList, Condition, FieldCondition, MatchValue, Filter,
+    BinaryQuantization, BinaryQuantizationConfig, CollectionParamsDiff, HnswConfigDiff, OptimizersConfigDiff,
+    QuantizationSearchParams, QueryRequest, ScalarQuantization, ScalarQuantizationConfig, ScalarType, SearchParams,
+    VectorParamsDiff, FilterSelector, ExtendedPointId,
 )
 
-from .schemas import CollectionSpec
+from ..embed.models import EmbedBatchResult
+from .schemas import CollectionSpec, QuantizationSpec
+from services.observability.metrics import timed
+
+if TYPE_CHECKING:
+    from .chunk_store import ChunkTextStore
+
+DriftAction = Literal["raise", "update", "ignore"]
 
 
 def connect_qdrant(
         host: str = "localhost",
         port: int = 6333,
         api_key: Optional[str] = None,
-        https: bool = False
+        https: bool = False,
+        *,
+        prefer_grpc: bool = False,
+        grpc_port: int = 6334,
+        timeout: Optional[int] = None,
+        pool_size: Optional[int] = None,
 ) -> Any:
+    # pool_size sizes the HTTP connection pool / gRPC channel pool; match it to upload concurrency
+    options: Dict[str, Any] = dict(
+        api_key=api_key, prefer_grpc=prefer_grpc, grpc_port=grpc_port, timeout=timeout, pool_size=pool_size
+    )
     if https:
-        return QdrantClient(url=f"https://{host}", api_key=api_key, prefer_grpc=False)
-    return QdrantClient(host=host, port=port, api_key=api_key, prefer_grpc=False)
+        return QdrantClient(url=f"https://{host}", **options)
+    return QdrantClient(host=host, port=port, **options)
 
-def ensure_collection(client: Any, spec: CollectionSpec) -> None:
-    existing = [c.name for c in client.get_collections().collections]
-    if spec.name in existing:
-        return
+def _quantization_config(q: Optional[QuantizationSpec]) -> ScalarQuantization | BinaryQuantization | None:
+    if q is None:
+        return None
+    if q.kind == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=q.always_ram))
+    return ScalarQuantization(
+        scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=q.quantile, always_ram=q.always_ram)
+    )
 
+def _hnsw_diff(spec: CollectionSpec) -> Optional[HnswConfigDiff]:
+    h = spec.hnsw
+    if h.m is None and h.ef_construct is None and h.on_disk is None:
+        return None
+    return HnswConfigDiff(m=h.m, ef_construct=h.ef_construct, on_disk=h.on_disk)
+
+def _optimizers_diff(spec: CollectionSpec) -> Optional[OptimizersConfigDiff]:
+    o = spec.optimizers
+    fields = {k: v for k, v in vars(o).items() if v is not None}
+    return OptimizersConfigDiff(**fields) if fields else None
+
+def _create_collection(client: Any, spec: CollectionSpec) -> None:
     client.create_collection(
         collection_name=spec.name,
-        vectors_config=VectorParams(size=spec.vector_size, distance=Distance(spec.distance))
+        vectors_config=VectorParams(size=spec.vector_size, distance=Distance(spec.distance), on_disk=spec.vectors_on_disk),
+        hnsw_config=_hnsw_diff(spec),
+        optimizers_config=_optimizers_diff(spec),
+        quantization_config=_quantization_config(spec.quantization),
+        on_disk_payload=spec.payload_on_disk,
+    )
+
+def _is_local_mode(client: Any) -> bool:
+    options = getattr(client, "init_options", None)
+    if not isinstance(options, dict):
+        return False
+    return options.get("location") == ":memory:" or options.get("path") is not None
+
+def collection_drift(client: Any, spec: CollectionSpec) -> List[str]:
+    """
+    Differences between an existing collection and `spec`, one line each.
+    Settings the spec leaves as None are not compared. Local (":memory:" or
+    path) clients accept but do not keep payload-on-disk, HNSW, optimizer or
+    quantization settings and report defaults for them, so against those
+    only vector size, distance and vectors_on_disk are compared.
+    """
+    config = client.get_collection(spec.name).config
+    vectors = config.params.vectors
+    if not isinstance(vectors, VectorParams):
+        return ["vectors: collection uses named vectors, spec expects a single unnamed vector"]
+
+    diffs: List[str] = []
+
+    def check(field: str, actual: Any, expected: Any) -> None:
+        if expected is not None and actual != expected:
+            diffs.append(f"{field}: collection has {actual!r}, spec wants {expected!r}")
+
+    check("vector_size", vectors.size, spec.vector_size)
+    check("distance", Distance(vectors.distance).value, spec.distance)
+    check("vectors_on_disk", bool(vectors.on_disk), spec.vectors_on_disk)
+    if _is_local_mode(client):
+        return diffs
+
+    check("payload_on_disk", bool(config.params.on_disk_payload), spec.payload_on_disk)
+
+    # Vector-level settings override the collection-level ones
+    hnsw = vectors.hnsw_config or config.hnsw_config
+    check("hnsw.m", hnsw.m, spec.hnsw.m)
+    check("hnsw.ef_construct", hnsw.ef_construct, spec.hnsw.ef_construct)
+    check("hnsw.on_disk", bool(hnsw.on_disk), spec.hnsw.on_disk)
+    for field, expected in vars(spec.optimizers).items():
+        check(f"optimizers.{field}", getattr(config.optimizer_config, field), expected)
+
+    q = spec.quantization
+    if q is not None:
+        actual = vectors.quantization_config or config.quantization_config
+        if isinstance(actual, ScalarQuantization):
+            check("quantization.kind", "scalar", q.kind)
+            if q.kind == "scalar":
+                check("quantization.quantile", actual.scalar.quantile, q.quantile)
+                check("quantization.always_ram", bool(actual.scalar.always_ram), q.always_ram)
+        elif isinstance(actual, BinaryQuantization):
+            check("quantization.kind", "binary", q.kind)
+            if q.kind == "binary":
+                check("quantization.always_ram", bool(actual.binary.always_ram), q.always_ram)
+        else:
+            check("quantization.kind", None if actual is None else type(actual).__name__, q.kind)
+    return diffs
+
+def _update_collection(client: Any, spec: CollectionSpec) -> None:
+    client.update_collection(
+        collection_name=spec.name,
+        optimizers_config=_optimizers_diff(spec),
+        hnsw_config=_hnsw_diff(spec),
+        quantization_config=_quantization_config(spec.quantization),
+        vectors_config=(
+            {"": VectorParamsDiff(on_disk=spec.vectors_on_disk)} if spec.vectors_on_disk is not None else None
+        ),
+        collection_params=(
+            CollectionParamsDiff(on_disk_payload=spec.payload_on_disk) if spec.payload_on_disk is not None else None
+        ),
     )
 
+def ensure_collection(client: Any, spec: CollectionSpec, *, on_drift: DriftAction = "raise") -> None:
+    """
+    Create the collection described by `spec`, or check an existing one
+    against it. On drift, "raise" raises ValueError listing the differences,
+    "update" applies the updatable settings (vector size and distance cannot
+    change) and "ignore" keeps the collection as it is.
+    """
+    existing = [c.name for c in client.get_collections().collections]
+    if spec.name in existing:
+        if on_drift == "ignore":
+            return
+        diffs = collection_drift(client, spec)
+        if not diffs:
+            return
+        updatable = not any(d.startswith(("vector_size", "distance", "vectors:")) for d in diffs)
+        if on_drift == "update" and updatable:
+            _update_collection(client, spec)
+            return
+        raise ValueError(f"Collection {spec.name!r} does not match its spec:\n  " + "\n  ".join(diffs))
+
+    _create_collection(client, spec)
+
     for field, schema_type in [("doc_id", "keyword"), ("source", "keyword")]:
         try:
             client.create_payload_index(
@@ -44,32 +178,116 @@ def ensure_collection(client: Any, spec: CollectionSpec) -> None:
 def make_point_id(doc_id: str, chunk_index: int) -> str:
     return str(uuid.uuid5(uuid.NAMESPACE_DNS, f"{doc_id}:{chunk_index}"))
 
+def _upsert_with_retry(
+        client: Any,
+        collection: str,
+        points: List[PointStruct] | Batch,
+        *,
+        max_retries: int,
+        retry_backoff_s: float,
+        wait: bool = True,
+) -> None:
+    for attempt in range(max_retries):
+        try:
+            client.upsert(collection_name=collection, points=points, wait=wait)
+            return
+        except Exception:
+            if attempt == max_retries - 1:
+                raise
+            time.sleep(retry_backoff_s * (2**attempt))
+
+def _store_texts(text_store: ChunkTextStore, result: EmbedBatchResult, start: int, stop: int) -> None:
+    texts = result.payload_columns.get("text")
+    if texts is not None:
+        text_store.put_many(
+            (result.doc_id, result.chunk_indices[row], str(texts[row])) for row in range(start, stop)
+        )
+
+def _result_batch(result: EmbedBatchResult, start: int, stop: int, *, drop_text: bool = False) -> Batch:
+    payloads: List[Dict[str, Any]] = []
+    for row in range(start, stop):
+        payload = result.payload(row)
+        if drop_text:
+            payload.pop("text", None)
+        payload.setdefault("doc_id", result.doc_id)
+        payload.setdefault("chunk_index", result.chunk_indices[row])
+        payloads.append(payload)
+    return Batch(
+        ids=[make_point_id(result.doc_id, i) for i in result.chunk_indices[start:stop]],
+        vectors=result.matrix[start:stop].tolist(),
+        payloads=payloads,
+    )
+
+def _upsert_batch_result(
+        client: Any,
+        collection: str,
+        result: EmbedBatchResult,
+        *,
+        batch_size: int,
+        max_retries: int,
+        retry_backoff_s: float,
+        text_store: Optional[ChunkTextStore] = None,
+) -> int:
+    if text_store is not None:
+        _store_texts(text_store, result, 0, len(result))
+    # The client's transports take Python sequences, so only the slice being sent
+    # is converted; the full matrix is never turned into per-vector lists.
+    count = 0
+    for start in range(0, len(result), batch_size):
+        stop = min(start + batch_size, len(result))
+        _upsert_with_retry(
+            client,
+            collection,
+            _result_batch(result, start, stop, drop_text=text_store is not None),
+            max_retries=max_retries,
+            retry_backoff_s=retry_backoff_s,
+        )
+        count += stop - start
+    return count
+
+@timed("upsert")
 def upsert_embedded_chunks(
         client: Any,
         collection: str,
-        embedded_chunks: Iterable[Dict[str, Any]],
+        embedded_chunks: Iterable[Dict[str, Any]] | EmbedBatchResult,
         *,
         batch_size: int = 128,
         max_retries: int = 3,
         retry_backoff_s: float = 0.5,
+        text_store: Optional[ChunkTextStore] = None,
 ) -> int:
+    """
+    Upsert embedded chunks in batches of `batch_size`. With `text_store`,
+    chunk texts are written there (before the points) and left out of the
+    Qdrant payloads.
+    """
+    if isinstance(embedded_chunks, EmbedBatchResult):
+        return _upsert_batch_result(
+            client,
+            collection,
+            embedded_chunks,
+            batch_size=batch_size,
+            max_retries=max_retries,
+            retry_backoff_s=retry_backoff_s,
+            text_store=text_store,
+        )
+
     buf: List[PointStruct] = []
+    texts: List[tuple[str, int, str]] = []
     count = 0
 
     def flush() -> None:
         nonlocal buf, count
         if not buf:
             return
-        for attempt in range(max_retries):
-            try:
-                client.upsert(collection_name=collection, points=buf)
-                count += len(buf)
-                buf = []
-                return
-            except Exception:
-                if attempt == max_retries - 1:
-                    raise
-                time.sleep(retry_backoff_s * (2**attempt))
+        if text_store is not None:
+            text_store.put_many(texts)
+            texts.clear()
+        _upsert_with_retry(
+            client, collection, buf, max_retries=max_retries, retry_backoff_s=retry_backoff_s
+        )
+        count += len(buf)
+        buf = []
 
     for item in embedded_chunks:
         pid = make_point_id(item["doc_id"], int(item["chunk_index"]))
@@ -77,31 +295,263 @@ def upsert_embedded_chunks(
         payload = dict(item.get("payload", {}))
         payload.setdefault("doc_id", item["doc_id"])
         payload.setdefault("chunk_index", item["chunk_index"])
+        if text_store is not None and "text" in payload:
+            texts.append((str(item["doc_id"]), int(item["chunk_index"]), str(payload.pop("text"))))
         buf.append(PointStruct(id=pid, vector=vec, payload=payload))
         if len(buf) >= batch_size:
             flush()
     flush()
     return count
 
+def _row_bytes(result: EmbedBatchResult, row: int) -> int:
+    # Rough wire size: float32 vector plus string payload values; small scalars count as 8 bytes
+    size = int(result.matrix.shape[1]) * 4
+    for col in result.payload_columns.values():
+        v = col[row]
+        size += len(v) if isinstance(v, str) else 8
+    return size
+
+def _byte_batches(
+        results: Iterable[EmbedBatchResult],
+        *,
+        max_points: int,
+        max_bytes: int,
+) -> Iterator[tuple[EmbedBatchResult, int, int]]:
+    # Consecutive rows of one result, cut when either the point or the byte budget is reached
+    for result in results:
+        start, size = 0, 0
+        for row in range(len(result)):
+            row_size = _row_bytes(result, row)
+            if row > start and (row - start >= max_points or size + row_size > max_bytes):
+                yield result, start, row
+                start, size = row, 0
+            size += row_size
+        if start < len(result):
+            yield result, start, len(result)
+
+@timed("upsert")
+def bulk_upsert(
+        client: Any,
+        collection: str,
+        results: Iterable[EmbedBatchResult] | EmbedBatchResult,
+        *,
+        max_in_flight: int = 4,
+        max_batch_points: int = 512,
+        max_batch_bytes: int = 4 * 1024 * 1024,
+        wait: bool = True,
+        max_retries: int = 3,
+        retry_backoff_s: float = 0.5,
+        text_store: Optional[ChunkTextStore] = None,
+) -> int:
+    """
+    High-throughput upload of embedded chunks.
+
+    Batches are cut by point count and estimated payload bytes, and up to
+    `max_in_flight` of them are sent concurrently; a failing batch backs off
+    and retries on its own thread while the others keep going. With
+    wait=False, Qdrant acknowledges each batch once it is queued and a final
+    wait=True write acts as a barrier, so all points are applied when this
+    returns. The barrier is a filter-selected delete that matches nothing:
+    point-id writes go only to the shard owning the point, but filter
+    operations are sent to every shard, and each shard applies its updates
+    in order, so its wait=True reply covers all batches on all shards.
+    Use a client from connect_qdrant(prefer_grpc=True, pool_size=...)
+    for the gRPC transport. `text_store` works as in upsert_embedded_chunks.
+    Returns the number of points written.
+    """
+    if max_in_flight < 1:
+        raise ValueError("max_in_flight must be >= 1")
+    if isinstance(results, EmbedBatchResult):
+        results = [results]
+
+    slots = threading.BoundedSemaphore(max_in_flight)
+    pending: Set[Future[None]] = set()
+    errors: List[BaseException] = []
+    count = 0
+
+    def send(result: EmbedBatchResult, start: int, stop: int) -> None:
+        try:
+            if text_store is not None:
+                _store_texts(text_store, result, start, stop)
+            _upsert_with_retry(
+                client,
+                collection,
+                _result_batch(result, start, stop, drop_text=text_store is not None),
+                max_retries=max_retries,
+                retry_backoff_s=retry_backoff_s,
+                wait=wait,
+            )
+        finally:
+            slots.release()
+
+    with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="qdrant-upsert") as pool:
+        for result, start, stop in _byte_batches(results, max_points=max_batch_points, max_bytes=max_batch_bytes):
+            slots.acquire()  # at most max_in_flight batches are built and unacknowledged at a time
+            done = {f for f in pending if f.done()}
+            errors.extend(e for f in done if (e := f.exception()) is not None)
+            pending -= done
+            if errors:
+                slots.release()
+                break
+            pending.add(pool.submit(send, result, start, stop))
+            count += stop - start
+        for f in pending:
+            if (e := f.exception()) is not None:
+                errors.append(e)
+    if errors:
+        raise errors[0]
+
+    if not wait and count:
+        _write_barrier(client, collection, max_retries=max_retries, retry_backoff_s=retry_backoff_s)
+    return count
+
+# doc_id no real document has; the barrier delete filters on it so it removes nothing
+_BARRIER_DOC_ID = "__bulk_upsert_barrier__"
+
+def _write_barrier(client: Any, collection: str, *, max_retries: int, retry_backoff_s: float) -> None:
+    selector = FilterSelector(
+        filter=Filter(must=[FieldCondition(key="doc_id", match=MatchValue(value=_BARRIER_DOC_ID))])
+    )
+    for attempt in range(max_retries):
+        try:
+            client.delete(collection_name=collection, points_selector=selector, wait=True)
+            return
+        except Exception:
+            if attempt == max_retries - 1:
+                raise
+            time.sleep(retry_backoff_s * (2**attempt))
+
+def delete_chunks(
+        client: Any,
+        collection: str,
+        doc_id: str,
+        chunk_indices: Iterable[int],
+        *,
+        batch_size: int = 1024,
+        text_store: Optional[ChunkTextStore] = None,
+) -> int:
+    # Point ids are derived from (doc_id, chunk_index), so no payload filter is needed
+    indices = list(chunk_indices)
+    ids: List[ExtendedPointId] = [make_point_id(doc_id, i) for i in indices]
+    for i in range(0, len(ids), batch_size):
+        client.delete(
+            collection_name=collection,
+            points_selector=PointIdsList(points=ids[i : i + batch_size]),
+        )
+    if text_store is not None:
+        text_store.delete(doc_id, indices)
+    return len(ids)
+
+def search_params(
+        *,
+        hnsw_ef: Optional[int] = None,
+        exact: bool = False,
+        rescore: Optional[bool] = None,
+        oversampling: Optional[float] = None,
+        quantization: Optional[QuantizationSpec] = None,
+) -> Optional[SearchParams]:
+    """Query-time parameters; rescore/oversampling default to the collection's QuantizationSpec if given."""
+    if quantization is not None:
+        rescore = quantization.rescore if rescore is None else rescore
+        oversampling = quantization.oversampling if oversampling is None else oversampling
+    qparams = None
+    if rescore is not None or oversampling is not None:
+        qparams = QuantizationSearchParams(rescore=rescore, oversampling=oversampling)
+    if hnsw_ef is None and not exact and qparams is None:
+        return None
+    return SearchParams(hnsw_ef=hnsw_ef, exact=exact, quantization=qparams)
+
+def _eq_filter(filter_eq: Optional[Dict[str, Any]]) -> Optional[Filter]:
+    if not filter_eq:
+        return None
+    conditions: List[Condition] = []
+    for k, v in filter_eq.items():
+        conditions.append(FieldCondition(key=k, match=MatchValue(value=v)))
+    return Filter(must=conditions)
+
+def _query_kwargs(
+        collection: str,
+        query_vector: List[float],
+        top_k: int,
+        filter_eq: Optional[Dict[str, Any]],
+        params: Optional[SearchParams],
+        payload_fields: Optional[Sequence[str]],
+) -> Dict[str, Any]:
+    return dict(
+        collection_name=collection,
+        query=query_vector,
+        query_filter=_eq_filter(filter_eq),
+        search_params=params,
+        limit=top_k,
+        # Only the named payload keys are sent back when payload_fields is given
+        with_payload=list(payload_fields) if payload_fields is not None else True,
+    )
+
+@timed("search")
 def search(
         client: Any,
         collection: str,
         query_vector: List[float],
         top_k: int = 5,
         filter_eq: Optional[Dict[str, Any]] = None,
+        *,
+        hnsw_ef: Optional[int] = None,
+        exact: bool = False,
+        rescore: Optional[bool] = None,
+        oversampling: Optional[float] = None,
+        payload_fields: Optional[Sequence[str]] = None,
         ) -> List[Dict[str, Any]]:
-    qfilter = None
-    if filter_eq:
-        conditions: List[Condition] = []
-        for k, v in filter_eq.items():
-            conditions.append(FieldCondition(key=k, match=MatchValue(value=v)))
-        qfilter = Filter(must=conditions)
-
+    params = search_params(hnsw_ef=hnsw_ef, exact=exact, rescore=rescore, oversampling=oversampling)
     res = client.query_points(
-        collection_name=collection,
-        query=query_vector,
-        query_filter=qfilter,
-        limit=top_k,
-        with_payload=True,
+        **_query_kwargs(collection, query_vector, top_k, filter_eq, params, payload_fields)
+    )
+    return [{"id": p.id, "score": p.score, "payload": p.payload} for p in res.points]
+
+@timed("search")
+async def asearch(
+        client: Any,
+        collection: str,
+        query_vector: List[float],
+        top_k: int = 5,
+        filter_eq: Optional[Dict[str, Any]] = None,
+        *,
+        hnsw_ef: Optional[int] = None,
+        exact: bool = False,
+        rescore: Optional[bool] = None,
+        oversampling: Optional[float] = None,
+        payload_fields: Optional[Sequence[str]] = None,
+        ) -> List[Dict[str, Any]]:
+    """`search` for an AsyncQdrantClient."""
+    params = search_params(hnsw_ef=hnsw_ef, exact=exact, rescore=rescore, oversampling=oversampling)
+    res = await client.query_points(
+        **_query_kwargs(collection, query_vector, top_k, filter_eq, params, payload_fields)
     )
     return [{"id": p.id, "score": p.score, "payload": p.payload} for p in res.points]
+
+@timed("search_batch")
+def search_batch(
+        client: Any,
+        collection: str,
+        query_vectors: Sequence[List[float]],
+        top_ks: Sequence[int],
+        filters_eq: Sequence[Optional[Dict[str, Any]]],
+        *,
+        hnsw_ef: Optional[int] = None,
+        exact: bool = False,
+        rescore: Optional[bool] = None,
+        oversampling: Optional[float] = None,
+        payload_fields: Optional[Sequence[str]] = None,
+) -> List[List[Dict[str, Any]]]:
+    """Like `search` for many queries in one query_batch_points round-trip; results are in query order."""
+    if not len(query_vectors) == len(top_ks) == len(filters_eq):
+        raise ValueError("query_vectors, top_ks and filters_eq must have the same length")
+    if not query_vectors:
+        return []
+    params = search_params(hnsw_ef=hnsw_ef, exact=exact, rescore=rescore, oversampling=oversampling)
+    with_payload: Any = list(payload_fields) if payload_fields is not None else True
+    requests = [
+        QueryRequest(query=vec, filter=_eq_filter(f), params=params, limit=k, with_payload=with_payload)
+        for vec, k, f in zip(query_vectors, top_ks, filters_eq)
+    ]
+    responses = client.query_batch_points(collection_name=collection, requests=requests)
+    return [[{"id": p.id, "score": p.score, "payload": p.payload} for p in r.points] for r in responses]
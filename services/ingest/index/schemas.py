@@ -1,14 +1,47 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Literal
+from typing import Literal, Optional
 
 Distance = Literal["Cosine", "Dot", "Euclid"]
+QuantizationKind = Literal["scalar", "binary"]
+
+@dataclass(frozen=True)
+class QuantizationSpec:
+    kind: QuantizationKind = "scalar"
+    quantile: Optional[float] = 0.99        # scalar only: clip outliers before int8 bucketing
+    always_ram: bool = True                 # keep quantized vectors in RAM, originals may be on disk
+    # Query-time defaults: re-score the candidates with original vectors,
+    # fetching `oversampling` times top_k quantized candidates first
+    rescore: bool = True
+    oversampling: Optional[float] = 2.0
+
+@dataclass(frozen=True)
+class HnswSpec:
+    m: Optional[int] = None
+    ef_construct: Optional[int] = None
+    on_disk: Optional[bool] = None
+
+@dataclass(frozen=True)
+class OptimizerSpec:
+    indexing_threshold: Optional[int] = None     # KB of vectors per segment before building HNSW
+    memmap_threshold: Optional[int] = None       # KB per segment before switching to mmap storage
+    default_segment_number: Optional[int] = None
+    max_segment_size: Optional[int] = None
 
 @dataclass(frozen=True)
 class CollectionSpec:
+    """
+    Desired collection layout. Optional settings left as None use the
+    Qdrant server default and are not checked for drift.
+    """
     name: str
     vector_size: int
     distance: Distance = "Cosine"
+    quantization: Optional[QuantizationSpec] = None
+    hnsw: HnswSpec = HnswSpec()
+    optimizers: OptimizerSpec = OptimizerSpec()
+    vectors_on_disk: Optional[bool] = None
+    payload_on_disk: Optional[bool] = None
 
 DEFAULT_COLLECTION = CollectionSpec(
     name="documents",
@@ -0,0 +1,165 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterator, List, Optional
+import datetime as dt
+import sqlite3
+import threading
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_id TEXT PRIMARY KEY,
+    source_value TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    normalized_hash TEXT NOT NULL,
+    normalization_version TEXT NOT NULL,
+    tokenizer_name TEXT NOT NULL,
+    chunk_size INTEGER NOT NULL,
+    chunk_overlap INTEGER NOT NULL,
+    embedding_model TEXT NOT NULL,
+    chunk_count INTEGER NOT NULL,
+    updated_at TEXT NOT NULL,
+    embedding_variant TEXT NOT NULL DEFAULT '',
+    max_chars INTEGER,
+    failed_pages TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS documents_source_value ON documents (source_value);
+"""
+
+_COLUMNS = (
+    "doc_id", "source_value", "content_hash", "normalized_hash", "normalization_version",
+    "tokenizer_name", "chunk_size", "chunk_overlap", "embedding_model", "chunk_count", "updated_at",
+    "embedding_variant", "max_chars", "failed_pages",
+)
+
+# Columns added after the first schema; rows written before them get the default
+# (an empty embedding_variant), so those documents are re-embedded once
+_ADDED_COLUMNS = (
+    ("embedding_variant", "TEXT NOT NULL DEFAULT ''"),
+    ("max_chars", "INTEGER"),
+    ("failed_pages", "TEXT NOT NULL DEFAULT ''"),
+)
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    doc_id: str
+    source_value: str
+    content_hash: str
+    normalized_hash: str
+    normalization_version: str
+    tokenizer_name: str
+    chunk_size: int
+    chunk_overlap: int
+    embedding_model: str
+    chunk_count: int
+    updated_at: str = ""
+    embedding_variant: str = "sbert"    # backend/precision, see embed.factory.embedder_variant
+    max_chars: Optional[int] = None     # per-chunk truncation before embedding
+    failed_pages: str = ""              # comma-separated page numbers that failed to extract
+
+    @property
+    def complete(self) -> bool:
+        """False if some pages failed to extract; such a document is retried on the next run."""
+        return not self.failed_pages
+
+    @property
+    def index_version(self) -> str:
+        """Changes exactly when the document's indexed chunks do: extracted text or chunking/embedding settings."""
+        return "|".join((
+            self.normalized_hash, self.normalization_version, self.tokenizer_name,
+            str(self.chunk_size), str(self.chunk_overlap), self.embedding_model,
+            self.embedding_variant, str(self.max_chars),
+        ))
+
+    def same_settings(self, other: ManifestEntry) -> bool:
+        """True if `other` was (or would be) chunked and embedded exactly like this entry."""
+        return (
+            self.normalization_version == other.normalization_version
+            and self.tokenizer_name == other.tokenizer_name
+            and self.chunk_size == other.chunk_size
+            and self.chunk_overlap == other.chunk_overlap
+            and self.embedding_model == other.embedding_model
+            and self.embedding_variant == other.embedding_variant
+            and self.max_chars == other.max_chars
+        )
+
+
+class IngestManifest:
+    """
+    SQLite record of what is currently indexed for each doc_id.
+
+    Used by incremental ingest to skip documents whose file hash and
+    chunking/embedding settings are unchanged (and that extracted without
+    failed pages), and to know how many
+    chunks a document had so stale points can be deleted. The API reads
+    it through `doc_version` to expire cached answers. Thread-safe.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self._path = str(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self._path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(documents)")}
+        with self._conn:
+            for name, decl in _ADDED_COLUMNS:
+                if name not in existing:
+                    self._conn.execute(f"ALTER TABLE documents ADD COLUMN {name} {decl}")
+
+    def get(self, doc_id: str) -> Optional[ManifestEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM documents WHERE doc_id = ?", (doc_id,)
+            ).fetchone()
+        return _to_entry(row) if row is not None else None
+
+    def doc_version(self, doc_id: str) -> Optional[str]:
+        """`index_version` of what is indexed for `doc_id`, or None; SemanticAnswerCache's doc_version hook."""
+        entry = self.get(doc_id)
+        return entry.index_version if entry is not None else None
+
+    def find_by_source(self, source_value: str) -> List[ManifestEntry]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM documents WHERE source_value = ?", (source_value,)
+            ).fetchall()
+        return [_to_entry(r) for r in rows]
+
+    def __iter__(self) -> Iterator[ManifestEntry]:
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM documents ORDER BY doc_id").fetchall()
+        for row in rows:
+            yield _to_entry(row)
+
+    def record(self, entry: ManifestEntry) -> None:
+        updated_at = entry.updated_at or dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds")
+        values = (
+            entry.doc_id, entry.source_value, entry.content_hash, entry.normalized_hash,
+            entry.normalization_version, entry.tokenizer_name, entry.chunk_size, entry.chunk_overlap,
+            entry.embedding_model, entry.chunk_count, updated_at,
+            entry.embedding_variant, entry.max_chars, entry.failed_pages,
+        )
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO documents ({', '.join(_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in _COLUMNS)})",
+                values,
+            )
+
+    def remove(self, doc_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> IngestManifest:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def _to_entry(row: Any) -> ManifestEntry:
+    return ManifestEntry(*row)
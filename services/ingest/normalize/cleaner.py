@@ -1,7 +1,10 @@
-from typing import List, Protocol
+from typing import Iterable, List, Protocol
 import re
 import unicodedata
 
+# Bump whenever normalize_text output changes so stored documents get re-ingested
+NORMALIZATION_VERSION = "v1"
+
 class Normalizer(Protocol):
     def __call__(self, text: str) -> str: ...
 
@@ -18,17 +21,26 @@ ZERO_WIDTH: dict[int, None] = dict.fromkeys(
 def nfk_normalize(text: str) -> str:
     return unicodedata.normalize("NFKC", text).translate(ZERO_WIDTH)
 
+_TRAILING_WS_RE = re.compile(r"[ \t]+\n")
+_BLANK_RUN_RE = re.compile(r"\n{3,}")
+_HYPHEN_BREAK_RE = re.compile(r"(\w)-\n(\w)")
+_LIST_ITEM_RE = re.compile(r"^\s*([\-–•\*]|\d+[\.\)])\s+")
+
+BULLETS_QUOTES: dict[int, str] = str.maketrans({
+    "•": "-", "–": "-", "—": "-", "“": '"', "”": '"', "’": "'",
+})
+
 def normalize_whitespace(text: str) -> str:
     # Keep paragraph breaks: convert any CRLF to LF, trim spaces at EOL
     text = text.replace("\r\n", "\n").replace("\r", "\n")
-    text = re.sub(r"[ \t]+\n", "\n", text)
+    text = _TRAILING_WS_RE.sub("\n", text)
     # Collapse 3+ blank lines to 2
-    text = re.sub(r"\n{3,}", "\n\n", text)
+    text = _BLANK_RUN_RE.sub("\n\n", text)
     return text
 
 def dehyphenate_linebreaks(text: str) -> str:
     # Join "hy-\nphen" → "hyphen" but NOT if next line starts with capital letter mid-sentence? keep simple first
-    return re.sub(r"(\w)-\n(\w)", r"\1\2", text)
+    return _HYPHEN_BREAK_RE.sub(r"\1\2", text)
 
 def unwrap_paragraphs(text: str) -> str:
     # Replace single newlines inside paragraphs with spaces, keep double newlines
@@ -45,7 +57,7 @@ def unwrap_paragraphs(text: str) -> str:
         if not line.strip():  # blank line -> paragraph break
             flush()
             out.append("")
-        elif re.match(r"^\s*([\-–•\*]|\d+[\.\)])\s+", line):  # list item
+        elif _LIST_ITEM_RE.match(line):  # list item
             flush()
             out.append(line.strip())
         else:
@@ -54,10 +66,7 @@ def unwrap_paragraphs(text: str) -> str:
     return "\n".join(out)
 
 def normalize_bullets_quotes(text: str) -> str:
-    table = str.maketrans({
-        "•": "-", "–": "-", "—": "-", "“": '"', "”": '"', "’": "'",
-    })
-    return text.translate(table)
+    return text.translate(BULLETS_QUOTES)
 
 def looks_like_code_or_table(text: str) -> bool:
     sample = text[:2000]
@@ -72,12 +81,110 @@ DEFAULT_PIPELINE: List[Normalizer] = [
     normalize_bullets_quotes,
 ]
 
+# Same mappings as ZERO_WIDTH / BULLETS_QUOTES as (old, new) pairs: for the handful of
+# code points involved, `in` + str.replace is far cheaper than a dict-driven str.translate
+_ZERO_WIDTH_PAIRS = tuple((chr(cp), "") for cp in ZERO_WIDTH)
+_BULLETS_QUOTES_PAIRS = tuple((chr(cp), repl) for cp, repl in BULLETS_QUOTES.items())
+
+def _replace_all(text: str, pairs: tuple[tuple[str, str], ...]) -> str:
+    for old, new in pairs:
+        if old in text:
+            text = text.replace(old, new)
+    return text
+
+def _is_word_char(ch: str) -> bool:
+    # Same definition as \w for str patterns
+    return ch.isalnum() or ch == "_"
+
+def _clean_lines(text: str) -> List[str]:
+    """
+    NFKC + zero-width removal, then split into lines with EOL spaces/tabs
+    trimmed and blank-line runs collapsed, exactly as nfk_normalize followed
+    by normalize_whitespace would leave them.
+    """
+    text = _replace_all(unicodedata.normalize("NFKC", text), _ZERO_WIDTH_PAIRS)
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    last = len(lines) - 1
+
+    out: List[str] = []
+    blank_run = 0
+    seen_content = False
+    for i, line in enumerate(lines):
+        if i != last:
+            line = line.rstrip(" \t")
+        if not line:
+            blank_run += 1
+            continue
+        if blank_run:
+            # "\n{3,}" -> "\n\n": one blank line between content, two at either end of the text
+            out.extend([""] * min(blank_run, 1 if seen_content else 2))
+            blank_run = 0
+        out.append(line)
+        seen_content = True
+    if blank_run:
+        out.extend([""] * min(blank_run, 2 if seen_content else 3))
+    return out
+
+def _fused_normalize(text: str) -> str:
+    """
+    DEFAULT_PIPELINE in one scan over the lines: dehyphenation and paragraph
+    unwrapping are applied while walking the cleaned lines, and the bullet/
+    quote table is applied once to the result (it has to run last, since
+    "—" and "–" affect list detection and dehyphenation).
+    """
+    out: List[str] = []
+    buf: List[str] = []
+    pending: str | None = None
+    pending_locked = False  # its word char before "-" was consumed by the previous join
+
+    def emit(line: str) -> None:
+        if not line.strip():  # blank line -> paragraph break
+            if buf:
+                out.append(" ".join(s.strip() for s in buf))
+                buf.clear()
+            out.append("")
+        elif _LIST_ITEM_RE.match(line):
+            if buf:
+                out.append(" ".join(s.strip() for s in buf))
+                buf.clear()
+            out.append(line.strip())
+        else:
+            buf.append(line)
+
+    for line in _clean_lines(text):
+        if pending is not None:
+            if (
+                line
+                and len(pending) > 1
+                and pending[-1] == "-"
+                and not pending_locked
+                and _is_word_char(pending[-2])
+                and _is_word_char(line[0])
+            ):
+                pending_locked = len(line) == 2
+                pending = pending[:-1] + line
+                continue
+            emit(pending)
+        pending = line
+        pending_locked = False
+    if pending is not None:
+        emit(pending)
+    if buf:
+        out.append(" ".join(s.strip() for s in buf))
+
+    return _replace_all("\n".join(out), _BULLETS_QUOTES_PAIRS)
+
 def normalize_text(text: str, *, aggressive: bool = True) -> str:
     if not aggressive or looks_like_code_or_table(text):
         # Minimal normalization only
-        for fn in [nfk_normalize, normalize_whitespace]:
-            text = fn(text)
-        return text
-    for fn in DEFAULT_PIPELINE:
-        text = fn(text)
-    return text
+        return "\n".join(_clean_lines(text))
+    return _fused_normalize(text)
+
+def normalize_texts(texts: Iterable[str], *, aggressive: bool = True) -> List[str]:
+    """Batch form of normalize_text, e.g. for all pages of a document."""
+    if not aggressive:
+        return ["\n".join(_clean_lines(t)) for t in texts]
+    return [
+        "\n".join(_clean_lines(t)) if looks_like_code_or_table(t) else _fused_normalize(t)
+        for t in texts
+    ]
@@ -1,10 +1,14 @@
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterator, Optional, Sequence, Tuple
 import datetime as dt
 import hashlib
+import os
 
-from services.ingest.normalize.cleaner import normalize_text
+from services.ingest.normalize.cleaner import NORMALIZATION_VERSION, normalize_text
+from services.observability.metrics import timed
 from pypdf import PdfReader
 
 @dataclass(frozen=True)
@@ -12,6 +16,7 @@ class PageText:
     page_no: int
     raw_text: str
     text: str # normalized; used for chunking
+    error: Optional[str] = None  # set when extraction failed; text is then empty
 
 @dataclass(frozen=True)
 class RawDoc:
@@ -25,54 +30,247 @@ class RawDoc:
     pages: List[PageText]     # per-page text
 
 
+# (page_no, raw_text, text, error) as returned by page workers
+_PageResult = Tuple[int, str, str, Optional[str]]
+
+PAGES_PER_TASK = 16  # upper bound on pages handed to a worker at once
+PAGE_HASH_SEPARATOR = "\n\n"  # joins page texts for meta["normalized_hash"]
+
+# Per-process readers for _extract_page_range, keyed by (path, mtime_ns, size), so a
+# worker that gets many page ranges of one file parses its xref and trailer only once
+_READERS: "OrderedDict[Tuple[str, int, int], PdfReader]" = OrderedDict()
+_MAX_CACHED_READERS = 2
+
+
+@dataclass(frozen=True)
+class _PdfJob:
+    path: Path
+    doc_id: str
+    content_hash: str
+    title: str
+    author: str
+    n_pages: int
+
+
 def _sha256(b: bytes) -> str:
     h = hashlib.sha256()
     h.update(b)
     return h.hexdigest()
 
-def load_pdf(path: str | Path, *, doc_id: Optional[str] = None) -> RawDoc:
+def _sha256_file(p: Path) -> str:
+    # Streams the file through the hash in fixed-size blocks instead of reading it whole
+    with p.open("rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+def _resolve(path: str | Path) -> Path:
     p = Path(path).expanduser().resolve()
     if not p.exists():
         raise FileNotFoundError(f"PDF not found: {p}")
+    return p
 
-    raw_bytes = p.read_bytes()
-    content_hash = _sha256(raw_bytes)
-
+def _make_job(p: Path, reader: PdfReader, content_hash: str, doc_id: Optional[str]) -> _PdfJob:
     if doc_id is None:
         doc_id = f"{p.stem}:{content_hash[:8]}"
+    return _PdfJob(
+        path=p,
+        doc_id=doc_id,
+        content_hash=content_hash,
+        title=(reader.metadata.title or "").strip() if reader.metadata else "",
+        author=(reader.metadata.author or "").strip() if reader.metadata else "",
+        n_pages=len(reader.pages),
+    )
 
-    reader = PdfReader(p)
-    pages: List[PageText] = []
-    for i, page in enumerate(reader.pages, start=1):
-        try:
-            raw_text = page.extract_text() or ""
-            text = normalize_text(raw_text)
-            pages.append(PageText(page_no=i, raw_text=raw_text ,text=text))
-        except Exception as e:
-            raise e
-
-    normalized_pages = [normalize_text(p.text) for p in pages]
-
-    meta = {
-        "filename": p.name,
-        "title": (reader.metadata.title or "").strip() if reader.metadata else "",
-        "author": (reader.metadata.author or "").strip() if reader.metadata else "",
-        "content_hash_raw": content_hash,
-        "normalized_hash": _sha256("\n\n".join(normalized_pages).encode("utf-8")),
-        "normalization_version": "v1",
+def _extract_page(reader: PdfReader, i: int) -> _PageResult:
+    try:
+        raw_text = reader.pages[i].extract_text() or ""
+        return (i + 1, raw_text, normalize_text(raw_text), None)
+    except Exception as e:
+        return (i + 1, "", "", f"{type(e).__name__}: {e}")
+
+def _extract_pages(reader: PdfReader, start: int, stop: int) -> List[_PageResult]:
+    return [_extract_page(reader, i) for i in range(start, stop)]
+
+def _cached_reader(path: str) -> PdfReader:
+    st = os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
+    reader = _READERS.get(key)
+    if reader is None:
+        reader = _READERS[key] = PdfReader(path)
+        while len(_READERS) > _MAX_CACHED_READERS:
+            _READERS.popitem(last=False)
+    else:
+        _READERS.move_to_end(key)
+    return reader
+
+def _extract_page_range(path: str, start: int, stop: int) -> List[_PageResult]:
+    # Runs in a worker process, one task at a time, so the reader cache needs no lock
+    return _extract_pages(_cached_reader(path), start, stop)
+
+def _page_ranges(n_pages: int, workers: int) -> List[tuple[int, int]]:
+    # A few tasks per worker keeps the pool busy when some pages are much slower than others
+    size = max(1, min(PAGES_PER_TASK, -(-n_pages // (workers * 4))))
+    return [(s, min(s + size, n_pages)) for s in range(0, n_pages, size)]
+
+def _hash_text(text: str) -> str:
+    # normalized_hash has always covered page texts normalized once more (normalize_text
+    # is not idempotent); keep that so hashes stored in existing manifests stay valid
+    return normalize_text(text)
+
+def _build_meta(job: _PdfJob, normalized_hash: str, failed_pages: List[int]) -> Dict[str, str]:
+    return {
+        "filename": job.path.name,
+        "title": job.title,
+        "author": job.author,
+        "content_hash_raw": job.content_hash,
+        "normalized_hash": normalized_hash,
+        "normalization_version": NORMALIZATION_VERSION,
+        "failed_pages": ",".join(str(n) for n in failed_pages),
     }
 
+def _build_rawdoc(job: _PdfJob, results: List[_PageResult]) -> RawDoc:
+    pages = [
+        PageText(page_no=page_no, raw_text=raw_text, text=text, error=error)
+        for page_no, raw_text, text, error in results
+    ]
+    meta = _build_meta(
+        job,
+        _sha256(PAGE_HASH_SEPARATOR.join(_hash_text(p.text) for p in pages).encode("utf-8")),
+        [p.page_no for p in pages if p.error is not None],
+    )
+
     return RawDoc(
-        doc_id=doc_id,
+        doc_id=job.doc_id,
         source_type="pdf",
-        source_value=str(p),
+        source_value=str(job.path),
         mime="application/pdf",
         fetched_at=dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds") + "Z",
-        content_hash=content_hash,
+        content_hash=job.content_hash,
         meta=meta,
         pages=pages,
     )
 
+def _submit_job(executor: Executor, job: _PdfJob, workers: int) -> List[Future[List[_PageResult]]]:
+    return [
+        executor.submit(_extract_page_range, str(job.path), start, stop)
+        for start, stop in _page_ranges(job.n_pages, workers)
+    ]
+
+def _gather(job: _PdfJob, futures: List[Future[List[_PageResult]]]) -> RawDoc:
+    results: List[_PageResult] = []
+    for fut in futures:  # submitted in page order
+        results.extend(fut.result())
+    return _build_rawdoc(job, results)
+
+@timed("load_pdf")
+def load_pdf(
+        path: str | Path,
+        *,
+        doc_id: Optional[str] = None,
+        workers: int = 1,
+        executor: Optional[Executor] = None,
+    ) -> RawDoc:
+    """
+    Read a PDF into a RawDoc.
+
+    With workers > 1, page extraction and normalization are spread over a
+    process pool; pages are still returned in order. Pass `executor` to
+    reuse a long-lived ProcessPoolExecutor of `workers` processes instead of
+    starting one per call. A page that fails to extract is kept with empty
+    text and its `error` set, and is listed in meta["failed_pages"].
+    """
+    p = _resolve(path)
+    reader = PdfReader(p)
+    job = _make_job(p, reader, _sha256_file(p), doc_id)
+
+    if workers <= 1 or job.n_pages <= 1:
+        return _build_rawdoc(job, _extract_pages(reader, 0, job.n_pages))
+
+    if executor is not None:
+        return _gather(job, _submit_job(executor, job, workers))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return _gather(job, _submit_job(executor, job, workers))
+
+def load_pdfs(
+        paths: Sequence[str | Path],
+        *,
+        doc_ids: Optional[Sequence[Optional[str]]] = None,
+        workers: int = 1,
+    ) -> List[RawDoc]:
+    """
+    Batch variant of load_pdf. Pages of all documents share one process pool,
+    so small and large files are processed concurrently. Results follow the
+    order of `paths`.
+    """
+    if doc_ids is not None and len(doc_ids) != len(paths):
+        raise ValueError("doc_ids must have the same length as paths")
+    ids: Sequence[Optional[str]] = doc_ids if doc_ids is not None else [None] * len(paths)
+
+    if workers <= 1:
+        return [load_pdf(path, doc_id=did) for path, did in zip(paths, ids)]
+
+    jobs: List[_PdfJob] = []
+    for path, did in zip(paths, ids):
+        p = _resolve(path)
+        jobs.append(_make_job(p, PdfReader(p), _sha256_file(p), did))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        submitted = [(job, _submit_job(executor, job, workers)) for job in jobs]
+        return [_gather(job, futures) for job, futures in submitted]
+
+class PdfPageStream:
+    """
+    Lazily extracted pages of one PDF.
+
+    Iterating opens the file, yields one normalized PageText at a time and
+    feeds it into the normalized hash as it goes, so no page list is kept.
+    `meta` carries the same keys as RawDoc.meta; "normalized_hash" and
+    "failed_pages" are filled in once iteration completes. Has `doc_id` and
+    `pages` so it can be passed to chunk_rawdoc in place of a RawDoc.
+    """
+
+    def __init__(self, path: Path, *, doc_id: Optional[str] = None, keep_raw: bool = True) -> None:
+        self.path = path
+        self.content_hash = _sha256_file(path)
+        self.doc_id = doc_id if doc_id is not None else f"{path.stem}:{self.content_hash[:8]}"
+        self.source_value = str(path)
+        self._keep_raw = keep_raw
+        self.meta: Dict[str, str] = {
+            "filename": path.name,
+            "content_hash_raw": self.content_hash,
+            "normalization_version": NORMALIZATION_VERSION,
+        }
+
+    @property
+    def pages(self) -> Iterator[PageText]:
+        return iter(self)
+
+    def __iter__(self) -> Iterator[PageText]:
+        # An open file handle lets pypdf seek on disk instead of buffering the whole file
+        with self.path.open("rb") as f:
+            reader = PdfReader(f)
+            job = _make_job(self.path, reader, self.content_hash, self.doc_id)
+            h = hashlib.sha256()
+            failed: List[int] = []
+            for i in range(job.n_pages):
+                page_no, raw_text, text, error = _extract_page(reader, i)
+                if i > 0:
+                    h.update(PAGE_HASH_SEPARATOR.encode("utf-8"))
+                h.update(_hash_text(text).encode("utf-8"))
+                if error is not None:
+                    failed.append(page_no)
+                yield PageText(
+                    page_no=page_no,
+                    raw_text=raw_text if self._keep_raw else "",
+                    text=text,
+                    error=error,
+                )
+            self.meta = _build_meta(job, h.hexdigest(), failed)
+
+def iter_pdf_pages(path: str | Path, *, doc_id: Optional[str] = None, keep_raw: bool = True) -> PdfPageStream:
+    """Streaming counterpart of load_pdf; pass keep_raw=False to drop raw_text from every page."""
+    return PdfPageStream(_resolve(path), doc_id=doc_id, keep_raw=keep_raw)
+
 if __name__ == "__main__":
     import sys
     import json
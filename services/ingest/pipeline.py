@@ -0,0 +1,450 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import argparse
+import multiprocessing
+import queue
+import sys
+import threading
+import time
+
+from services.ingest.chunk import chunk_rawdoc
+from services.ingest.chunk.models import ChunkedDoc
+from services.ingest.embed.adapters import embed_chunked_doc
+from services.ingest.embed.interfaces import Embedder
+from services.ingest.embed.models import EmbedBatchResult
+from services.ingest.index.chunk_store import ChunkTextStore
+from services.ingest.incremental import finish_document, is_up_to_date, plan_entry
+from services.ingest.index.qdrant_client import bulk_upsert
+from services.ingest.manifest import IngestManifest, ManifestEntry
+from services.ingest.pdf_reader import RawDoc, iter_pdf_pages, load_pdf
+
+STAGES = ("parse", "chunk", "embed", "upsert")
+
+
+@dataclass(frozen=True)
+class PipelineConfig:
+    parse_workers: int = 2
+    chunk_workers: int = 1
+    embed_workers: int = 1
+    upsert_workers: int = 2
+    queue_size: int = 4            # documents waiting between two stages
+    tokenizer_name: str = "cl100k_base"
+    chunk_size: int = 800
+    overlap: int = 160
+    max_chars: Optional[int] = 1500
+    upsert_batch_size: int = 128
+
+    def workers(self, stage: str) -> int:
+        return int(getattr(self, f"{stage}_workers"))
+
+
+@dataclass
+class StageStats:
+    name: str
+    docs: int = 0
+    units: int = 0                 # pages, chunks, vectors or points, depending on the stage
+    errors: int = 0
+    busy_s: float = 0.0            # summed over the stage's workers
+
+    @property
+    def docs_per_s(self) -> float:
+        return self.docs / self.busy_s if self.busy_s else 0.0
+
+    @property
+    def units_per_s(self) -> float:
+        return self.units / self.busy_s if self.busy_s else 0.0
+
+
+@dataclass(frozen=True)
+class IngestFailure:
+    source: str
+    stage: str
+    error: str
+
+
+@dataclass
+class PipelineReport:
+    stages: Dict[str, StageStats]
+    failures: List[IngestFailure] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)   # sources the manifest showed as already indexed
+    elapsed_s: float = 0.0
+
+    @property
+    def docs_done(self) -> int:
+        return self.stages["upsert"].docs
+
+
+# End-of-stream marker; every other queue item is a (source path, value) pair
+# so failures can be attributed to the document
+_DONE = object()
+# Returned by a stage for a document that needs no further work
+_SKIPPED = object()
+
+
+class IngestPipeline:
+    """
+    Runs parse -> chunk -> embed -> upsert as concurrent stages.
+
+    Each stage has its own pool of worker threads, and stages are joined by
+    bounded queues of `queue_size` documents. A full queue blocks the stage
+    feeding it, so at most a few documents per stage are in memory however
+    large the corpus is, and the input iterable is consumed lazily. Failed
+    documents are recorded in the report and do not stop the run.
+
+    Threads suit the embed and upsert stages because embedding inference and
+    Qdrant I/O release the GIL. Parsing with pypdf does not, so with
+    parse_workers > 1 page extraction runs on one ProcessPoolExecutor of
+    `parse_workers` processes shared by the parse threads for the whole run.
+    Points are written with bulk_upsert, `upsert_batch_size` points per batch.
+
+    With a `manifest`, documents are handled as in ingest_pdf_incremental:
+    a file whose hash and settings match its manifest entry is skipped before
+    parsing, one whose extracted text is unchanged is skipped before
+    chunking, and once a document is upserted its stale chunks are deleted
+    and its entry recorded. Skipped sources are listed in the report.
+    """
+
+    def __init__(
+            self,
+            *,
+            client: Any,
+            collection: str,
+            embedder: Embedder,
+            config: PipelineConfig = PipelineConfig(),
+            text_store: Optional[ChunkTextStore] = None,
+            manifest: Optional[IngestManifest] = None,
+    ) -> None:
+        for stage in STAGES:
+            if config.workers(stage) < 1:
+                raise ValueError(f"{stage}_workers must be >= 1")
+        if config.queue_size < 1:
+            raise ValueError("queue_size must be >= 1")
+        self._client = client
+        self._collection = collection
+        self._embedder = embedder
+        self._config = config
+        self._text_store = text_store
+        self._manifest = manifest
+        self._lock = threading.Lock()
+        self._stats: Dict[str, StageStats] = {}
+        self._failures: List[IngestFailure] = []
+        self._skipped: List[str] = []
+        # doc_id -> (previous, current) manifest entries of documents between parse and upsert
+        self._pending: Dict[str, Tuple[Optional[ManifestEntry], ManifestEntry]] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _parse(self, path: str) -> Tuple[Any, int]:
+        cfg = self._config
+        if self._manifest is None:
+            raw = load_pdf(path, workers=cfg.parse_workers, executor=self._pool)
+            return raw, len(raw.pages)
+
+        # Hashes the file without parsing it
+        stream = iter_pdf_pages(path, keep_raw=False)
+        planned = plan_entry(
+            doc_id=stream.doc_id,
+            source_value=stream.source_value,
+            content_hash=stream.content_hash,
+            embedder=self._embedder,
+            tokenizer_name=cfg.tokenizer_name,
+            chunk_size=cfg.chunk_size,
+            overlap=cfg.overlap,
+            max_chars=cfg.max_chars,
+        )
+        previous = self._manifest.get(planned.doc_id)
+        up_to_date = is_up_to_date(previous, planned)
+        with self._lock:
+            # The same doc_id (and, by default, the same bytes) is already on its way to the index
+            in_flight = planned.doc_id in self._pending
+        if in_flight or (previous is not None and up_to_date and previous.content_hash == planned.content_hash):
+            return _SKIPPED, 0
+
+        raw = load_pdf(path, doc_id=planned.doc_id, workers=cfg.parse_workers, executor=self._pool)
+        current = replace(
+            planned,
+            normalized_hash=raw.meta["normalized_hash"],
+            failed_pages=raw.meta.get("failed_pages", ""),
+        )
+        # File bytes changed (e.g. re-saved metadata) but the extracted text did not
+        if previous is not None and up_to_date and previous.normalized_hash == current.normalized_hash:
+            self._manifest.record(replace(current, chunk_count=previous.chunk_count))
+            return _SKIPPED, len(raw.pages)
+
+        with self._lock:
+            self._pending[current.doc_id] = (previous, current)
+        return raw, len(raw.pages)
+
+    def _chunk(self, raw: RawDoc) -> Tuple[ChunkedDoc, int]:
+        cfg = self._config
+        chunked = chunk_rawdoc(raw, tokenizer_name=cfg.tokenizer_name, chunk_size=cfg.chunk_size, overlap=cfg.overlap)
+        with self._lock:
+            if chunked.doc_id in self._pending:
+                previous, current = self._pending[chunked.doc_id]
+                self._pending[chunked.doc_id] = (previous, replace(current, chunk_count=len(chunked.chunks)))
+        return chunked, len(chunked.chunks)
+
+    def _embed(self, chunked: ChunkedDoc) -> Tuple[EmbedBatchResult, int]:
+        result = embed_chunked_doc(self._embedder, chunked, max_chars=self._config.max_chars)
+        return result, len(result)
+
+    def _upsert(self, result: EmbedBatchResult) -> Tuple[None, int]:
+        n = bulk_upsert(
+            self._client,
+            self._collection,
+            result,
+            max_batch_points=self._config.upsert_batch_size,
+            text_store=self._text_store,
+        )
+        if self._manifest is not None:
+            with self._lock:
+                previous, current = self._pending.pop(result.doc_id)
+            finish_document(
+                self._manifest, self._client, self._collection, previous, current, text_store=self._text_store
+            )
+        return None, n
+
+    def snapshot(self) -> Dict[str, StageStats]:
+        with self._lock:
+            return {name: StageStats(**vars(s)) for name, s in self._stats.items()}
+
+    def _record(self, stage: str, elapsed: float, units: int, source: str, error: Optional[str]) -> None:
+        with self._lock:
+            stats = self._stats[stage]
+            stats.busy_s += elapsed
+            if error is None:
+                stats.docs += 1
+                stats.units += units
+            else:
+                stats.errors += 1
+                self._failures.append(IngestFailure(source=source, stage=stage, error=error))
+
+    def _worker(
+            self,
+            stage: str,
+            fn: Callable[[Any], Tuple[Any, int]],
+            inbox: "queue.Queue[Any]",
+            outbox: Optional["queue.Queue[Any]"],
+    ) -> None:
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                return
+            source, value = item
+            t0 = time.perf_counter()
+            try:
+                out, units = fn(value)
+            except Exception as e:
+                self._record(stage, time.perf_counter() - t0, 0, source, f"{type(e).__name__}: {e}")
+                with self._lock:
+                    self._pending.pop(getattr(value, "doc_id", ""), None)
+                continue
+            self._record(stage, time.perf_counter() - t0, units, source, None)
+            if out is _SKIPPED:
+                with self._lock:
+                    self._skipped.append(source)
+            elif outbox is not None:
+                outbox.put((source, out))
+
+    def _run_stage(
+            self,
+            stage: str,
+            fn: Callable[[Any], Tuple[Any, int]],
+            inbox: "queue.Queue[Any]",
+            outbox: Optional["queue.Queue[Any]"],
+            downstream_workers: int,
+    ) -> List[threading.Thread]:
+        threads = [
+            threading.Thread(
+                target=self._worker, args=(stage, fn, inbox, outbox), name=f"ingest-{stage}-{i}", daemon=True
+            )
+            for i in range(self._config.workers(stage))
+        ]
+        for t in threads:
+            t.start()
+
+        def close() -> None:
+            # Once every worker of this stage is done, tell each downstream worker to stop
+            for t in threads:
+                t.join()
+            if outbox is not None:
+                for _ in range(downstream_workers):
+                    outbox.put(_DONE)
+
+        closer = threading.Thread(target=close, name=f"ingest-{stage}-close", daemon=True)
+        closer.start()
+        return [*threads, closer]
+
+    def run(
+            self,
+            paths: Iterable[str | Path],
+            *,
+            on_progress: Optional[Callable[[Dict[str, StageStats]], None]] = None,
+            progress_interval_s: float = 5.0,
+    ) -> PipelineReport:
+        cfg = self._config
+        with self._lock:
+            self._stats = {name: StageStats(name) for name in STAGES}
+            self._failures = []
+            self._skipped = []
+            self._pending = {}
+        if cfg.parse_workers > 1:
+            # Workers start lazily, once the stage threads are running, and forking a
+            # multi-threaded process can deadlock the child
+            self._pool = ProcessPoolExecutor(
+                max_workers=cfg.parse_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        try:
+            return self._run(paths, on_progress, progress_interval_s)
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def _run(
+            self,
+            paths: Iterable[str | Path],
+            on_progress: Optional[Callable[[Dict[str, StageStats]], None]],
+            progress_interval_s: float,
+    ) -> PipelineReport:
+        cfg = self._config
+
+        fns: Dict[str, Callable[[Any], Tuple[Any, int]]] = {
+            "parse": self._parse, "chunk": self._chunk, "embed": self._embed, "upsert": self._upsert,
+        }
+        queues: List["queue.Queue[Any]"] = [queue.Queue(maxsize=cfg.queue_size) for _ in STAGES]
+        threads: List[threading.Thread] = []
+        for i, stage in enumerate(STAGES):
+            last = i == len(STAGES) - 1
+            threads += self._run_stage(
+                stage,
+                fns[stage],
+                queues[i],
+                None if last else queues[i + 1],
+                0 if last else cfg.workers(STAGES[i + 1]),
+            )
+
+        start = time.perf_counter()
+
+        def feed() -> None:
+            try:
+                for p in paths:
+                    queues[0].put((str(p), str(p)))
+            finally:
+                for _ in range(cfg.parse_workers):
+                    queues[0].put(_DONE)
+
+        feeder = threading.Thread(target=feed, name="ingest-feed", daemon=True)
+        feeder.start()
+        threads.append(feeder)
+
+        for t in threads:
+            while t.is_alive():
+                t.join(timeout=progress_interval_s if on_progress else None)
+                if on_progress is not None and t.is_alive():
+                    on_progress(self.snapshot())
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            failures = list(self._failures)
+            skipped = list(self._skipped)
+        return PipelineReport(stages=self.snapshot(), failures=failures, skipped=skipped, elapsed_s=elapsed)
+
+
+def iter_pdf_paths(inputs: Iterable[str | Path]) -> Iterator[Path]:
+    """Yield the given PDF files, and every *.pdf below the given directories, lazily and in sorted order."""
+    for item in inputs:
+        p = Path(item)
+        if p.is_dir():
+            yield from sorted(q for q in p.rglob("*") if q.is_file() and q.suffix.lower() == ".pdf")
+        else:
+            yield p
+
+
+def format_stats(stats: Dict[str, StageStats], elapsed_s: Optional[float] = None) -> str:
+    units = {"parse": "pages", "chunk": "chunks", "embed": "vectors", "upsert": "points"}
+    lines = [f"{'stage':<7} {'docs':>7} {'units':>10} {'errors':>6} {'busy s':>8} {'docs/s':>8} {'units/s':>10}"]
+    for name in STAGES:
+        s = stats[name]
+        lines.append(
+            f"{name:<7} {s.docs:>7} {s.units:>10} {s.errors:>6} {s.busy_s:>8.1f} "
+            f"{s.docs_per_s:>8.2f} {s.units_per_s:>10.1f}  ({units[name]})"
+        )
+    if elapsed_s is not None:
+        lines.append(f"wall time {elapsed_s:.1f}s")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from services.ingest.embed.factory import create_embedder
+    from services.ingest.index.qdrant_client import connect_qdrant, ensure_collection
+    from services.ingest.index.schemas import CollectionSpec
+
+    ap = argparse.ArgumentParser(description="Ingest PDFs into Qdrant with a pipelined parse/chunk/embed/upsert run.")
+    ap.add_argument("inputs", nargs="+", help="PDF files or directories (searched recursively)")
+    ap.add_argument("--collection", default="documents")
+    ap.add_argument("--host", default="localhost")
+    ap.add_argument("--port", type=int, default=6333)
+    ap.add_argument("--api-key", default=None)
+    ap.add_argument("--https", action="store_true")
+    ap.add_argument("--backend", default="sbert", choices=["sbert", "sbert-pool", "onnx"])
+    ap.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    ap.add_argument("--cache-dir", default=None, help="persistent embedding cache directory")
+    ap.add_argument("--text-store", default=None, help="SQLite file for chunk texts (kept out of Qdrant payloads)")
+    ap.add_argument("--manifest", default=None, help="SQLite ingest manifest; unchanged documents are skipped")
+    ap.add_argument("--parse-workers", type=int, default=PipelineConfig.parse_workers)
+    ap.add_argument("--chunk-workers", type=int, default=PipelineConfig.chunk_workers)
+    ap.add_argument("--embed-workers", type=int, default=PipelineConfig.embed_workers)
+    ap.add_argument("--upsert-workers", type=int, default=PipelineConfig.upsert_workers)
+    ap.add_argument("--queue-size", type=int, default=PipelineConfig.queue_size)
+    ap.add_argument("--tokenizer", default=PipelineConfig.tokenizer_name)
+    ap.add_argument("--chunk-size", type=int, default=PipelineConfig.chunk_size)
+    ap.add_argument("--overlap", type=int, default=PipelineConfig.overlap)
+    ap.add_argument("--progress-every", type=float, default=10.0, help="seconds between progress reports")
+    args = ap.parse_args(argv)
+
+    config = PipelineConfig(
+        parse_workers=args.parse_workers,
+        chunk_workers=args.chunk_workers,
+        embed_workers=args.embed_workers,
+        upsert_workers=args.upsert_workers,
+        queue_size=args.queue_size,
+        tokenizer_name=args.tokenizer,
+        chunk_size=args.chunk_size,
+        overlap=args.overlap,
+    )
+    embedder = create_embedder(args.backend, args.model, cache_dir=args.cache_dir)
+    client = connect_qdrant(args.host, args.port, api_key=args.api_key, https=args.https)
+    ensure_collection(client, CollectionSpec(name=args.collection, vector_size=embedder.dimension))
+
+    text_store = ChunkTextStore(args.text_store) if args.text_store else None
+    manifest = IngestManifest(args.manifest) if args.manifest else None
+    pipeline = IngestPipeline(
+        client=client,
+        collection=args.collection,
+        embedder=embedder,
+        config=config,
+        text_store=text_store,
+        manifest=manifest,
+    )
+    report = pipeline.run(
+        iter_pdf_paths(args.inputs),
+        on_progress=lambda s: print(format_stats(s) + "\n", file=sys.stderr),
+        progress_interval_s=args.progress_every,
+    )
+    if text_store is not None:
+        text_store.close()
+    if manifest is not None:
+        manifest.close()
+    print(format_stats(report.stages, report.elapsed_s))
+    if report.skipped:
+        print(f"skipped {len(report.skipped)} unchanged documents")
+    for f in report.failures:
+        print(f"FAILED [{f.stage}] {f.source}: {f.error}", file=sys.stderr)
+    return 1 if report.failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,36 +1,104 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+import json
 import os
+import threading
+import time
+
 import httpx
 
+from services.observability.metrics import record_stage, timed
+
 @dataclass(frozen=True)
 class LLMResponse:
     text: str
     raw: Dict[str, Any]
 
 class OpenAICompatibleClient:
+    """
+    Chat-completions client for OpenAI-compatible servers.
+
+    Keeps one pooled httpx.Client (and, for achat, one httpx.AsyncClient)
+    per instance, so consecutive calls reuse keep-alive connections instead
+    of paying a TCP/TLS handshake each time. Both are created on first use;
+    the async client belongs to the event loop that first used it. Call
+    close()/aclose() or use the instance as a (async) context manager.
+    `http2=True` needs the optional `h2` package (httpx[http2]).
+    """
+
     def __init__(
             self,
             *,
             base_url: str,
             api_key: str,
             model: str,
-            timeout_s: float = 60.0
+            timeout_s: float = 60.0,
+            connect_timeout_s: float = 5.0,
+            max_connections: int = 20,
+            max_keepalive_connections: int = 10,
+            keepalive_expiry_s: float = 30.0,
+            http2: bool = False,
         ) -> None:
         self._base_url = base_url
         self._api_key = api_key
         self._model = model
-        self._timeout = timeout_s
+        # timeout_s bounds reading the (possibly long) completion; connecting should fail fast
+        self._timeout = httpx.Timeout(timeout_s, connect=connect_timeout_s)
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry_s,
+        )
+        self._http2 = http2
+        self._lock = threading.Lock()
+        self._client: Optional[httpx.Client] = None
+        self._aclient: Optional[httpx.AsyncClient] = None
 
-    def chat(
+    def _sync_client(self) -> httpx.Client:
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(timeout=self._timeout, limits=self._limits, http2=self._http2)
+            return self._client
+
+    def _async_client(self) -> httpx.AsyncClient:
+        with self._lock:
+            if self._aclient is None:
+                self._aclient = httpx.AsyncClient(timeout=self._timeout, limits=self._limits, http2=self._http2)
+            return self._aclient
+
+    def close(self) -> None:
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+
+    async def aclose(self) -> None:
+        self.close()
+        with self._lock:
+            aclient, self._aclient = self._aclient, None
+        if aclient is not None:
+            await aclient.aclose()
+
+    def __enter__(self) -> OpenAICompatibleClient:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    async def __aenter__(self) -> OpenAICompatibleClient:
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.aclose()
+
+    def _request(
             self,
             messages: List[Dict[str, str]],
-            *,
-            temperature: float = 0.2,
-            max_tokens: int = 500,
-        ) -> LLMResponse:
+            temperature: float,
+            max_tokens: int,
+        ) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
         url = f"{self._base_url}/chat/completions"
 
         headers = {
@@ -44,16 +112,93 @@ class OpenAICompatibleClient:
             "temperature": temperature,
             "max_tokens": max_tokens,
         }
+        return url, headers, payload
 
-        with httpx.Client(timeout=self._timeout) as client:
-            r = client.post(url, headers=headers, json=payload)
-            r.raise_for_status()
-            data = r.json()
+    @timed("llm")
+    def chat(
+            self,
+            messages: List[Dict[str, str]],
+            *,
+            temperature: float = 0.2,
+            max_tokens: int = 500,
+        ) -> LLMResponse:
+        url, headers, payload = self._request(messages, temperature, max_tokens)
+
+        r = self._sync_client().post(url, headers=headers, json=payload)
+        r.raise_for_status()
+        data = r.json()
+
+        text = data["choices"][0]["message"]["content"]
+        return LLMResponse(text=text, raw=data)
+
+    def chat_stream(
+            self,
+            messages: List[Dict[str, str]],
+            *,
+            temperature: float = 0.2,
+            max_tokens: int = 500,
+        ) -> Iterator[str]:
+        """Yield the completion's text deltas as the server streams them (SSE, `stream: true`)."""
+        url, headers, payload = self._request(messages, temperature, max_tokens)
+        payload["stream"] = True
+        headers["Accept"] = "text/event-stream"
+
+        t0 = time.perf_counter()
+        first = True
+        failed = True
+        try:
+            with self._sync_client().stream("POST", url, headers=headers, json=payload) as r:
+                r.raise_for_status()
+                for delta in iter_sse_deltas(r.iter_lines()):
+                    if first:
+                        record_stage("llm_first_token", time.perf_counter() - t0)
+                        first = False
+                    yield delta
+            failed = False
+        except GeneratorExit:
+            failed = False  # the consumer stopped early (e.g. the HTTP client disconnected)
+            raise
+        finally:
+            record_stage("llm_stream", time.perf_counter() - t0, error=failed)
+
+    @timed("llm")
+    async def achat(
+            self,
+            messages: List[Dict[str, str]],
+            *,
+            temperature: float = 0.2,
+            max_tokens: int = 500,
+        ) -> LLMResponse:
+        url, headers, payload = self._request(messages, temperature, max_tokens)
+
+        r = await self._async_client().post(url, headers=headers, json=payload)
+        r.raise_for_status()
+        data = r.json()
 
         text = data["choices"][0]["message"]["content"]
         return LLMResponse(text=text, raw=data)
 
 
+def iter_sse_deltas(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Text deltas from the lines of an OpenAI-style chat-completions event
+    stream. Stops at `data: [DONE]`; comments, other fields and events
+    without content (e.g. the initial role delta) are skipped.
+    """
+    for line in lines:
+        if not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return
+        if not data:
+            continue
+        choices = json.loads(data).get("choices") or []
+        content = (choices[0].get("delta") or {}).get("content") if choices else None
+        if content:
+            yield content
+
+
 def client_from_env() -> OpenAICompatibleClient:
     base_url = os.environ["OPENAI_BASE_URL"]
     api_key = os.environ["OPENAI_API_KEY"]
@@ -0,0 +1,25 @@
+from .metrics import (
+    REGISTRY as REGISTRY,
+    STAGE_SECONDS as STAGE_SECONDS,
+    STAGE_ERRORS as STAGE_ERRORS,
+    Counter as Counter,
+    Histogram as Histogram,
+    MetricsRegistry as MetricsRegistry,
+    collect_timings as collect_timings,
+    record_stage as record_stage,
+    stage_timer as stage_timer,
+    timed as timed,
+)
+
+__all__ = [
+    "REGISTRY",
+    "STAGE_SECONDS",
+    "STAGE_ERRORS",
+    "Counter",
+    "Histogram",
+    "MetricsRegistry",
+    "collect_timings",
+    "record_stage",
+    "stage_timer",
+    "timed",
+]
@@ -0,0 +1,221 @@
+from __future__ import annotations
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar, cast
+import functools
+import inspect
+import threading
+import time
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+_LabelValues = Tuple[str, ...]
+
+
+def _label_str(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(v: float) -> str:
+    return repr(float(v)) if v != int(v) else str(int(v))
+
+
+class Counter:
+    """Monotonic counter, one series per label-value combination."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[_LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(labels[n] for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(tuple(labels[n] for n in self.labelnames), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_label_str(self.labelnames, k)} {_fmt(v)}" for k, v in items]
+        return lines
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram. observe() is a bisect and three increments
+    under a lock, cheap enough to leave on for every request.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            help: str,
+            labelnames: Sequence[str] = (),
+            buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        if list(buckets) != sorted(buckets):
+            raise ValueError("buckets must be sorted")
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._buckets = tuple(float(b) for b in buckets)
+        self._lock = threading.Lock()
+        # label values -> (per-bucket counts with a final +Inf slot, [sum, count])
+        self._series: Dict[_LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple([labels[n] for n in self.labelnames])
+        i = bisect_left(self._buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self._buckets) + 1), [0.0, 0.0])
+            series[0][i] += 1
+            series[1][0] += value
+            series[1][1] += 1
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            series = self._series.get(tuple(labels[n] for n in self.labelnames))
+            return int(series[1][1]) if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, (list(c), list(s))) for k, (c, s) in self._series.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (counts, (total, n)) in items:
+            cumulative = 0
+            for bound, c in zip([*self._buckets, float("inf")], counts):
+                cumulative += c
+                le = "+Inf" if bound == float("inf") else _fmt(bound)
+                lines.append(f'{self.name}_bucket{_label_str(self.labelnames, key, f"le=\"{le}\"")} {cumulative}')
+            lines.append(f"{self.name}_sum{_label_str(self.labelnames, key)} {total!r}")
+            lines.append(f"{self.name}_count{_label_str(self.labelnames, key)} {int(n)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Counter | Histogram] = {}
+
+    def _add(self, metric: Counter | Histogram) -> Any:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} already registered with another type or labels")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return cast(Counter, self._add(Counter(name, help, labelnames)))
+
+    def histogram(
+            self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return cast(Histogram, self._add(Histogram(name, help, labelnames, buckets)))
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            metrics = [self._metrics[n] for n in sorted(self._metrics)]
+        return "\n".join(line for m in metrics for line in m.render()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "rag_stage_seconds", "Wall time per request/ingest stage; nested stages are counted in their parent too.", ("stage",)
+)
+STAGE_ERRORS = REGISTRY.counter("rag_stage_errors_total", "Stages that raised, by stage.", ("stage",))
+
+# Per-request breakdown: stage -> seconds, collected while collect_timings() is active in this context
+_TIMINGS: ContextVar[Optional[Dict[str, float]]] = ContextVar("rag_timings", default=None)
+
+
+def record_stage(stage: str, seconds: float, *, error: bool = False) -> None:
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    if error:
+        STAGE_ERRORS.inc(stage=stage)
+    timings = _TIMINGS.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    t0 = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        record_stage(stage, time.perf_counter() - t0, error=True)
+        raise
+    record_stage(stage, time.perf_counter() - t0)
+
+
+def timed(stage: str) -> Callable[[F], F]:
+    """Decorator: time every call of a function (sync or async) as `stage`."""
+    # try/except inline rather than stage_timer: a generator-based context manager doubles the overhead
+    def wrap(fn: F) -> F:
+        if inspect.iscoroutinefunction(fn):
+            afn = cast(Callable[..., Awaitable[Any]], fn)
+
+            @functools.wraps(fn)
+            async def awrapper(*args: Any, **kwargs: Any) -> Any:
+                t0 = time.perf_counter()
+                try:
+                    result = await afn(*args, **kwargs)
+                except BaseException:
+                    record_stage(stage, time.perf_counter() - t0, error=True)
+                    raise
+                record_stage(stage, time.perf_counter() - t0)
+                return result
+            return cast(F, awrapper)
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            t0 = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                record_stage(stage, time.perf_counter() - t0, error=True)
+                raise
+            record_stage(stage, time.perf_counter() - t0)
+            return result
+        return cast(F, wrapper)
+    return wrap
+
+
+@contextmanager
+def collect_timings() -> Iterator[Dict[str, float]]:
+    """
+    Collect the stages timed in this context (and in threads started with
+    a copy of it, e.g. asyncio.to_thread) into the yielded dict.
+    """
+    timings: Dict[str, float] = {}
+    token = _TIMINGS.set(timings)
+    try:
+        yield timings
+    finally:
+        _TIMINGS.reset(token)
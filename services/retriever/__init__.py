@@ -1,4 +1,6 @@
 from .models import RetrievalQuery as RetrievalQuery, RetrievedChunk as RetrievedChunk
+from .query_cache import QueryEmbeddingCache as QueryEmbeddingCache, query_namespace as query_namespace
 from .retriever import Retriever as Retriever
+from .async_retriever import AsyncRetriever as AsyncRetriever
 
-__all__ = ["RetrievalQuery", "RetrievedChunk", "Retriever"]
+__all__ = ["RetrievalQuery", "RetrievedChunk", "QueryEmbeddingCache", "query_namespace", "Retriever", "AsyncRetriever"]
@@ -0,0 +1,92 @@
+from __future__ import annotations
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, cast
+import asyncio
+
+import numpy as np
+import numpy.typing as npt
+
+from services.ingest.embed.interfaces import Embedder
+from services.ingest.index.chunk_store import ChunkTextStore
+from services.ingest.index.qdrant_client import asearch
+from services.observability.metrics import stage_timer, timed
+
+from .models import RetrievalQuery, RetrievedChunk
+from .query_cache import QueryEmbeddingCache
+from .retriever import _META_FIELDS, _filter_for, _hits_to_chunks, normalize_query_text
+
+
+class AsyncRetriever:
+    """
+    asyncio counterpart of Retriever, for an AsyncQdrantClient.
+
+    Query embedding is CPU work and runs on `embed_executor` (by default a
+    dedicated single-thread pool owned by this instance), so the event loop
+    stays free while the model runs; Qdrant calls are awaited directly.
+    """
+
+    def __init__(
+            self,
+            *,
+            qdrant: Any,
+            embedder: Embedder,
+            collection_name: str,
+            text_store: Optional[ChunkTextStore] = None,
+            query_cache: Optional[QueryEmbeddingCache] = None,
+            embed_executor: Optional[Executor] = None,
+            ) -> None:
+        self._qdrant = qdrant
+        self._embedder = embedder
+        self._collection = collection_name
+        self._text_store = text_store
+        self._query_cache = query_cache
+        self._owns_executor = embed_executor is None
+        self._executor = embed_executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="query-embed")
+
+    @property
+    def query_cache(self) -> Optional[QueryEmbeddingCache]:
+        return self._query_cache
+
+    async def _embed_query(self, qtext: str) -> List[float]:
+        vec = self._query_cache.get(qtext) if self._query_cache is not None else None
+        if vec is None:
+            loop = asyncio.get_running_loop()
+            with stage_timer("embed_query"):
+                matrix = await loop.run_in_executor(self._executor, self._embedder.embed_array, [qtext])
+            vec = matrix[0]
+            if self._query_cache is not None:
+                self._query_cache.put(qtext, vec)
+        return cast(List[float], vec.tolist())
+
+    async def embed_query(self, text: str) -> npt.NDArray[np.float32]:
+        return np.asarray(await self._embed_query(normalize_query_text(text)), dtype=np.float32)
+
+    @timed("retrieve")
+    async def retrieve(
+            self,
+            rq: RetrievalQuery,
+            *,
+            query_vector: Optional[npt.NDArray[np.float32]] = None,
+            ) -> List[RetrievedChunk]:
+        if query_vector is None:
+            query_vec = await self._embed_query(normalize_query_text(rq.text))
+        else:
+            query_vec = cast(List[float], np.asarray(query_vector, dtype=np.float32).tolist())
+
+        hits = await asearch(
+            self._qdrant,
+            self._collection,
+            query_vector=query_vec,
+            top_k=rq.top_k,
+            filter_eq=_filter_for(rq),
+            payload_fields=_META_FIELDS if self._text_store is not None else None,
+        )
+
+        texts: Optional[Dict[str, str]] = None
+        if self._text_store is not None:
+            texts = await asyncio.to_thread(self._text_store.get_many, [str(h["id"]) for h in hits])
+        return _hits_to_chunks(hits, texts)
+
+    def close(self) -> None:
+        if self._owns_executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
@@ -18,3 +18,6 @@ class RetrievedChunk:
     page_end: int | None = None
     source: str | None = None
     payload: Dict[str, Any] | None = None
+    # Offsets of the chunk in the document's normalized text, when ingest recorded them
+    char_start: int | None = None
+    char_end: int | None = None
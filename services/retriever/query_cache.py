@@ -0,0 +1,143 @@
+from __future__ import annotations
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+import threading
+import time
+
+import numpy as np
+import numpy.typing as npt
+
+from services.ingest.embed.factory import embedder_variant
+from services.ingest.embed.interfaces import Embedder
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded LRU cache of query embeddings, keyed by normalized query text.
+
+    Thread-safe. Entries older than `ttl_s` (if set) count as misses and are
+    dropped. With `path`, the cache is loaded from that .npz file at start-up
+    (if it exists) and `save()` writes it back. Vectors are only valid for
+    the model that produced them, so `namespace` defaults to the `embedder`'s
+    model name and backend variant (see query_namespace), and a file saved
+    under another namespace is rejected with ValueError.
+    """
+
+    def __init__(
+            self,
+            max_entries: int = 10_000,
+            *,
+            ttl_s: Optional[float] = None,
+            path: Optional[str | Path] = None,
+            embedder: Optional[Embedder] = None,
+            namespace: Optional[str] = None,
+            clock: Callable[[], float] = time.time,
+    ) -> None:
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self._max_entries = max_entries
+        self._ttl_s = ttl_s
+        self._path = Path(path) if path is not None else None
+        if namespace is None:
+            namespace = query_namespace(embedder) if embedder is not None else ""
+        self._namespace = namespace
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, Tuple[npt.NDArray[np.float32], float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if self._path is not None and self._path.exists():
+            self.load(self._path)
+
+    @property
+    def namespace(self) -> str:
+        return self._namespace
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _expired(self, stored_at: float, now: float) -> bool:
+        return self._ttl_s is not None and now - stored_at > self._ttl_s
+
+    def get(self, key: str) -> Optional[npt.NDArray[np.float32]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[1], self._clock()):
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, vector: npt.NDArray[np.float32]) -> None:
+        vec = np.array(vector, dtype=np.float32)  # own copy; callers may reuse their buffer
+        vec.setflags(write=False)
+        with self._lock:
+            self._entries[key] = (vec, self._clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def save(self, path: Optional[str | Path] = None) -> None:
+        target = Path(path) if path is not None else self._path
+        if target is None:
+            raise ValueError("no path given and the cache was created without one")
+        with self._lock:
+            keys = list(self._entries)
+            vectors = [v for v, _ in self._entries.values()]
+            stored_at = [t for _, t in self._entries.values()]
+        matrix = np.stack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(target.name + ".tmp")
+        with tmp.open("wb") as f:
+            np.savez(
+                f,
+                keys=np.array(keys, dtype=str),
+                vectors=matrix,
+                stored_at=np.array(stored_at, dtype=np.float64),
+                namespace=np.array(self._namespace),
+            )
+        tmp.replace(target)
+
+    def load(self, path: str | Path) -> int:
+        """Merge entries from a saved cache (oldest first, so LRU order survives). Returns the number loaded."""
+        with np.load(Path(path), allow_pickle=False) as data:
+            stored = str(data["namespace"])
+            if stored != self._namespace:
+                raise ValueError(f"Query cache at {path} has namespace={stored!r}, expected {self._namespace!r}")
+            keys = data["keys"].tolist()
+            vectors = np.asarray(data["vectors"], dtype=np.float32)
+            stored_at = data["stored_at"].tolist()
+        vectors.setflags(write=False)
+        now = self._clock()
+        loaded = 0
+        for key, vec, t in zip(keys, vectors, stored_at):
+            if self._expired(t, now):
+                continue
+            with self._lock:
+                self._entries[key] = (vec, t)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+            loaded += 1
+        return loaded
+
+
+def query_namespace(embedder: Embedder) -> str:
+    """Namespace of query vectors from `embedder`: model name and backend variant."""
+    return f"{embedder.model_name}|{embedder_variant(embedder)}"
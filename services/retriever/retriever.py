@@ -1,61 +1,143 @@
 from __future__ import annotations
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Sequence, cast
 import re
 
+import numpy as np
+import numpy.typing as npt
+
 from services.ingest.embed.interfaces import Embedder
-from services.ingest.index.qdrant_client import search as qdrant_search
+from services.ingest.index.chunk_store import ChunkTextStore
+from services.ingest.index.local_index import LocalIndexClient
+from services.observability.metrics import stage_timer, timed
+from services.ingest.index.qdrant_client import search as qdrant_search, search_batch as qdrant_search_batch
 from qdrant_client import QdrantClient
 
 from .models import RetrievalQuery, RetrievedChunk
+from .query_cache import QueryEmbeddingCache
 
 _WHITESPACE_RE = re.compile(r"\s+")
 
+# Payload keys requested from Qdrant when texts come from a ChunkTextStore
+_META_FIELDS = ("doc_id", "chunk_index", "page_start", "page_end", "source", "char_start", "char_end")
+
 class Retriever:
     def __init__(
             self,
             *,
-            qdrant: QdrantClient,
+            qdrant: QdrantClient | LocalIndexClient,
             embedder: Embedder,
             collection_name: str,
+            text_store: Optional[ChunkTextStore] = None,
+            query_cache: Optional[QueryEmbeddingCache] = None,
             ):
         self._qdrant = qdrant
         self._embedder = embedder
         self._collection = collection_name
+        self._text_store = text_store
+        self._query_cache = query_cache
+
+    @property
+    def query_cache(self) -> Optional[QueryEmbeddingCache]:
+        return self._query_cache
+
+    def _embed_queries(self, qtexts: List[str]) -> List[List[float]]:
+        # One forward pass for every distinct query the cache does not already hold
+        vectors: Dict[str, npt.NDArray[np.float32]] = {}
+        if self._query_cache is not None:
+            for q in dict.fromkeys(qtexts):
+                vec = self._query_cache.get(q)
+                if vec is not None:
+                    vectors[q] = vec
+        missing = [q for q in dict.fromkeys(qtexts) if q not in vectors]
+        if missing:
+            with stage_timer("embed_query"):
+                matrix = self._embedder.embed_array(missing)
+            for q, vec in zip(missing, matrix):
+                vectors[q] = vec
+                if self._query_cache is not None:
+                    self._query_cache.put(q, vec)
+        return [cast(List[float], vectors[q].tolist()) for q in qtexts]
 
-    def retrieve(self, rq: RetrievalQuery) -> List[RetrievedChunk]:
-        qtext = normalize_query_text(rq.text)
-        query_vec = self._embedder.embed_texts([qtext])[0]
+    def _fetch_texts(self, hits: Sequence[Dict[str, Any]]) -> Optional[Dict[str, str]]:
+        if self._text_store is None:
+            return None
+        return self._text_store.get_many([str(h["id"]) for h in hits])
 
-        filter_eq: Optional[Dict[str, Any]] = None
-        if rq.doc_id:
-            filter_eq = {"doc_id": rq.doc_id}
+    def embed_query(self, text: str) -> npt.NDArray[np.float32]:
+        """Embedding of the normalized query text, through the query cache if there is one."""
+        return np.asarray(self._embed_queries([normalize_query_text(text)])[0], dtype=np.float32)
+
+    @timed("retrieve")
+    def retrieve(
+            self,
+            rq: RetrievalQuery,
+            *,
+            query_vector: Optional[npt.NDArray[np.float32]] = None,
+            ) -> List[RetrievedChunk]:
+        """Top-k chunks for `rq`; pass `query_vector` (from embed_query) to skip embedding the text again."""
+        if query_vector is None:
+            query_vec = self._embed_queries([normalize_query_text(rq.text)])[0]
+        else:
+            query_vec = cast(List[float], np.asarray(query_vector, dtype=np.float32).tolist())
 
         hits = qdrant_search(
             self._qdrant,
             self._collection,
             query_vector=query_vec,
             top_k=rq.top_k,
-            filter_eq=filter_eq
+            filter_eq=_filter_for(rq),
+            payload_fields=_META_FIELDS if self._text_store is not None else None,
         )
+        return _hits_to_chunks(hits, self._fetch_texts(hits))
 
-        out: List[RetrievedChunk] = []
-        for h in hits:
-            payload = h.get("payload") or {}
-            out.append(
-                RetrievedChunk(
-                    doc_id=str(payload.get("doc_id", "")),
-                    chunk_index=int(payload.get("chunk_index", -1)),
-                    text=str(payload.get("text", "")),
-                    score=float(h.get("score", 0.0)),
-                    page_start=_optional_int(payload.get("page_start")),
-                    page_end=_optional_int(payload.get("page_end")),
-                    source=_optional_str(payload.get("source")),
-                    payload=payload,
-                )
+    @timed("retrieve_many")
+    def retrieve_many(self, queries: List[RetrievalQuery]) -> List[List[RetrievedChunk]]:
+        """
+        Retrieve for several queries at once: one embedding batch and one
+        query_batch_points round-trip. Each query keeps its own top_k and
+        doc_id filter; results come back in input order.
+        """
+        if not queries:
+            return []
+        qvecs = self._embed_queries([normalize_query_text(rq.text) for rq in queries])
+        batches = qdrant_search_batch(
+            self._qdrant,
+            self._collection,
+            qvecs,
+            [rq.top_k for rq in queries],
+            [_filter_for(rq) for rq in queries],
+            payload_fields=_META_FIELDS if self._text_store is not None else None,
+        )
+        texts = self._fetch_texts([h for hits in batches for h in hits])
+        return [_hits_to_chunks(hits, texts) for hits in batches]
+
+def _hits_to_chunks(hits: List[Dict[str, Any]], texts: Optional[Dict[str, str]]) -> List[RetrievedChunk]:
+    # `texts` (point id -> text) replaces payload text when chunk texts live in a ChunkTextStore
+    out: List[RetrievedChunk] = []
+    for h in hits:
+        payload = h.get("payload") or {}
+        if texts is not None:
+            payload = {**payload, "text": texts.get(str(h["id"]), "")}
+        out.append(
+            RetrievedChunk(
+                doc_id=str(payload.get("doc_id", "")),
+                chunk_index=int(payload.get("chunk_index", -1)),
+                text=str(payload.get("text", "")),
+                score=float(h.get("score", 0.0)),
+                page_start=_optional_int(payload.get("page_start")),
+                page_end=_optional_int(payload.get("page_end")),
+                source=_optional_str(payload.get("source")),
+                payload=payload,
+                char_start=_optional_int(payload.get("char_start")),
+                char_end=_optional_int(payload.get("char_end")),
             )
+        )
+
+    filtered = [o for o in out if o.text and o.text.strip()]
+    return filtered
 
-        filtered = [o for o in out if o.text and o.text.strip()]
-        return filtered
+def _filter_for(rq: RetrievalQuery) -> Optional[Dict[str, Any]]:
+    return {"doc_id": rq.doc_id} if rq.doc_id else None
 
 def _optional_int(v: Any) -> Optional[int]:
     try:
@@ -70,6 +152,7 @@ def _optional_str(v: Any) -> Optional[str]:
     return s if s else None
 
 
+@timed("normalize_query")
 def normalize_query_text(text: str) -> str:
     """
     Minimal query normalization:
@@ -2,6 +2,75 @@ from __future__ import annotations
 
 import sys
 from pathlib import Path
+from typing import Callable, List, Sequence, cast
+
+import numpy as np
+import numpy.typing as npt
+import pytest
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(REPO_ROOT))
+
+
+@pytest.fixture
+def make_pdf(tmp_path: Path) -> Callable[[List[str]], Path]:
+    """Write a small PDF with one line of Helvetica text per page."""
+    from pypdf import PdfWriter
+    from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+    def _make(page_texts: List[str], name: str = "doc.pdf") -> Path:
+        writer = PdfWriter()
+        font = DictionaryObject({
+            NameObject("/Type"): NameObject("/Font"),
+            NameObject("/Subtype"): NameObject("/Type1"),
+            NameObject("/BaseFont"): NameObject("/Helvetica"),
+        })
+        resources = DictionaryObject({NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})})
+        for text in page_texts:
+            page = writer.add_blank_page(612, 792)
+            page[NameObject("/Resources")] = resources
+            stream = DecodedStreamObject()
+            stream.set_data(f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode("latin-1"))
+            page[NameObject("/Contents")] = writer._add_object(stream)
+        out = tmp_path / name
+        writer.write(out)
+        return out
+
+    return _make
+
+
+class KeywordEmbedder:
+    """Embeds text as a keyword one-hot: column i is 1.0 if the text contains keywords[i], else 0.01."""
+
+    model_name = "fake/keyword"
+
+    def __init__(self, keywords: Sequence[str]) -> None:
+        self.keywords = tuple(keywords)
+        self.dimension = len(self.keywords)
+        self.batches: List[List[str]] = []  # every embed_array call, in order
+
+    @property
+    def calls(self) -> int:
+        return len(self.batches)
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        return cast(List[List[float]], self.embed_array(texts).tolist())
+
+    def embed_array(self, texts: List[str]) -> npt.NDArray[np.float32]:
+        self.batches.append(list(texts))
+        out = np.full((len(texts), self.dimension), 0.01, dtype=np.float32)
+        for row, t in enumerate(texts):
+            for col, k in enumerate(self.keywords):
+                if k in t:
+                    out[row, col] = 1.0
+        return out
+
+
+@pytest.fixture
+def make_keyword_embedder() -> Callable[..., KeywordEmbedder]:
+    """Build a KeywordEmbedder; the dimension is the number of keywords."""
+
+    def _make(keywords: Sequence[str] = ("cat", "dog", "pizza")) -> KeywordEmbedder:
+        return KeywordEmbedder(keywords)
+
+    return _make
@@ -0,0 +1,203 @@
+import json
+from dataclasses import replace
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+import numpy.typing as npt
+import pytest
+from fastapi.testclient import TestClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
+
+from services.api.app import main as api
+from services.chat.answer_cache import SemanticAnswerCache
+from services.chat.chat_service import ChatResult, ChatService
+from services.chat.prompt_builder import PromptBuilder
+from services.ingest.embed import factory
+from services.ingest.index import CollectionSpec, ensure_collection, make_point_id, upsert_embedded_chunks
+from services.ingest.manifest import IngestManifest, ManifestEntry
+from services.llm.openai_compat import OpenAICompatibleClient
+from services.retriever import RetrievedChunk, Retriever
+
+MakeEmbedder = Callable[..., Any]
+
+def _chunk(doc_id: str, i: int) -> RetrievedChunk:
+    return RetrievedChunk(doc_id=doc_id, chunk_index=i, text=f"{doc_id} {i}", score=1.0)
+
+def _result(answer: str) -> ChatResult:
+    return ChatResult(answer=answer, sources=[], retrived=1)
+
+def _vec(*xs: float) -> npt.NDArray[np.float32]:
+    return np.asarray(xs, dtype=np.float32)
+
+def test_threshold_and_scope() -> None:
+    cache = SemanticAnswerCache(threshold=0.9)
+    cache.put(_vec(1, 0, 0), doc_id=None, top_k=5, chunks=[_chunk("a", 0)], result=_result("A"))
+
+    assert cache.lookup(_vec(1, 0.1, 0), doc_id=None, top_k=5) == _result("A")   # cos ~0.995
+    assert cache.lookup(_vec(1, 1, 0), doc_id=None, top_k=5) is None             # cos ~0.71
+    assert cache.lookup(_vec(1, 0, 0), doc_id="a", top_k=5) is None
+    assert cache.lookup(_vec(1, 0, 0), doc_id=None, top_k=3) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 3, 0.25)
+
+def test_no_sources_not_cached() -> None:
+    cache = SemanticAnswerCache()
+    assert not cache.put(_vec(1, 0), doc_id=None, top_k=5, chunks=[], result=_result("?"))
+    assert len(cache) == 0
+
+def test_lru_and_ttl() -> None:
+    now = [0.0]
+    cache = SemanticAnswerCache(max_entries=2, ttl_s=10, clock=lambda: now[0])
+    for i, v in enumerate([_vec(1, 0, 0), _vec(0, 1, 0)]):
+        cache.put(v, doc_id=None, top_k=5, chunks=[_chunk("a", i)], result=_result(str(i)))
+    assert cache.lookup(_vec(1, 0, 0), doc_id=None, top_k=5) is not None  # refresh entry 0
+    cache.put(_vec(0, 0, 1), doc_id=None, top_k=5, chunks=[_chunk("a", 2)], result=_result("2"))
+    assert cache.lookup(_vec(0, 1, 0), doc_id=None, top_k=5) is None
+    assert cache.stats()["evictions"] == 1
+
+    now[0] = 11.0
+    assert cache.lookup(_vec(1, 0, 0), doc_id=None, top_k=5) is None
+    assert cache.stats()["expirations"] == 1
+    assert len(cache) == 1
+
+def test_invalidate_docs_and_points() -> None:
+    cache = SemanticAnswerCache()
+    cache.put(_vec(1, 0, 0), doc_id=None, top_k=5, chunks=[_chunk("a", 0), _chunk("b", 1)], result=_result("ab"))
+    cache.put(_vec(0, 1, 0), doc_id="c", top_k=5, chunks=[_chunk("c", 0)], result=_result("c"))
+    cache.put(_vec(0, 0, 1), doc_id=None, top_k=5, chunks=[_chunk("d", 4)], result=_result("d"))
+
+    assert cache.invalidate_docs(["b"]) == 1
+    assert cache.lookup(_vec(1, 0, 0), doc_id=None, top_k=5) is None
+    assert cache.invalidate_docs(["c"]) == 1
+    assert cache.invalidate_points([make_point_id("d", 3)]) == 0
+    assert cache.invalidate_points([make_point_id("d", 4)]) == 1
+    assert len(cache) == 0 and cache.stats()["invalidations"] == 3
+
+def test_doc_version_invalidates_on_lookup() -> None:
+    versions: Dict[str, Optional[str]] = {"a": "h1"}
+    cache = SemanticAnswerCache(doc_version=versions.get)
+    cache.put(_vec(1, 0), doc_id=None, top_k=5, chunks=[_chunk("a", 0)], result=_result("A"))
+    assert cache.lookup(_vec(1, 0), doc_id=None, top_k=5) is not None
+    versions["a"] = "h2"  # re-ingested elsewhere
+    assert cache.lookup(_vec(1, 0), doc_id=None, top_k=5) is None
+    assert len(cache) == 0
+
+def test_doc_version_is_queried_outside_the_lock() -> None:
+    held: List[bool] = []
+
+    def version(doc_id: str) -> Optional[str]:
+        held.append(cache._lock.locked())
+        return "h1"
+
+    cache = SemanticAnswerCache(doc_version=version)
+    cache.put(_vec(1, 0), doc_id=None, top_k=5, chunks=[_chunk("a", 0)], result=_result("A"))
+    assert cache.lookup(_vec(1, 0), doc_id=None, top_k=5) is not None
+    assert held == [False, False]
+
+
+def test_chat_service_serves_paraphrases_from_cache(
+        monkeypatch: pytest.MonkeyPatch, make_keyword_embedder: MakeEmbedder,
+) -> None:
+    llm_calls: List[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        llm_calls.append(json.loads(request.content)["messages"][-1]["content"])
+        return httpx.Response(200, json={"choices": [{"message": {"content": "They purr."}}]})
+
+    monkeypatch.setattr(httpx, "Client", partial(httpx.Client, transport=httpx.MockTransport(handler)))
+
+    client = QdrantClient(":memory:")
+    ensure_collection(client, CollectionSpec(name="pets", vector_size=2))
+    embedder = make_keyword_embedder(("cat", "dog"))
+    items = [
+        {"doc_id": "pets", "chunk_index": i, "vector": v.tolist(), "payload": {"text": t}}
+        for i, (t, v) in enumerate(zip(["cats purr", "dogs bark"], embedder.embed_array(["cats purr", "dogs bark"])))
+    ]
+    upsert_embedded_chunks(client, "pets", items)
+
+    cache = SemanticAnswerCache(threshold=0.99)
+    service = ChatService(
+        retriever=Retriever(qdrant=client, embedder=embedder, collection_name="pets"),
+        prompt_builder=PromptBuilder(),
+        llm=OpenAICompatibleClient(base_url="http://llm.test/v1", api_key="k", model="m"),
+        answer_cache=cache,
+    )
+    embedder.batches.clear()
+    first = service.chat(question="what do cats do?", top_k=1)
+    assert embedder.calls == 1  # one embedding shared by the cache lookup and retrieval
+    again = service.chat(question="what  do my cats do", top_k=1)
+    assert again is first and len(llm_calls) == 1
+
+    service.chat(question="what do dogs do?", top_k=1)
+    assert len(llm_calls) == 2
+
+    cache.invalidate_docs(["pets"])
+    service.chat(question="what do cats do?", top_k=1)
+    assert len(llm_calls) == 3
+    assert cache.stats()["hits"] == 1
+
+def test_api_answer_cache_follows_ingest_manifest(
+        tmp_path: Path, monkeypatch: pytest.MonkeyPatch, make_keyword_embedder: MakeEmbedder,
+) -> None:
+    llm_calls: List[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        llm_calls.append(json.loads(request.content)["messages"][-1]["content"])
+        return httpx.Response(200, json={"choices": [{"message": {"content": "They purr."}}]})
+
+    monkeypatch.setattr(httpx, "AsyncClient", partial(httpx.AsyncClient, transport=httpx.MockTransport(handler)))
+
+    qdrant = QdrantClient(path=str(tmp_path / "qdrant"))
+    ensure_collection(qdrant, CollectionSpec(name="pets", vector_size=2))
+    upsert_embedded_chunks(qdrant, "pets", [
+        {"doc_id": "pets", "chunk_index": 0, "vector": [1.0, 0.01], "payload": {"text": "cats purr"}},
+    ])
+    qdrant.close()  # the API's async client opens the same local store
+    entry = ManifestEntry(
+        doc_id="pets", source_value="pets.pdf", content_hash="c1", normalized_hash="n1",
+        normalization_version="v1", tokenizer_name="tok", chunk_size=64, chunk_overlap=8,
+        embedding_model="fake/keyword", chunk_count=1,
+    )
+    with IngestManifest(tmp_path / "manifest.sqlite") as m:
+        m.record(entry)
+
+    monkeypatch.setenv("QDRANT_COLLECTION", "pets")
+    monkeypatch.setenv("OPENAI_BASE_URL", "http://llm.test/v1")
+    monkeypatch.setenv("OPENAI_API_KEY", "k")
+    monkeypatch.setenv("ANSWER_CACHE", "1")
+    monkeypatch.setenv("INGEST_MANIFEST", str(tmp_path / "manifest.sqlite"))
+    monkeypatch.delenv("CHUNK_TEXT_STORE", raising=False)
+    monkeypatch.setattr(api, "QdrantClient", lambda **kwargs: QdrantClient(":memory:"))
+    monkeypatch.setattr(api, "AsyncQdrantClient", lambda **kwargs: AsyncQdrantClient(path=str(tmp_path / "qdrant")))
+    monkeypatch.setattr(factory, "create_embedder", lambda **kwargs: make_keyword_embedder(("cat", "dog")))
+    for name in ("retriever", "chat_service", "single_flight"):
+        monkeypatch.setattr(api.app.state, name, None, raising=False)
+
+    body = {"question": "what do cats do?", "top_k": 1}
+    with TestClient(api.app) as http:
+        assert http.post("/chat", json=body).json()["answer"] == "They purr."
+        http.post("/chat", json=body)
+        assert len(llm_calls) == 1
+
+        # Same file re-saved: chunks unchanged, so the answer stays cached
+        with IngestManifest(tmp_path / "manifest.sqlite") as m:
+            m.record(replace(entry, content_hash="c2"))
+        http.post("/chat", json=body)
+        assert len(llm_calls) == 1
+
+        # Re-ingested with new text (by another process): the cached answer is stale
+        with IngestManifest(tmp_path / "manifest.sqlite") as m:
+            m.record(replace(entry, content_hash="c3", normalized_hash="n2"))
+        http.post("/chat", json=body)
+        assert len(llm_calls) == 2
+
+def test_api_answer_cache_needs_manifest(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("ANSWER_CACHE", raising=False)
+    assert api.build_manifest() is None
+    monkeypatch.setenv("ANSWER_CACHE", "1")
+    monkeypatch.delenv("INGEST_MANIFEST", raising=False)
+    with pytest.raises(ValueError, match="INGEST_MANIFEST"):
+        api.build_manifest()
@@ -0,0 +1,49 @@
+from pathlib import Path
+from typing import Any, Callable, List
+
+import pytest
+from fastapi.testclient import TestClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
+
+from services.api.app import main as api
+from services.ingest.embed import factory
+from services.ingest.index import CollectionSpec, ChunkTextStore, ensure_collection, upsert_embedded_chunks
+
+MakeEmbedder = Callable[..., Any]
+
+def test_retrieve_reads_texts_from_chunk_text_store(
+        tmp_path: Path, monkeypatch: pytest.MonkeyPatch, make_keyword_embedder: MakeEmbedder,
+) -> None:
+    # Ingest as `--text-store` does: texts go to SQLite, payloads carry none
+    qdrant = QdrantClient(path=str(tmp_path / "qdrant"))
+    ensure_collection(qdrant, CollectionSpec(name="pets", vector_size=2))
+    with ChunkTextStore(tmp_path / "texts.sqlite") as store:
+        upsert_embedded_chunks(qdrant, "pets", [
+            {"doc_id": "pets", "chunk_index": 0, "vector": [1.0, 0.01], "payload": {"text": "cats purr"}},
+            {"doc_id": "pets", "chunk_index": 1, "vector": [0.01, 1.0], "payload": {"text": "dogs bark"}},
+        ], text_store=store)
+    points, _ = qdrant.scroll("pets", with_payload=True)
+    assert all("text" not in (p.payload or {}) for p in points)
+    qdrant.close()  # /retrieve reads the same local store through the async client
+
+    monkeypatch.setenv("QDRANT_COLLECTION", "pets")
+    monkeypatch.setenv("CHUNK_TEXT_STORE", str(tmp_path / "texts.sqlite"))
+    monkeypatch.delenv("OPENAI_BASE_URL", raising=False)
+    monkeypatch.setattr(api, "QdrantClient", lambda **kwargs: QdrantClient(":memory:"))
+    monkeypatch.setattr(api, "AsyncQdrantClient", lambda **kwargs: AsyncQdrantClient(path=str(tmp_path / "qdrant")))
+    monkeypatch.setattr(factory, "create_embedder", lambda **kwargs: make_keyword_embedder(("cat", "dog")))
+    for name in ("retriever", "chat_service", "single_flight"):
+        monkeypatch.setattr(api.app.state, name, None, raising=False)
+
+    # A second startup (e.g. server restart in-process) must rebuild, not reuse closed clients
+    for _ in range(2):
+        with TestClient(api.app) as http:
+            hits: List[Any] = http.post("/retrieve", json={"question": "what do cats do?", "top_k": 1}).json()
+        assert [(h["doc_id"], h["text"]) for h in hits] == [("pets", "cats purr")]
+        assert api.app.state.retriever is None and api.app.state.qdrant is None
+
+def test_missing_text_store_file_is_an_error(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("CHUNK_TEXT_STORE", str(tmp_path / "missing.sqlite"))
+    with pytest.raises(ValueError, match="CHUNK_TEXT_STORE"):
+        api.build_text_store()
+    assert not (tmp_path / "missing.sqlite").exists()
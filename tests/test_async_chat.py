@@ -0,0 +1,103 @@
+import asyncio
+import json
+import time
+from typing import Any, Callable, List
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+from services.api.app import main as api
+from services.chat.chat_service import ChatService
+from services.chat.prompt_builder import PromptBuilder
+from services.ingest.index import make_point_id
+from services.llm import openai_compat
+from services.llm.openai_compat import OpenAICompatibleClient
+from services.retriever import AsyncRetriever, RetrievalQuery
+
+MakeEmbedder = Callable[..., Any]
+
+
+async def _retriever(make_keyword_embedder: MakeEmbedder) -> AsyncRetriever:
+    client = AsyncQdrantClient(":memory:")
+    await client.create_collection("achat", vectors_config=VectorParams(size=3, distance=Distance.COSINE))
+    texts = ["cats purr", "dogs bark", "pizza is round"]
+    embedder = make_keyword_embedder()
+    vectors = embedder.embed_array(texts)
+    await client.upsert("achat", points=[
+        PointStruct(id=make_point_id("d", i), vector=v.tolist(), payload={"doc_id": "d", "chunk_index": i, "text": t})
+        for i, (t, v) in enumerate(zip(texts, vectors))
+    ])
+    return AsyncRetriever(qdrant=client, embedder=embedder, collection_name="achat")
+
+async def _slow_llm(request: httpx.Request) -> httpx.Response:
+    body = json.loads(request.content)
+    await asyncio.sleep(0.1)
+    question = body["messages"][-1]["content"]
+    answer = "cats [S1]" if "cat" in question else "unknown"
+    return httpx.Response(200, json={"choices": [{"message": {"content": answer}}]})
+
+def test_async_retriever(make_keyword_embedder: MakeEmbedder) -> None:
+    async def run() -> List[Any]:
+        retriever = await _retriever(make_keyword_embedder)
+        try:
+            return await retriever.retrieve(RetrievalQuery(text="my dog", top_k=1))
+        finally:
+            retriever.close()
+
+    hits = asyncio.run(run())
+    assert [(h.chunk_index, h.text) for h in hits] == [(1, "dogs bark")]
+
+def test_achat_runs_many_chats_concurrently(monkeypatch: pytest.MonkeyPatch, make_keyword_embedder: MakeEmbedder) -> None:
+    pools: List[httpx.AsyncClient] = []
+    real_async_client = httpx.AsyncClient
+
+    def async_client(**kwargs: Any) -> httpx.AsyncClient:
+        pools.append(real_async_client(**{"transport": httpx.MockTransport(_slow_llm), **kwargs}))
+        return pools[-1]
+
+    monkeypatch.setattr(httpx, "AsyncClient", async_client)
+
+    async def run() -> List[Any]:
+        retriever = await _retriever(make_keyword_embedder)
+        llm = OpenAICompatibleClient(base_url="http://llm.test/v1", api_key="k", model="m")
+        service = ChatService(retriever=retriever, prompt_builder=PromptBuilder(), llm=llm, citation_policy="off")
+        with pytest.raises(TypeError):
+            service.chat(question="cat?")
+        try:
+            return await asyncio.gather(*(service.achat(question=f"tell me about cats #{i}", top_k=2) for i in range(50)))
+        finally:
+            await service.aclose()
+            retriever.close()
+
+    t0 = time.perf_counter()
+    results = asyncio.run(run())
+    elapsed = time.perf_counter() - t0
+
+    assert len(results) == 50 and all(r.answer == "cats [S1]" and r.retrived == 2 for r in results)
+    assert elapsed < 50 * 0.1 / 4  # 50 LLM calls of 100 ms overlap instead of running back to back
+    assert len(pools) == 1 and pools[0].is_closed  # one shared pool, closed by aclose()
+
+def test_api_lifespan_closes_the_llm_client(monkeypatch: pytest.MonkeyPatch) -> None:
+    llm = OpenAICompatibleClient(base_url="http://llm.test/v1", api_key="k", model="m")
+    closed: List[str] = []
+    real_aclose = llm.aclose
+
+    async def aclose() -> None:
+        closed.append("aclose")
+        await real_aclose()
+
+    monkeypatch.setattr(llm, "aclose", aclose)
+    monkeypatch.setattr(openai_compat, "client_from_env", lambda: llm)
+    monkeypatch.setenv("OPENAI_BASE_URL", "http://llm.test/v1")
+    monkeypatch.delenv("ANSWER_CACHE", raising=False)
+    monkeypatch.setattr(api, "QdrantClient", lambda **kwargs: QdrantClient(":memory:"))
+    monkeypatch.setattr(api.app.state, "retriever", object(), raising=False)
+    for name in ("chat_service", "single_flight"):
+        monkeypatch.setattr(api.app.state, name, None, raising=False)
+
+    with TestClient(api.app):
+        assert closed == []
+    assert closed == ["aclose"]
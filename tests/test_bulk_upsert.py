@@ -0,0 +1,88 @@
+import threading
+from typing import Any, List, Tuple
+
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.models import FilterSelector
+
+from services.ingest.embed.models import EmbedBatchResult
+from services.ingest.index import CollectionSpec, bulk_upsert, ensure_collection
+
+def _result(doc_id: str, n: int, text_len: int = 10) -> EmbedBatchResult:
+    matrix = np.random.default_rng(len(doc_id)).normal(size=(n, 4)).astype(np.float32)
+    return EmbedBatchResult(
+        doc_id=doc_id,
+        model_name="fake",
+        matrix=matrix,
+        chunk_indices=list(range(n)),
+        payload_columns={"chunk_index": list(range(n)), "text": ["x" * text_len] * n},
+    )
+
+class RecordingClient:
+    """Wraps a local client; records (batch size, wait) per upsert and fails the first `fail` calls."""
+
+    def __init__(self, inner: QdrantClient, fail: int = 0) -> None:
+        self._inner = inner
+        self._lock = threading.Lock()
+        self._fail = fail
+        self.calls: List[Tuple[int, bool]] = []
+        self.deletes: List[Tuple[Any, bool]] = []
+
+    def delete(self, collection_name: str, points_selector: Any, wait: bool = True) -> Any:
+        with self._lock:
+            self.deletes.append((points_selector, wait))
+        return self._inner.delete(collection_name=collection_name, points_selector=points_selector, wait=wait)
+
+    def upsert(self, collection_name: str, points: Any, wait: bool = True) -> Any:
+        with self._lock:
+            self.calls.append((len(points.ids), wait))
+            if self._fail:
+                self._fail -= 1
+                raise ConnectionError("transient")
+            return self._inner.upsert(collection_name=collection_name, points=points, wait=wait)
+
+def _client(name: str) -> QdrantClient:
+    client = QdrantClient(":memory:")
+    ensure_collection(client, CollectionSpec(name=name, vector_size=4))
+    return client
+
+def test_bulk_upsert_splits_by_bytes_and_writes_everything() -> None:
+    inner = _client("bulk")
+    client = RecordingClient(inner)
+    results = [_result("a", 50, text_len=100), _result("bb", 7), _result("ccc", 0)]
+
+    n = bulk_upsert(client, "bulk", results, max_in_flight=3, max_batch_points=20, max_batch_bytes=1500)
+
+    assert n == 57 == inner.count("bulk").count
+    sizes = sorted(size for size, _ in client.calls)
+    # doc "a" rows are ~124 bytes, so the 1500 byte cap (12 rows) binds before max_batch_points
+    assert sizes == [2, 7, 12, 12, 12, 12]
+
+def test_failed_batch_is_retried_alone() -> None:
+    inner = _client("retry")
+    client = RecordingClient(inner, fail=1)
+
+    n = bulk_upsert(client, "retry", _result("a", 40), max_in_flight=4, max_batch_points=10, retry_backoff_s=0.0)
+
+    assert n == 40 == inner.count("retry").count
+    assert len(client.calls) == 5  # four batches, one of them sent twice
+
+def test_no_wait_mode_ends_with_barrier() -> None:
+    client = RecordingClient(_client("nowait"))
+
+    assert bulk_upsert(client, "nowait", _result("a", 30), max_batch_points=10, wait=False) == 30
+
+    assert [w for _, w in client.calls] == [False, False, False]
+    # The barrier is a filter operation (sent to every shard) that matches no point
+    ((selector, wait),) = client.deletes
+    assert wait is True and isinstance(selector, FilterSelector)
+    assert client._inner.count("nowait").count == 30
+
+    bulk_upsert(client, "nowait", _result("a", 30), max_batch_points=10, wait=True)
+    assert len(client.deletes) == 1
+
+def test_persistent_failure_is_raised() -> None:
+    client = RecordingClient(_client("broken"), fail=100)
+    with pytest.raises(ConnectionError):
+        bulk_upsert(client, "broken", _result("a", 30), max_batch_points=10, max_retries=2, retry_backoff_s=0.0)
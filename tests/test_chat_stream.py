@@ -0,0 +1,119 @@
+import json
+from functools import partial
+from typing import Any, Callable, Iterator, List
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from qdrant_client import QdrantClient
+
+from services.api.app import main as api
+from services.chat.chat_service import ChatService, CitationStreamFilter
+from services.chat.prompt_builder import PromptBuilder
+from services.ingest.index import CollectionSpec, ensure_collection, upsert_embedded_chunks
+from services.llm.openai_compat import OpenAICompatibleClient, iter_sse_deltas
+from services.observability.metrics import STAGE_ERRORS, STAGE_SECONDS
+from services.retriever import Retriever
+
+MakeEmbedder = Callable[..., Any]
+
+def _sse_body(pieces: List[str]) -> bytes:
+    events = [{"choices": [{"delta": {"role": "assistant"}}]}]
+    events += [{"choices": [{"delta": {"content": p}}]} for p in pieces]
+    lines = [f"data: {json.dumps(e)}\n\n" for e in events] + ["data: [DONE]\n\n"]
+    return "".join(lines).encode()
+
+def test_iter_sse_deltas() -> None:
+    lines = _sse_body(["Hel", "lo"]).decode().splitlines()
+    assert list(iter_sse_deltas([": keep-alive", *lines, 'data: {"choices": [{"delta": {"content": "late"}}]}'])) == [
+        "Hel", "lo"
+    ]
+
+def _run(f: CitationStreamFilter, pieces: List[str]) -> List[str]:
+    out = [f.feed(p) for p in pieces]
+    return out + [f.flush()]
+
+def test_citation_filter_holds_partial_labels() -> None:
+    f = CitationStreamFilter(allowed={"S1"}, policy="strip")
+    out = _run(f, ["Cats purr [", "S", "1] and [S", "2", "] bark [x] [S"])
+    assert out == ["Cats purr ", "", "[S1] and ", "", " bark [x] ", "[S"]
+    assert f.invalid == ["S2"]
+
+def test_citation_filter_policies() -> None:
+    assert "".join(_run(CitationStreamFilter(allowed=set(), policy="off"), ["a [S", "3]"])) == "a [S3]"
+    strict = CitationStreamFilter(allowed={"S1"}, policy="strict")
+    assert strict.feed("fine [S1] then [S") == "fine [S1] then "
+    with pytest.raises(ValueError):
+        strict.feed("4]")
+
+@pytest.fixture
+def service(monkeypatch: pytest.MonkeyPatch, make_keyword_embedder: MakeEmbedder) -> Iterator[ChatService]:
+    pieces = ["Cats ", "purr [S", "1][S", "7]."]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        if body.get("stream"):
+            return httpx.Response(200, content=_sse_body(pieces), headers={"Content-Type": "text/event-stream"})
+        return httpx.Response(200, json={"choices": [{"message": {"content": "".join(pieces)}}]})
+
+    monkeypatch.setattr(httpx, "Client", partial(httpx.Client, transport=httpx.MockTransport(handler)))
+    client = QdrantClient(":memory:")
+    ensure_collection(client, CollectionSpec(name="pets", vector_size=2))
+    embedder = make_keyword_embedder(("cat", "dog"))
+    texts = ["cats purr", "dogs bark"]
+    upsert_embedded_chunks(client, "pets", [
+        {"doc_id": "pets", "chunk_index": i, "vector": v.tolist(), "payload": {"text": t}}
+        for i, (t, v) in enumerate(zip(texts, embedder.embed_array(texts)))
+    ])
+    llm = OpenAICompatibleClient(base_url="http://llm.test/v1", api_key="k", model="m")
+    yield ChatService(
+        retriever=Retriever(qdrant=client, embedder=embedder, collection_name="pets"),
+        prompt_builder=PromptBuilder(),
+        llm=llm,
+    )
+    llm.close()
+
+def test_chat_stream_matches_chat(service: ChatService) -> None:
+    events = list(service.chat_stream(question="what do cats do?", top_k=1))
+    assert [e.type for e in events[:2]] == ["sources", "delta"] and events[-1].type == "done"
+    assert [s["label"] for s in events[0].sources] == ["S1"]
+    streamed = "".join(e.text for e in events if e.type == "delta")
+    assert streamed == "Cats purr [S1]."
+    assert "[S7" not in "".join(e.text for e in events)
+
+    result = events[-1].result
+    assert result is not None and result == service.chat(question="what do cats do?", top_k=1)
+    assert result.invalid_citations == ["S7"]
+
+def test_chat_stream_endpoint(service: ChatService, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("OPENAI_BASE_URL", raising=False)
+    monkeypatch.setattr(api.app.state, "chat_service", service, raising=False)
+    with TestClient(api.app) as http:
+        r = http.post("/chat/stream", json={"question": "what do cats do?", "top_k": 1})
+    assert r.status_code == 200 and r.headers["content-type"].startswith("text/event-stream")
+    events = [
+        (block.split("\n")[0].removeprefix("event: "), json.loads(block.split("\n")[1].removeprefix("data: ")))
+        for block in r.text.strip().split("\n\n")
+    ]
+    assert events[0][0] == "sources" and events[-1] == ("done", {"retrieved": 1, "invalid_citations": ["S7"]})
+    assert "".join(d["text"] for name, d in events if name == "delta") == "Cats purr [S1]."
+
+def test_chat_stream_records_llm_metrics_when_cut_short(service: ChatService) -> None:
+    count, errors = STAGE_SECONDS.count(stage="llm_stream"), STAGE_ERRORS.value(stage="llm_stream")
+    events = service.chat_stream(question="what do cats do?", top_k=1)
+    assert [next(events).type, next(events).type] == ["sources", "delta"]
+    events.close()  # e.g. the HTTP client disconnected
+    assert STAGE_SECONDS.count(stage="llm_stream") == count + 1
+    assert STAGE_ERRORS.value(stage="llm_stream") == errors
+
+def test_llm_stream_error_is_counted(monkeypatch: pytest.MonkeyPatch) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(503, json={"error": "overloaded"})
+
+    monkeypatch.setattr(httpx, "Client", partial(httpx.Client, transport=httpx.MockTransport(handler)))
+    count, errors = STAGE_SECONDS.count(stage="llm_stream"), STAGE_ERRORS.value(stage="llm_stream")
+    with OpenAICompatibleClient(base_url="http://llm.test/v1", api_key="k", model="m") as llm:
+        with pytest.raises(httpx.HTTPStatusError):
+            list(llm.chat_stream([{"role": "user", "content": "hi"}]))
+    assert STAGE_SECONDS.count(stage="llm_stream") == count + 1
+    assert STAGE_ERRORS.value(stage="llm_stream") == errors + 1
@@ -0,0 +1,32 @@
+import tiktoken
+
+from services.ingest.chunk import chunk_many, chunk_rawdoc
+from services.ingest.chunk.tokenizer import _TikTok, get_tokenizer, register_tokenizer
+from services.ingest.pdf_reader import PageText, RawDoc
+
+def _register_byte_tokenizer() -> str:
+    ranks = {bytes([i]): i for i in range(256)}
+    ranks.update({b"word": 256, b" word": 257})
+    enc = tiktoken.Encoding("test_batch_bytes", pat_str=r"\S+|\s+", mergeable_ranks=ranks, special_tokens={})
+    register_tokenizer(_TikTok(enc, "test_batch_bytes"))
+    return "test_batch_bytes"
+
+def _doc(doc_id: str, n_pages: int) -> RawDoc:
+    pages = [PageText(page_no=i, raw_text="", text=f"{doc_id} page {i} " + "word " * 30) for i in range(1, n_pages + 1)]
+    return RawDoc(
+        doc_id=doc_id, source_type="pdf", source_value=f"{doc_id}.pdf", mime="application/pdf",
+        fetched_at="", content_hash="", meta={}, pages=pages,
+    )
+
+def test_registry_returns_cached_instance() -> None:
+    name = _register_byte_tokenizer()
+    assert get_tokenizer(name) is get_tokenizer(name)
+
+def test_chunk_many_matches_chunk_rawdoc() -> None:
+    name = _register_byte_tokenizer()
+    docs = [_doc("a", 3), _doc("b", 1), _doc("c", 7)]
+
+    batched = chunk_many(docs, tokenizer_name=name, chunk_size=64, overlap=16)
+
+    assert batched == [chunk_rawdoc(d, tokenizer_name=name, chunk_size=64, overlap=16) for d in docs]
+    assert [d.doc_id for d in batched] == ["a", "b", "c"]
@@ -0,0 +1,56 @@
+from pathlib import Path
+from typing import Any, Callable, List
+
+from qdrant_client import QdrantClient
+
+from services.ingest.chunk.models import Chunk, ChunkedDoc
+from services.ingest.embed.adapters import embed_chunked_doc
+from services.ingest.index import (
+    ChunkTextStore, CollectionSpec, bulk_upsert, delete_chunks, ensure_collection, make_point_id,
+    upsert_embedded_chunks,
+)
+from services.retriever import RetrievalQuery, Retriever
+
+MakeEmbedder = Callable[..., Any]
+
+def _doc(doc_id: str, texts: List[str]) -> ChunkedDoc:
+    chunks = [
+        Chunk(doc_id=doc_id, chunk_index=i, text=t, token_count=3,
+              char_start=0, char_end=len(t), page_start=1, page_end=1)
+        for i, t in enumerate(texts)
+    ]
+    return ChunkedDoc(doc_id=doc_id, chunks=chunks, chunk_size=800, chunk_overlap=160, tokenizer_name="cl100k_base")
+
+def test_store_roundtrip_and_delete(tmp_path: Path) -> None:
+    with ChunkTextStore(tmp_path / "chunks.sqlite") as store:
+        store.put_many([("a", 0, "first"), ("a", 1, "second"), ("b", 0, "other")])
+        store.put_many([("a", 1, "second v2")])
+        ids = [make_point_id("a", 0), make_point_id("a", 1), make_point_id("zzz", 9)]
+        assert store.get_many(ids) == {ids[0]: "first", ids[1]: "second v2"}
+
+        store.delete("a", range(2))
+        assert len(store) == 1
+
+def test_upsert_moves_text_out_of_payload_and_retriever_restores_it(
+        tmp_path: Path, make_keyword_embedder: MakeEmbedder,
+) -> None:
+    client = QdrantClient(":memory:")
+    ensure_collection(client, CollectionSpec(name="slim", vector_size=3))
+    store = ChunkTextStore(tmp_path / "chunks.sqlite")
+    embedder = make_keyword_embedder()
+
+    upsert_embedded_chunks(
+        client, "slim", embed_chunked_doc(embedder, _doc("pets", ["cats purr", "dogs bark"])), text_store=store
+    )
+    bulk_upsert(client, "slim", embed_chunked_doc(embedder, _doc("food", ["pizza slices"])), text_store=store)
+
+    points, _ = client.scroll("slim", with_payload=True)
+    assert len(points) == 3 and all("text" not in (p.payload or {}) for p in points)
+    assert len(store) == 3
+
+    retriever = Retriever(qdrant=client, embedder=embedder, collection_name="slim", text_store=store)
+    hits = retriever.retrieve(RetrievalQuery(text="a dog", top_k=1))
+    assert [(h.doc_id, h.chunk_index, h.text) for h in hits] == [("pets", 1, "dogs bark")]
+
+    delete_chunks(client, "slim", "pets", range(2), text_store=store)
+    assert len(store) == 1
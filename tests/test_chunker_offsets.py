@@ -0,0 +1,51 @@
+import tiktoken
+import pytest
+
+import services.ingest.chunk.chunker as chunker
+from services.ingest.chunk.chunker import _token_char_offsets, chunk_rawdoc, make_chunks_fixed
+from services.ingest.chunk.pager import char_span_to_page_span, concat_pages
+from services.ingest.chunk.tokenizer import _TikTok
+from services.ingest.pdf_reader import PageText, RawDoc
+
+def byte_level_tokenizer() -> _TikTok:
+    # Small offline BPE with multi-byte and partial-character tokens
+    ranks = {bytes([i]): i for i in range(256)}
+    ranks.update({b"ab": 256, "é".encode(): 257, "€".encode()[:2]: 258, b"word": 259, b" word": 260})
+    enc = tiktoken.Encoding("test_bytes", pat_str=r"\S+|\s+", mergeable_ranks=ranks, special_tokens={})
+    return _TikTok(enc, "test_bytes")
+
+def test_offsets_match_tiktoken_decode_with_offsets() -> None:
+    tok = byte_level_tokenizer()
+    text = "ab é €uro ab naïve 漢字 word word"
+    tokens = tok.encode(text)
+
+    starts, ends = _token_char_offsets(tokens, tok, text)
+
+    _, expected = tok._enc.decode_with_offsets(tokens)  # type: ignore[attr-defined]
+    assert starts[:-1].tolist() == expected
+    assert starts[-1] == ends[-1] == len(text)
+    assert all(s <= e for s, e in zip(starts.tolist(), ends.tolist()))
+
+def test_window_text_is_slice_of_full_text() -> None:
+    tok = byte_level_tokenizer()
+    text = " ".join(f"word{i} é€" for i in range(400))
+
+    for c_start, c_end, snippet, _ in make_chunks_fixed(text, tok, chunk_size=120, overlap=30):
+        assert snippet == text[c_start:c_end][: chunker.MAX_CHARS]
+
+def test_chunk_pages_match_linear_scan(monkeypatch: pytest.MonkeyPatch) -> None:
+    tok = byte_level_tokenizer()
+    monkeypatch.setattr(chunker, "get_tokenizer", lambda name: tok)
+    pages = [PageText(page_no=i, raw_text="", text=f"page {i} " + "word " * (40 + i)) for i in range(1, 30)]
+    raw = RawDoc(
+        doc_id="d", source_type="pdf", source_value="d.pdf", mime="application/pdf",
+        fetched_at="", content_hash="", meta={}, pages=pages,
+    )
+
+    doc = chunk_rawdoc(raw, tokenizer_name="test_bytes", chunk_size=64, overlap=16)
+
+    _, spans = concat_pages(pages)
+    for c in doc.chunks:
+        brute = [i for i, (s, e) in enumerate(spans, start=1) if not (c.char_end <= s or c.char_start >= e)]
+        assert (c.page_start, c.page_end) == (brute[0], brute[-1])
+        assert (c.page_start, c.page_end) == char_span_to_page_span(c.char_start, c.char_end, spans)
@@ -0,0 +1,148 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional
+
+import pytest
+from fastapi.testclient import TestClient
+
+from services.api.app import main as api
+from services.api.app.coalesce import SingleFlight
+from services.chat.chat_service import ChatResult
+
+def test_do_shares_one_execution() -> None:
+    flight: SingleFlight[int] = SingleFlight()
+    runs: List[int] = []
+    start = threading.Barrier(8)
+
+    def work() -> int:
+        runs.append(1)
+        time.sleep(0.2)
+        return 42
+
+    def call(_: int) -> int:
+        start.wait()
+        return flight.do(("q", 5, None), work)
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(call, range(8)))
+    assert results == [42] * 8 and len(runs) == 1
+    assert flight.stats() == {"enabled": 1, "calls": 8, "executions": 1, "coalesced": 7, "in_flight": 0}
+
+    # Finished calls are not cached
+    assert flight.do(("q", 5, None), work) == 42 and len(runs) == 2
+
+def test_do_shares_errors_and_can_be_disabled() -> None:
+    flight: SingleFlight[int] = SingleFlight()
+    gate = threading.Event()
+
+    def boom() -> int:
+        gate.wait(1)
+        raise RuntimeError("llm down")
+
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(flight.do, "k", boom)
+        while flight.in_flight() == 0:
+            time.sleep(0.001)
+        follower = pool.submit(flight.do, "k", lambda: 0)
+        while flight.stats()["coalesced"] == 0:
+            time.sleep(0.001)
+        gate.set()
+        for f in (leader, follower):
+            with pytest.raises(RuntimeError):
+                f.result()
+
+    off: SingleFlight[int] = SingleFlight(enabled=False)
+    assert [off.do("k", lambda: 1) for _ in range(3)] == [1, 1, 1]
+    assert off.stats()["executions"] == 3 and off.stats()["coalesced"] == 0
+
+def test_ado_coalesces_and_survives_waiter_cancellation() -> None:
+    flight: SingleFlight[str] = SingleFlight()
+    runs: List[int] = []
+
+    async def work() -> str:
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def run() -> List[str]:
+        first = asyncio.create_task(flight.ado("k", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await asyncio.gather(*(flight.ado("k", work) for _ in range(10)))
+
+    assert asyncio.run(run()) == ["done"] * 10
+    assert len(runs) == 1 and flight.stats()["coalesced"] == 10
+
+class _SlowChat:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def achat(self, *, question: str, top_k: int = 5, doc_id: Optional[str] = None) -> ChatResult:
+        self.calls += 1
+        await asyncio.sleep(0.3)
+        return ChatResult(answer=f"answer to {question}", sources=[], retrived=0)
+
+def test_chat_endpoint_coalesces_identical_questions(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("COALESCE_ENDPOINTS", "chat")
+    monkeypatch.delenv("QDRANT_COLLECTION", raising=False)
+    service = _SlowChat()
+    monkeypatch.setattr(api.app.state, "chat_service", service, raising=False)
+    monkeypatch.setattr(api.app.state, "single_flight", None, raising=False)
+
+    with TestClient(api.app) as http:
+        def ask(i: int) -> Any:
+            question = "What   is RAG?" if i % 2 else "What is RAG?"
+            return http.post("/chat", json={"question": question, "top_k": 3}).json()
+
+        with ThreadPoolExecutor(6) as pool:
+            answers = list(pool.map(ask, range(6)))
+        stats = http.get("/coalescing").json()
+
+    assert service.calls == 1
+    assert len({a["answer"] for a in answers}) == 1  # whichever spelling arrived first
+    assert stats["chat"]["calls"] == 6 and stats["chat"]["coalesced"] == 5
+    assert stats["retrieve"]["enabled"] == 0
+
+class _BlockingChat:
+    """achat that stays in flight until `release` is set, counting how many are waiting."""
+
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self.release = threading.Event()
+
+    async def achat(self, *, question: str, top_k: int = 5, doc_id: Optional[str] = None) -> ChatResult:
+        self.in_flight += 1
+        while not self.release.is_set():
+            await asyncio.sleep(0.01)
+        return ChatResult(answer=question, sources=[], retrived=0)
+
+def test_chat_burst_does_not_block_other_requests(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("QDRANT_COLLECTION", raising=False)
+    service = _BlockingChat()
+    monkeypatch.setattr(api.app.state, "chat_service", service, raising=False)
+    monkeypatch.setattr(api.app.state, "single_flight", None, raising=False)
+    burst = 50  # more than the 40 threads FastAPI runs sync endpoints on
+
+    with TestClient(api.app) as http, ThreadPoolExecutor(burst) as pool:
+        futures = [
+            pool.submit(http.post, "/chat", json={"question": f"question {i}?"}) for i in range(burst)
+        ]
+        try:
+            deadline = time.monotonic() + 5
+            while service.in_flight < burst and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert service.in_flight == burst  # all held at once, none waiting for a thread
+
+            t0 = time.monotonic()
+            assert http.get("/health").json() == {"status": "ok"}
+            assert time.monotonic() - t0 < 1.0
+        finally:
+            service.release.set()
+        assert sorted(f.result().json()["answer"] for f in futures) == sorted(f"question {i}?" for i in range(burst))
+
+def test_unknown_endpoint_in_config(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("COALESCE_ENDPOINTS", "chat,search")
+    with pytest.raises(ValueError):
+        api.coalescing_from_env()
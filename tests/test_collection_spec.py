@@ -0,0 +1,126 @@
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.models import HnswConfig, ScalarQuantization, ScalarQuantizationConfig, ScalarType
+
+from services.ingest.index import (
+    CollectionSpec, HnswSpec, OptimizerSpec, QuantizationSpec, collection_drift, ensure_collection, search_params,
+)
+
+SPEC = CollectionSpec(
+    name="tuned",
+    vector_size=4,
+    quantization=QuantizationSpec(kind="scalar", quantile=0.95, oversampling=3.0),
+    hnsw=HnswSpec(m=32, ef_construct=200),
+    optimizers=OptimizerSpec(indexing_threshold=50_000),
+    vectors_on_disk=True,
+    payload_on_disk=True,
+)
+
+class ServerLikeClient:
+    """Local client whose get_collection reports `overrides`, standing in for a server that stores the config."""
+
+    init_options: Dict[str, Any] = {"location": None, "url": "http://qdrant.test:6333", "path": None}
+
+    def __init__(self) -> None:
+        self._inner = QdrantClient(":memory:")
+        self.created: Dict[str, Any] = {}
+        self.updated: Dict[str, Any] = {}
+        self.overrides: Dict[str, Any] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._inner, name)
+
+    def create_collection(self, **kwargs: Any) -> Any:
+        self.created = kwargs
+        return self._inner.create_collection(**kwargs)
+
+    def update_collection(self, **kwargs: Any) -> bool:
+        self.updated = kwargs
+        return True
+
+    def get_collection(self, collection_name: str) -> Any:
+        info = self._inner.get_collection(collection_name)
+        config = info.config
+        params = config.params.model_copy(update={"on_disk_payload": True})
+        update = {"params": params, **self.overrides}
+        return info.model_copy(update={"config": config.model_copy(update=update)})
+
+def _matching_overrides() -> Dict[str, Any]:
+    return {
+        "hnsw_config": HnswConfig(m=32, ef_construct=200, full_scan_threshold=10_000),
+        "quantization_config": ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.95, always_ram=True)
+        ),
+    }
+
+def _with_indexing_threshold(client: ServerLikeClient, value: int) -> None:
+    opt = client._inner.get_collection("tuned").config.optimizer_config.model_copy(update={"indexing_threshold": value})
+    client.overrides["optimizer_config"] = opt
+
+def test_create_passes_storage_options() -> None:
+    client = ServerLikeClient()
+    ensure_collection(client, SPEC)
+
+    created = client.created
+    assert created["vectors_config"].on_disk is True
+    assert created["on_disk_payload"] is True
+    assert (created["hnsw_config"].m, created["hnsw_config"].ef_construct) == (32, 200)
+    assert created["optimizers_config"].indexing_threshold == 50_000
+    assert created["quantization_config"].scalar.quantile == 0.95
+
+def test_matching_collection_has_no_drift() -> None:
+    client = ServerLikeClient()
+    ensure_collection(client, SPEC)
+    client.overrides = _matching_overrides()
+    _with_indexing_threshold(client, 50_000)
+
+    assert collection_drift(client, SPEC) == []
+    ensure_collection(client, SPEC)  # no error
+
+def test_drift_is_reported_and_can_be_updated() -> None:
+    client = ServerLikeClient()
+    ensure_collection(client, SPEC)
+    client.overrides = _matching_overrides()
+    _with_indexing_threshold(client, 20_000)
+    client.overrides["hnsw_config"] = HnswConfig(m=16, ef_construct=200, full_scan_threshold=10_000)
+
+    diffs: List[str] = collection_drift(client, SPEC)
+    assert [d.split(":")[0] for d in diffs] == ["hnsw.m", "optimizers.indexing_threshold"]
+    with pytest.raises(ValueError, match="hnsw.m"):
+        ensure_collection(client, SPEC)
+
+    ensure_collection(client, SPEC, on_drift="update")
+    assert client.updated["hnsw_config"].m == 32
+    assert client.updated["optimizers_config"].indexing_threshold == 50_000
+
+def test_vector_size_drift_cannot_be_updated() -> None:
+    client = ServerLikeClient()
+    ensure_collection(client, SPEC)
+    client.overrides = _matching_overrides()
+    _with_indexing_threshold(client, 50_000)
+
+    with pytest.raises(ValueError, match="vector_size"):
+        ensure_collection(client, CollectionSpec(name="tuned", vector_size=8), on_drift="update")
+
+def test_local_mode_rerun_with_tuned_spec(tmp_path: Path) -> None:
+    # In-process Qdrant drops hnsw/optimizer/quantization settings; re-running ingest must not fail on that
+    for client in (QdrantClient(":memory:"), QdrantClient(path=str(tmp_path))):
+        ensure_collection(client, SPEC)
+        assert collection_drift(client, SPEC) == []
+        ensure_collection(client, SPEC)
+
+        # What local mode does keep is still checked
+        with pytest.raises(ValueError, match="vectors_on_disk"):
+            ensure_collection(client, replace(SPEC, vectors_on_disk=False))
+        client.close()
+
+def test_search_params() -> None:
+    assert search_params() is None
+    p = search_params(hnsw_ef=128, quantization=SPEC.quantization)
+    assert p is not None and p.hnsw_ef == 128
+    assert p.quantization is not None and (p.quantization.rescore, p.quantization.oversampling) == (True, 3.0)
+    assert search_params(rescore=False).quantization.rescore is False  # type: ignore[union-attr]
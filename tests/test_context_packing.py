@@ -0,0 +1,104 @@
+from typing import List, Optional
+
+import pytest
+import tiktoken
+
+from services.chat.prompt_builder import PromptBuilder, merge_chunk_spans
+from services.ingest.chunk.tokenizer import _TikTok, get_tokenizer, register_tokenizer
+from services.retriever.models import RetrievedChunk
+from services.retriever.retriever import _hits_to_chunks
+
+TOKENIZER = "test_packing_bytes"
+
+@pytest.fixture(autouse=True, scope="module")
+def byte_tokenizer() -> None:
+    # One token per byte, so budgets are easy to reason about (no download needed)
+    ranks = {bytes([i]): i for i in range(256)}
+    enc = tiktoken.Encoding(TOKENIZER, pat_str=r"\S+|\s+", mergeable_ranks=ranks, special_tokens={})
+    register_tokenizer(_TikTok(enc, TOKENIZER))
+
+DOC = " ".join(f"word{i:03d}" for i in range(60))  # 479 chars
+
+def _chunk(
+        i: int, start: int, end: int, score: float, *, doc_id: str = "a", offsets: bool = True,
+        text: Optional[str] = None,
+) -> RetrievedChunk:
+    return RetrievedChunk(
+        doc_id=doc_id,
+        chunk_index=i,
+        text=f"[Pages 1-1] {DOC[start:end] if text is None else text}",
+        score=score,
+        page_start=1,
+        page_end=2 if i > 2 else 1,
+        char_start=start if offsets else None,
+        char_end=end if offsets else None,
+    )
+
+def test_merges_overlapping_and_touching_chunks_by_offsets() -> None:
+    chunks = [
+        _chunk(1, 80, 200, 0.9),
+        _chunk(0, 0, 120, 0.5),
+        _chunk(2, 200, 280, 0.4),   # touches chunk 1
+        _chunk(4, 360, 479, 0.8),   # gap before it
+        _chunk(1, 80, 200, 0.3),    # duplicate hit
+        _chunk(0, 0, 50, 0.7, doc_id="b"),
+    ]
+    spans = merge_chunk_spans(chunks)
+    assert [(sp.doc_id, sp.chunk_indices) for sp in spans] == [("a", [0, 1, 2]), ("a", [4]), ("b", [0])]
+    assert spans[0].body == DOC[0:280] and spans[0].score == 0.9 and spans[0].page_end == 1
+    assert spans[1].body == DOC[360:479] and spans[1].page_end == 2
+
+def test_merges_adjacent_chunks_by_text_without_offsets() -> None:
+    chunks = [_chunk(0, 0, 150, 0.5, offsets=False), _chunk(1, 100, 260, 0.6, offsets=False)]
+    (span,) = merge_chunk_spans(chunks)
+    assert span.body == DOC[0:260] and span.chunk_indices == [0, 1]
+
+    # Not adjacent by index: kept apart even though the text overlaps
+    apart = merge_chunk_spans([_chunk(0, 0, 150, 0.5, offsets=False), _chunk(2, 100, 260, 0.6, offsets=False)])
+    assert len(apart) == 2
+
+def test_truncated_chunk_text_is_not_treated_as_contiguous() -> None:
+    cut = _chunk(0, 0, 200, 0.5, text=DOC[0:100])  # text cut at ingest: covers chars 0-100 only
+    spans = merge_chunk_spans([cut, _chunk(1, 150, 260, 0.4)])
+    assert [sp.chunk_indices for sp in spans] == [[0], [1]]
+
+def test_token_budget_fills_by_score_with_consistent_labels() -> None:
+    chunks = [
+        _chunk(0, 0, 120, 0.5),
+        _chunk(1, 80, 200, 0.6),            # merges with 0 -> 200 chars, score 0.6
+        _chunk(5, 400, 479, 0.9),           # 79 chars
+        _chunk(0, 0, 150, 0.7, doc_id="b"), # 150 chars
+    ]
+    builder = PromptBuilder(max_context_tokens=330, tokenizer_name=TOKENIZER)
+    art = builder.build("q?", chunks)
+    context = art.messages[1]["content"].split("Context:\n", 1)[1].split("\n\nQuestion:", 1)[0]
+
+    # Best first: a/5 (~120 tokens) and b/0 (~190) fit; the merged a/0-1 span (~240) does not
+    assert [(s["label"], s["doc_id"], s["chunk_indices"]) for s in art.sources] == [
+        ("S1", "a", [5]), ("S2", "b", [0])
+    ]
+    assert context.startswith("[S1] doc_id=a chunk=5 pages=1-2") and "\n\n[S2] doc_id=b chunk=0" in context
+    assert len(get_tokenizer(TOKENIZER).encode(context)) <= 330
+    assert "[Pages" not in context
+
+    roomy = PromptBuilder(max_context_tokens=2000, tokenizer_name=TOKENIZER).build("q?", chunks)
+    assert [s["chunk_indices"] for s in roomy.sources] == [[5], [0], [0, 1]]
+    assert "[S3] doc_id=a chunks=0-1 pages=1-1\n" + DOC[0:200].strip() in roomy.messages[1]["content"]
+
+def test_oversized_best_span_is_truncated() -> None:
+    art = PromptBuilder(max_context_tokens=60, tokenizer_name=TOKENIZER).build("q?", [_chunk(0, 0, 479, 1.0)])
+    context = art.messages[1]["content"].split("Context:\n", 1)[1].split("\n\nQuestion:", 1)[0]
+    assert [s["label"] for s in art.sources] == ["S1"]
+    assert context.startswith("[S1] doc_id=a chunk=0") and len(context) <= 60
+
+def test_retrieved_chunks_carry_offsets_from_payload() -> None:
+    hits = [{"id": "p", "score": 0.5, "payload": {"doc_id": "a", "chunk_index": 3, "text": "t",
+                                                   "char_start": 10, "char_end": 42}}]
+    (c,) = _hits_to_chunks(hits, None)
+    assert (c.char_start, c.char_end) == (10, 42)
+
+def test_char_mode_is_unchanged() -> None:
+    chunks: List[RetrievedChunk] = [_chunk(0, 0, 120, 0.5), _chunk(1, 80, 200, 0.6)]
+    art = PromptBuilder().build("q?", chunks)
+    assert [s["label"] for s in art.sources] == ["S1", "S2"]
+    assert "[Pages 1-1]" in art.messages[1]["content"]
@@ -0,0 +1,49 @@
+from typing import List, cast
+
+import numpy as np
+import numpy.typing as npt
+from qdrant_client import QdrantClient
+
+from services.ingest.chunk.models import Chunk, ChunkedDoc
+from services.ingest.embed.adapters import embed_chunked_doc
+from services.ingest.index import CollectionSpec, ensure_collection, search, upsert_embedded_chunks
+
+class AxisEmbedder:
+    model_name = "fake/axis"
+    dimension = 3
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        return cast(List[List[float]], self.embed_array(texts).tolist())
+
+    def embed_array(self, texts: List[str]) -> npt.NDArray[np.float32]:
+        out = np.zeros((len(texts), 3), dtype=np.float32)
+        out[np.arange(len(texts)), np.arange(len(texts)) % 3] = 1.0
+        return out
+
+def _doc() -> ChunkedDoc:
+    chunks = [
+        Chunk(doc_id="demo", chunk_index=i, text=f"chunk {i}", token_count=2,
+              char_start=0, char_end=7, page_start=1, page_end=1)
+        for i in range(5)
+    ]
+    return ChunkedDoc(doc_id="demo", chunks=chunks, chunk_size=800, chunk_overlap=160, tokenizer_name="cl100k_base")
+
+def test_embed_chunked_doc_returns_contiguous_matrix() -> None:
+    result = embed_chunked_doc(AxisEmbedder(), _doc())
+
+    assert result.matrix.shape == (5, 3)
+    assert result.matrix.dtype == np.float32 and result.matrix.flags.c_contiguous
+    assert result.chunk_indices == [0, 1, 2, 3, 4]
+    assert result.payload(2)["text"] == "chunk 2"
+    assert result.vectors[1].vector == [0.0, 1.0, 0.0]
+
+def test_upsert_accepts_batch_result() -> None:
+    client = QdrantClient(":memory:")
+    ensure_collection(client, CollectionSpec(name="array_upsert", vector_size=3))
+
+    n = upsert_embedded_chunks(client, "array_upsert", embed_chunked_doc(AxisEmbedder(), _doc()), batch_size=2)
+
+    assert n == 5
+    hits = search(client, "array_upsert", [0.0, 0.0, 1.0], top_k=5)
+    assert {h["payload"]["chunk_index"] for h in hits if h["score"] > 0.99} == {2}
+    assert all(h["payload"]["doc_id"] == "demo" for h in hits)
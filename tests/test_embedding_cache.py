@@ -0,0 +1,70 @@
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import numpy.typing as npt
+
+from services.ingest.embed.cache import CachedEmbedder, EmbeddingStore, text_key
+from services.ingest.embed.factory import cache_variant
+
+class CountingEmbedder:
+    model_name = "fake/model"
+    dimension = 4
+
+    def __init__(self) -> None:
+        self.seen: List[str] = []
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        self.seen.extend(texts)
+        return [[float(len(t)), float(sum(map(ord, t)) % 97), 1.0, 0.0] for t in texts]
+
+    def embed_array(self, texts: List[str]) -> npt.NDArray[np.float32]:
+        return np.asarray(self.embed_texts(texts), dtype=np.float32).reshape(len(texts), self.dimension)
+
+def test_only_misses_reach_the_model(tmp_path: Path) -> None:
+    inner = CountingEmbedder()
+    cached = CachedEmbedder(inner, cache_dir=tmp_path, normalize=True, max_length=512)
+
+    first = cached.embed_texts(["alpha", "beta", "alpha"])
+    second = cached.embed_texts(["beta", "gamma", "alpha"])
+
+    assert inner.seen == ["alpha", "beta", "gamma"]
+    assert first == inner.embed_texts(["alpha", "beta", "alpha"])
+    assert second == inner.embed_texts(["beta", "gamma", "alpha"])
+    assert (cached.hits, cached.misses) == (3, 3)
+
+def test_cache_persists_and_is_namespaced(tmp_path: Path) -> None:
+    inner = CountingEmbedder()
+    c1 = CachedEmbedder(inner, cache_dir=tmp_path, normalize=True, max_length=512)
+    c1.embed_texts(["persisted text"])
+    c1.close()
+
+    reopened = CachedEmbedder(inner, cache_dir=tmp_path, normalize=True, max_length=512)
+    reopened.embed_texts(["persisted text"])
+    assert inner.seen == ["persisted text"]
+
+    other_settings = CachedEmbedder(inner, cache_dir=tmp_path, normalize=False, max_length=512)
+    other_settings.embed_texts(["persisted text"])
+    assert inner.seen == ["persisted text", "persisted text"]
+
+def test_backend_variants_do_not_share_entries(tmp_path: Path) -> None:
+    inner = CountingEmbedder()
+    for backend, quantize in (("sbert", False), ("sbert-pool", False), ("onnx", False), ("onnx", True)):
+        variant = cache_variant(backend, quantize=quantize)  # type: ignore[arg-type]
+        CachedEmbedder(inner, cache_dir=tmp_path, normalize=True, max_length=512, variant=variant).embed_texts(["t"])
+
+    # sbert and sbert-pool run the same fp32 model; onnx fp32 and int8 each get their own entries
+    assert inner.seen == ["t", "t", "t"]
+    assert sorted(p.name.split("-")[1] for p in tmp_path.iterdir()) == ["onnx", "onnx", "sbert"]
+
+def test_store_evicts_least_recently_used(tmp_path: Path) -> None:
+    store = EmbeddingStore(tmp_path, dim=2, max_entries=3)
+    keys = [text_key(t) for t in ["a", "b", "c"]]
+    store.put_many(keys, np.array([[1, 1], [2, 2], [3, 3]], dtype=np.float32))
+
+    store.get_many([keys[0]])  # "a" becomes most recently used
+    store.put_many([text_key("d")], np.array([[4, 4]], dtype=np.float32))
+
+    assert len(store) == 3
+    assert set(store.get_many(keys + [text_key("d")])) == {keys[0], keys[2], text_key("d")}
+    assert store.get_many([text_key("d")])[text_key("d")].tolist() == [4.0, 4.0]
@@ -0,0 +1,159 @@
+from pathlib import Path
+from typing import Any, Callable, List, cast
+
+import numpy as np
+import numpy.typing as npt
+import pytest
+import tiktoken
+from qdrant_client import QdrantClient
+
+from services.ingest import incremental, pdf_reader
+from services.ingest.chunk.tokenizer import _TikTok, register_tokenizer
+from services.ingest.incremental import ingest_pdf_incremental
+from services.ingest.index import CollectionSpec, ensure_collection
+from services.ingest.manifest import IngestManifest
+
+TOKENIZER = "test_incremental_bytes"
+
+@pytest.fixture(autouse=True, scope="module")
+def byte_tokenizer() -> None:
+    ranks = {bytes([i]): i for i in range(256)}
+    enc = tiktoken.Encoding(TOKENIZER, pat_str=r"\S+|\s+", mergeable_ranks=ranks, special_tokens={})
+    register_tokenizer(_TikTok(enc, TOKENIZER))
+
+class CountingEmbedder:
+    model_name = "fake/count"
+    dimension = 2
+
+    def __init__(self) -> None:
+        self.texts = 0
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        return cast(List[List[float]], self.embed_array(texts).tolist())
+
+    def embed_array(self, texts: List[str]) -> npt.NDArray[np.float32]:
+        self.texts += len(texts)
+        return np.asarray([[float(len(t)), 1.0] for t in texts], dtype=np.float32).reshape(len(texts), 2)
+
+# Chunks under chunker.MIN_CHARS are dropped, so windows are 64 byte-tokens
+LONG = "The quick brown fox jumps over the lazy dog near the river bank today. " * 3
+SHORT = "A much shorter page that still has enough text for one chunk."
+
+def _setup(tmp_path: Path) -> tuple[QdrantClient, IngestManifest, CountingEmbedder]:
+    client = QdrantClient(":memory:")
+    ensure_collection(client, CollectionSpec(name="docs", vector_size=2))
+    return client, IngestManifest(tmp_path / "manifest.sqlite"), CountingEmbedder()
+
+def _ingest(path: Path, client: QdrantClient, manifest: IngestManifest, embedder: CountingEmbedder,
+            **kwargs: Any) -> incremental.IngestOutcome:
+    return ingest_pdf_incremental(
+        path, manifest=manifest, client=client, collection="docs", embedder=embedder,
+        tokenizer_name=TOKENIZER, chunk_size=64, overlap=8, **kwargs,
+    )
+
+def _chunk_indices(client: QdrantClient, doc_id: str) -> List[int]:
+    points, _ = client.scroll("docs", limit=100, with_payload=True)
+    return sorted(p.payload["chunk_index"] for p in points if p.payload and p.payload["doc_id"] == doc_id)
+
+def test_unchanged_file_is_skipped(make_pdf: Callable[..., Path], tmp_path: Path) -> None:
+    client, manifest, embedder = _setup(tmp_path)
+    path = make_pdf([LONG, SHORT])
+
+    first = _ingest(path, client, manifest, embedder)
+    embedded = embedder.texts
+    second = _ingest(path, client, manifest, embedder)
+
+    assert first.status == "added" and first.chunk_count > 1
+    assert second.status == "skipped" and second.chunk_count == first.chunk_count
+    assert embedder.texts == embedded
+    assert client.count("docs").count == first.chunk_count
+
+def test_changed_file_is_reupserted_and_stale_chunks_deleted(
+        make_pdf: Callable[..., Path], tmp_path: Path,
+) -> None:
+    client, manifest, embedder = _setup(tmp_path)
+    path = make_pdf([LONG, LONG])
+    first = _ingest(path, client, manifest, embedder, doc_id="manual")
+    assert _chunk_indices(client, "manual") == list(range(first.chunk_count))
+
+    make_pdf([SHORT])  # same path, shrunk
+    second = _ingest(path, client, manifest, embedder, doc_id="manual")
+
+    assert second.status == "updated" and second.chunk_count < first.chunk_count
+    assert second.deleted_chunks == first.chunk_count - second.chunk_count
+    assert _chunk_indices(client, "manual") == list(range(second.chunk_count))
+    entry = manifest.get("manual")
+    assert entry is not None and entry.chunk_count == second.chunk_count
+
+def test_changed_file_under_default_doc_id_replaces_old_doc(
+        make_pdf: Callable[..., Path], tmp_path: Path,
+) -> None:
+    client, manifest, embedder = _setup(tmp_path)
+    path = make_pdf([LONG])
+    first = _ingest(path, client, manifest, embedder)
+
+    make_pdf([SHORT, LONG])
+    second = _ingest(path, client, manifest, embedder)
+
+    assert second.doc_id != first.doc_id and second.status == "added"
+    assert _chunk_indices(client, first.doc_id) == [] and manifest.get(first.doc_id) is None
+    assert client.count("docs").count == second.chunk_count
+
+def test_manifest_is_updated_only_after_upsert_succeeds(
+        make_pdf: Callable[..., Path], tmp_path: Path, monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    client, manifest, embedder = _setup(tmp_path)
+    path = make_pdf([LONG, LONG])
+    first = _ingest(path, client, manifest, embedder, doc_id="manual")
+    before = manifest.get("manual")
+
+    def failing_upsert(*args: Any, **kwargs: Any) -> int:
+        raise ConnectionError("qdrant unavailable")
+
+    make_pdf([SHORT])
+    monkeypatch.setattr(incremental, "upsert_embedded_chunks", failing_upsert)
+    with pytest.raises(ConnectionError):
+        _ingest(path, client, manifest, embedder, doc_id="manual")
+
+    # Nothing recorded and nothing deleted, so the retry redoes the whole document
+    assert manifest.get("manual") == before
+    assert _chunk_indices(client, "manual") == list(range(first.chunk_count))
+
+    monkeypatch.undo()
+    retry = _ingest(path, client, manifest, embedder, doc_id="manual")
+    assert retry.status == "updated" and retry.deleted_chunks > 0
+
+def test_backend_variant_or_max_chars_change_reembeds(make_pdf: Callable[..., Path], tmp_path: Path) -> None:
+    client, manifest, embedder = _setup(tmp_path)
+    path = make_pdf([LONG])
+    _ingest(path, client, manifest, embedder)
+
+    int8 = CountingEmbedder()
+    int8.variant = "onnx-int8"  # type: ignore[attr-defined]
+    assert _ingest(path, client, manifest, int8).status == "updated" and int8.texts > 0
+    assert _ingest(path, client, manifest, int8).status == "skipped"
+    assert _ingest(path, client, manifest, int8, max_chars=40).status == "updated"
+    entry = manifest.get(_ingest(path, client, manifest, int8, max_chars=40).doc_id)
+    assert entry is not None and (entry.embedding_variant, entry.max_chars) == ("onnx-int8", 40)
+
+def test_document_with_failed_pages_is_retried(
+        make_pdf: Callable[..., Path], tmp_path: Path, monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    client, manifest, embedder = _setup(tmp_path)
+    path = make_pdf([LONG, LONG])
+    real_extract = pdf_reader._extract_page
+
+    def flaky(reader: Any, i: int) -> Any:
+        return (i + 1, "", "", "OSError: transient") if i == 1 else real_extract(reader, i)
+
+    monkeypatch.setattr(pdf_reader, "_extract_page", flaky)
+    first = _ingest(path, client, manifest, embedder, doc_id="manual")
+    entry = manifest.get("manual")
+    assert entry is not None and entry.failed_pages == "2" and not entry.complete
+    # Still failing: not marked up to date, so it is read again
+    assert _ingest(path, client, manifest, embedder, doc_id="manual").status == "updated"
+
+    monkeypatch.undo()
+    fixed = _ingest(path, client, manifest, embedder, doc_id="manual")
+    assert fixed.status == "updated" and fixed.chunk_count > first.chunk_count
+    assert _ingest(path, client, manifest, embedder, doc_id="manual").status == "skipped"
@@ -0,0 +1,82 @@
+from dataclasses import replace
+from pathlib import Path
+
+from qdrant_client import QdrantClient
+
+from services.ingest.index import CollectionSpec, delete_chunks, ensure_collection, upsert_embedded_chunks
+from services.ingest.manifest import IngestManifest, ManifestEntry
+
+ENTRY = ManifestEntry(
+    doc_id="manual",
+    source_value="/data/manual.pdf",
+    content_hash="abc",
+    normalized_hash="def",
+    normalization_version="v1",
+    tokenizer_name="cl100k_base",
+    chunk_size=800,
+    chunk_overlap=160,
+    embedding_model="sentence-transformers/all-MiniLM-L6-v2",
+    chunk_count=3,
+)
+
+def test_manifest_roundtrip_persists(tmp_path: Path) -> None:
+    db = tmp_path / "manifest.sqlite"
+    with IngestManifest(db) as m:
+        m.record(ENTRY)
+        m.record(replace(ENTRY, chunk_count=5))
+
+    with IngestManifest(db) as m:
+        got = m.get("manual")
+        assert got is not None
+        assert got.chunk_count == 5
+        assert got.updated_at
+        assert [e.doc_id for e in m.find_by_source("/data/manual.pdf")] == ["manual"]
+        assert m.get("missing") is None
+
+        m.remove("manual")
+        assert list(m) == []
+
+def test_same_settings_ignores_hashes_but_not_model() -> None:
+    assert ENTRY.same_settings(replace(ENTRY, content_hash="other", chunk_count=9))
+    assert not ENTRY.same_settings(replace(ENTRY, embedding_model="other-model"))
+    assert not ENTRY.same_settings(replace(ENTRY, chunk_overlap=100))
+
+def test_delete_chunks_removes_only_given_indices() -> None:
+    client = QdrantClient(":memory:")
+    ensure_collection(client, CollectionSpec(name="manifest_test", vector_size=2))
+    upsert_embedded_chunks(
+        client,
+        "manifest_test",
+        [{"doc_id": "manual", "chunk_index": i, "vector": [1.0, float(i)]} for i in range(4)],
+    )
+
+    assert delete_chunks(client, "manifest_test", "manual", range(2, 4)) == 2
+
+    points, _ = client.scroll("manifest_test", limit=10, with_payload=True)
+    assert sorted(p.payload["chunk_index"] for p in points if p.payload) == [0, 1]
+
+def test_manifest_from_before_variant_columns_is_migrated(tmp_path: Path) -> None:
+    import sqlite3
+
+    db = tmp_path / "old.sqlite"
+    conn = sqlite3.connect(db)
+    conn.execute(
+        "CREATE TABLE documents (doc_id TEXT PRIMARY KEY, source_value TEXT NOT NULL, content_hash TEXT NOT NULL, "
+        "normalized_hash TEXT NOT NULL, normalization_version TEXT NOT NULL, tokenizer_name TEXT NOT NULL, "
+        "chunk_size INTEGER NOT NULL, chunk_overlap INTEGER NOT NULL, embedding_model TEXT NOT NULL, "
+        "chunk_count INTEGER NOT NULL, updated_at TEXT NOT NULL)"
+    )
+    conn.execute(
+        "INSERT INTO documents VALUES ('manual', '/data/manual.pdf', 'abc', 'def', 'v1', 'cl100k_base', "
+        "800, 160, 'sentence-transformers/all-MiniLM-L6-v2', 3, '2024-01-01T00:00:00+00:00')"
+    )
+    conn.commit()
+    conn.close()
+
+    with IngestManifest(db) as m:
+        old = m.get("manual")
+        assert old is not None and old.embedding_variant == "" and old.complete
+        # The backend it was embedded with is unknown, so it does not count as unchanged
+        assert not old.same_settings(ENTRY)
+        m.record(ENTRY)
+        assert m.get("manual") == replace(ENTRY, updated_at=m.get("manual").updated_at)  # type: ignore[union-attr]
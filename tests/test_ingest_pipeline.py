@@ -0,0 +1,121 @@
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterator, List, cast
+
+import numpy as np
+import numpy.typing as npt
+import tiktoken
+from qdrant_client import QdrantClient
+
+from services.ingest.chunk.tokenizer import _TikTok, register_tokenizer
+from services.ingest.index import CollectionSpec, ensure_collection
+from services.ingest.manifest import IngestManifest
+from services.ingest.pipeline import IngestPipeline, PipelineConfig, PipelineReport, iter_pdf_paths
+
+class LenEmbedder:
+    model_name = "fake/len"
+    dimension = 2
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        return cast(List[List[float]], self.embed_array(texts).tolist())
+
+    def embed_array(self, texts: List[str]) -> npt.NDArray[np.float32]:
+        return np.asarray([[float(len(t)), 1.0] for t in texts], dtype=np.float32).reshape(len(texts), 2)
+
+def _byte_tokenizer() -> str:
+    ranks = {bytes([i]): i for i in range(256)}
+    enc = tiktoken.Encoding("test_pipeline_bytes", pat_str=r"\S+|\s+", mergeable_ranks=ranks, special_tokens={})
+    register_tokenizer(_TikTok(enc, "test_pipeline_bytes"))
+    return "test_pipeline_bytes"
+
+def _client(name: str) -> QdrantClient:
+    client = QdrantClient(":memory:")
+    ensure_collection(client, CollectionSpec(name=name, vector_size=2))
+    return client
+
+def test_pipeline_ingests_all_docs_and_counts(make_pdf: Callable[..., Path], tmp_path: Path) -> None:
+    for i in range(6):
+        make_pdf([f"Document {i} page one.", f"Document {i} page two."], name=f"doc{i}.pdf")
+    (tmp_path / "broken.pdf").write_bytes(b"not a pdf")
+    client = _client("pipe")
+
+    config = PipelineConfig(
+        parse_workers=2, chunk_workers=2, embed_workers=1, upsert_workers=2, queue_size=1,
+        tokenizer_name=_byte_tokenizer(), chunk_size=16, overlap=4,
+    )
+    pipeline = IngestPipeline(client=client, collection="pipe", embedder=LenEmbedder(), config=config)
+    report = pipeline.run(iter_pdf_paths([tmp_path]))
+
+    assert report.docs_done == 6
+    assert report.stages["parse"].units == 12
+    assert report.stages["upsert"].units == report.stages["embed"].units == client.count("pipe").count
+    assert [(f.stage, Path(f.source).name) for f in report.failures] == [("parse", "broken.pdf")]
+    assert report.stages["parse"].errors == 1
+
+def test_pipeline_applies_backpressure(make_pdf: Callable[..., Path]) -> None:
+    path = make_pdf(["Same page."])
+    client = _client("slow")
+    fed = 0
+    lock = threading.Lock()
+
+    def paths() -> Iterator[Path]:
+        nonlocal fed
+        for _ in range(20):
+            with lock:
+                fed += 1
+            yield path
+
+    class SlowUpsert(IngestPipeline):
+        max_ahead = 0
+
+        def _upsert(self, result):  # type: ignore[no-untyped-def]
+            time.sleep(0.01)
+            with lock:
+                done = self.snapshot()["upsert"].docs
+                self.max_ahead = max(self.max_ahead, fed - done)
+            return super()._upsert(result)
+
+    config = PipelineConfig(
+        parse_workers=1, chunk_workers=1, embed_workers=1, upsert_workers=1, queue_size=1,
+        tokenizer_name=_byte_tokenizer(),
+    )
+    pipeline = SlowUpsert(client=client, collection="slow", embedder=LenEmbedder(), config=config)
+    report = pipeline.run(paths())
+
+    assert report.docs_done == 20
+    # One item per queue plus one per worker and the feeder's pending put
+    assert pipeline.max_ahead <= 4 * 2 + 1
+
+def test_pipeline_with_manifest_skips_unchanged_docs(make_pdf: Callable[..., Path], tmp_path: Path) -> None:
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    for i in range(3):
+        make_pdf([f"Document {i} page one.", f"Document {i} page two."], name=f"docs/doc{i}.pdf")
+    client = _client("incr")
+    manifest = IngestManifest(tmp_path / "manifest.sqlite")
+    config = PipelineConfig(parse_workers=2, tokenizer_name=_byte_tokenizer(), chunk_size=16, overlap=4)
+
+    def run() -> PipelineReport:
+        pipeline = IngestPipeline(
+            client=client, collection="incr", embedder=LenEmbedder(), config=config, manifest=manifest
+        )
+        return pipeline.run(iter_pdf_paths([docs]))
+
+    first = run()
+    points = client.count("incr").count
+    assert first.docs_done == 3 and first.skipped == []
+    assert sum(e.chunk_count for e in list(manifest)) == points
+
+    second = run()
+    assert second.docs_done == 0
+    assert sorted(Path(s).name for s in second.skipped) == ["doc0.pdf", "doc1.pdf", "doc2.pdf"]
+    assert client.count("incr").count == points
+
+    make_pdf(["Document 1 is now a single short page."], name="docs/doc1.pdf")
+    third = run()
+    assert third.docs_done == 1 and len(third.skipped) == 2
+    # The old doc_id of doc1.pdf is gone from the index and the manifest
+    assert len(list(manifest)) == 3
+    assert client.count("incr").count == sum(e.chunk_count for e in list(manifest))
+    manifest.close()
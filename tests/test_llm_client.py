@@ -0,0 +1,59 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, Set, Tuple
+
+import pytest
+
+from services.llm.openai_compat import OpenAICompatibleClient
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True
+    peers: Set[Tuple[str, int]] = set()
+
+    def do_POST(self) -> None:
+        _StubHandler.peers.add(self.client_address)
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = json.dumps({"choices": [{"message": {"content": "ok"}}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+@pytest.fixture
+def base_url() -> Iterator[str]:
+    _StubHandler.peers = set()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_sync_calls_reuse_one_connection(base_url: str) -> None:
+    with OpenAICompatibleClient(base_url=base_url, api_key="k", model="m") as llm:
+        for _ in range(5):
+            assert llm.chat([{"role": "user", "content": "hi"}]).text == "ok"
+    assert len(_StubHandler.peers) == 1
+
+    # A closed client reconnects on the next call
+    llm.chat([{"role": "user", "content": "hi"}])
+    llm.close()
+    assert len(_StubHandler.peers) == 2
+
+def test_async_calls_reuse_pool(base_url: str) -> None:
+    async def run() -> None:
+        async with OpenAICompatibleClient(base_url=base_url, api_key="k", model="m", max_connections=2) as llm:
+            replies = await asyncio.gather(*(llm.achat([{"role": "user", "content": "hi"}]) for _ in range(10)))
+            assert {r.text for r in replies} == {"ok"}
+
+    asyncio.run(run())
+    assert len(_StubHandler.peers) <= 2
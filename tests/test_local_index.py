@@ -0,0 +1,177 @@
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+
+from services.ingest.embed.models import EmbedBatchResult
+from services.ingest.index import (
+    CollectionSpec,
+    HnswSpec,
+    LocalIndexClient,
+    OptimizerSpec,
+    QuantizationSpec,
+    bulk_upsert,
+    collection_drift,
+    delete_chunks,
+    ensure_collection,
+    search,
+    search_batch,
+    upsert_embedded_chunks,
+)
+from services.retriever import RetrievalQuery, Retriever
+
+DIM = 8
+
+def _items(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = np.random.default_rng(seed)
+    vecs = rng.standard_normal((n, DIM)).astype(np.float32)
+    return [
+        {
+            "doc_id": f"doc{i % 3}",
+            "chunk_index": i,
+            "vector": v.tolist(),
+            "payload": {"text": f"chunk {i}", "source": "a.pdf" if i % 2 else "b.pdf"},
+        }
+        for i, v in enumerate(vecs)
+    ]
+
+def _load(client: Any, distance: str, items: List[Dict[str, Any]]) -> None:
+    ensure_collection(client, CollectionSpec(name="docs", vector_size=DIM, distance=distance))  # type: ignore[arg-type]
+    upsert_embedded_chunks(client, "docs", items, batch_size=16)
+
+@pytest.mark.parametrize("distance", ["Cosine", "Dot", "Euclid"])
+def test_matches_qdrant_local(tmp_path: Path, distance: str) -> None:
+    items = _items(60)
+    local = LocalIndexClient(tmp_path / "idx")
+    ref = QdrantClient(":memory:")
+    _load(local, distance, items)
+    _load(ref, distance, items)
+
+    q = np.random.default_rng(1).standard_normal(DIM).astype(np.float32).tolist()
+    for filter_eq in (None, {"doc_id": "doc1"}, {"doc_id": "doc2", "source": "a.pdf"}):
+        got = search(local, "docs", q, top_k=5, filter_eq=filter_eq)
+        want = search(ref, "docs", q, top_k=5, filter_eq=filter_eq)
+        assert [h["id"] for h in got] == [h["id"] for h in want]
+        assert np.allclose([h["score"] for h in got], [h["score"] for h in want], atol=1e-4)
+        assert got[0]["payload"] == want[0]["payload"]
+
+def test_search_batch_and_payload_fields(tmp_path: Path) -> None:
+    client = LocalIndexClient(tmp_path / "idx")
+    _load(client, "Cosine", _items(30))
+    qs = [it["vector"] for it in _items(3, seed=5)]
+    batched = search_batch(client, "docs", qs, [2, 4, 1], [None, {"doc_id": "doc0"}, None], payload_fields=["source"])
+    assert [len(r) for r in batched] == [2, 4, 1]
+    assert all(set(h["payload"]) == {"source"} for r in batched for h in r)
+    for q, k, f, r in zip(qs, [2, 4, 1], [None, {"doc_id": "doc0"}, None], batched):
+        assert [h["id"] for h in r] == [h["id"] for h in search(client, "docs", q, top_k=k, filter_eq=f)]
+
+def test_delete_and_reopen(tmp_path: Path) -> None:
+    items = _items(20)
+    client = LocalIndexClient(tmp_path / "idx")
+    _load(client, "Cosine", items)
+    delete_chunks(client, "docs", "doc0", [0, 3, 6])
+    assert client.count("docs").count == 17
+
+    q = items[3]["vector"]
+    before = search(client, "docs", q, top_k=20)
+    assert len(before) == 17 and all(h["payload"]["chunk_index"] not in (0, 3, 6) for h in before)
+    client.close()
+
+    reopened = LocalIndexClient(tmp_path / "idx")
+    assert reopened.collection_exists("docs")
+    assert search(reopened, "docs", q, top_k=20) == before
+
+    # Freed rows are reused by later inserts
+    upsert_embedded_chunks(reopened, "docs", items[:3])
+    assert reopened.count("docs").count == 18
+    assert search(reopened, "docs", items[0]["vector"], top_k=1)[0]["payload"]["chunk_index"] == 0
+    reopened.close()
+
+def test_bulk_upsert_without_wait_and_delete_by_filter(tmp_path: Path) -> None:
+    from qdrant_client.http.models import FieldCondition, Filter, FilterSelector, MatchValue
+
+    client = LocalIndexClient(tmp_path / "idx")
+    ensure_collection(client, CollectionSpec(name="docs", vector_size=DIM))
+    results = [
+        EmbedBatchResult(
+            doc_id=doc_id,
+            model_name="fake",
+            matrix=np.random.default_rng(i).standard_normal((10, DIM)).astype(np.float32),
+            chunk_indices=list(range(10)),
+            payload_columns={"chunk_index": list(range(10)), "text": ["x"] * 10},
+        )
+        for i, doc_id in enumerate(["a", "b"])
+    ]
+    # wait=False ends with a filter-delete barrier, which the local client must accept
+    assert bulk_upsert(client, "docs", results, max_batch_points=4, wait=False, retry_backoff_s=0.0) == 20
+    assert client.count("docs").count == 20
+
+    selector = FilterSelector(filter=Filter(must=[FieldCondition(key="doc_id", match=MatchValue(value="a"))]))
+    client.delete(collection_name="docs", points_selector=selector)
+    assert client.count("docs").count == 10
+    assert {h["payload"]["doc_id"] for h in search(client, "docs", [1.0] * DIM, top_k=20)} == {"b"}
+
+def test_unsupported_filter(tmp_path: Path) -> None:
+    from qdrant_client.http.models import FieldCondition, Filter, MatchAny
+
+    client = LocalIndexClient(tmp_path / "idx")
+    _load(client, "Cosine", _items(4))
+    with pytest.raises(NotImplementedError):
+        client.query_points(
+            collection_name="docs",
+            query=[0.0] * DIM,
+            query_filter=Filter(must=[FieldCondition(key="doc_id", match=MatchAny(any=["doc0"]))]),
+        )
+
+class _FixedEmbedder:
+    model_name = "fake/fixed"
+    dimension = DIM
+
+    def __init__(self, vec: List[float]) -> None:
+        self._vec = np.asarray(vec, dtype=np.float32)
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        return [self._vec.tolist() for _ in texts]
+
+    def embed_array(self, texts: List[str]) -> np.ndarray:
+        return np.tile(self._vec, (len(texts), 1))
+
+def test_retriever_over_local_index(tmp_path: Path) -> None:
+    items = _items(12)
+    client = LocalIndexClient(tmp_path / "idx")
+    _load(client, "Cosine", items)
+    retriever = Retriever(qdrant=client, embedder=_FixedEmbedder(items[7]["vector"]), collection_name="docs")
+
+    chunks = retriever.retrieve(RetrievalQuery(text="anything", top_k=3))
+    assert chunks[0].chunk_index == 7 and chunks[0].text == "chunk 7"
+    many = retriever.retrieve_many([RetrievalQuery(text="anything", top_k=3), RetrievalQuery(text="x", top_k=1)])
+    assert [c.chunk_index for c in many[0]] == [c.chunk_index for c in chunks]
+    assert len(many[1]) == 1
+
+def test_tuned_spec_reruns_without_drift_and_survives_reopen(tmp_path: Path) -> None:
+    spec = CollectionSpec(
+        name="tuned",
+        vector_size=DIM,
+        quantization=QuantizationSpec(kind="scalar", quantile=0.95),
+        hnsw=HnswSpec(m=32, ef_construct=200, on_disk=True),
+        optimizers=OptimizerSpec(indexing_threshold=50_000, default_segment_number=2),
+        vectors_on_disk=True,
+        payload_on_disk=True,
+    )
+    client = LocalIndexClient(tmp_path / "idx")
+    ensure_collection(client, spec)
+    ensure_collection(client, spec)  # idempotent re-run
+    assert collection_drift(client, spec) == []
+
+    changed = replace(spec, hnsw=HnswSpec(m=64))
+    with pytest.raises(ValueError, match="hnsw.m"):
+        ensure_collection(client, changed)
+    ensure_collection(client, changed, on_drift="update")
+    client.close()
+
+    reopened = LocalIndexClient(tmp_path / "idx")
+    assert collection_drift(reopened, changed) == []
+    assert reopened.get_collection("tuned").config.hnsw_config.ef_construct == 200
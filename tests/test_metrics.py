@@ -0,0 +1,127 @@
+import asyncio
+import json
+from functools import partial
+from typing import Any, Callable, Dict
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from qdrant_client import QdrantClient
+
+from services.api.app import main as api
+from services.chat.chat_service import ChatService
+from services.chat.prompt_builder import PromptBuilder
+from services.ingest.index import CollectionSpec, ensure_collection, upsert_embedded_chunks
+from services.llm.openai_compat import OpenAICompatibleClient
+from services.observability import (
+    STAGE_ERRORS,
+    STAGE_SECONDS,
+    MetricsRegistry,
+    collect_timings,
+    stage_timer,
+    timed,
+)
+from services.retriever import Retriever
+
+MakeEmbedder = Callable[..., Any]
+
+def test_histogram_and_counter_render() -> None:
+    reg = MetricsRegistry()
+    h = reg.histogram("t_seconds", "Test latency.", ("stage",), buckets=(0.1, 1.0))
+    c = reg.counter("t_errors_total", "Test errors.", ("stage",))
+    for v in (0.05, 0.1, 0.5, 3.0):
+        h.observe(v, stage="a")
+    c.inc(stage="a")
+    c.inc(2, stage="a")
+
+    text = reg.render()
+    assert "# TYPE t_seconds histogram" in text
+    assert 't_seconds_bucket{stage="a",le="0.1"} 2' in text
+    assert 't_seconds_bucket{stage="a",le="1"} 3' in text
+    assert 't_seconds_bucket{stage="a",le="+Inf"} 4' in text
+    assert 't_seconds_count{stage="a"} 4' in text and 't_seconds_sum{stage="a"} 3.65' in text
+    assert 't_errors_total{stage="a"} 3' in text
+
+    assert reg.counter("t_errors_total", "Same metric.", ("stage",)) is c
+    with pytest.raises(ValueError):
+        reg.histogram("t_errors_total", "Clash.", ("stage",))
+
+def test_timed_sync_async_and_errors() -> None:
+    @timed("test_sync")
+    def ok() -> int:
+        return 1
+
+    @timed("test_async")
+    async def aok() -> int:
+        await asyncio.sleep(0)
+        return 2
+
+    @timed("test_fail")
+    def fail() -> None:
+        raise RuntimeError("x")
+
+    before = STAGE_SECONDS.count(stage="test_sync")
+    assert ok() == 1 and asyncio.run(aok()) == 2
+    with pytest.raises(RuntimeError):
+        fail()
+    assert STAGE_SECONDS.count(stage="test_sync") == before + 1
+    assert STAGE_SECONDS.count(stage="test_async") >= 1
+    assert STAGE_ERRORS.value(stage="test_fail") >= 1
+
+def test_collect_timings_spans_threads() -> None:
+    def in_thread() -> None:
+        with stage_timer("in_thread"):
+            pass
+
+    async def run() -> Dict[str, float]:
+        with collect_timings() as timings:
+            with stage_timer("outer"):
+                await asyncio.to_thread(in_thread)  # runs in a copy of this context
+                with stage_timer("inner"):
+                    pass
+        return timings
+
+    timings = asyncio.run(run())
+    assert set(timings) == {"outer", "inner", "in_thread"}
+    assert timings["outer"] >= timings["inner"]
+    with stage_timer("outside"):
+        pass
+    assert "outside" not in timings
+
+def test_chat_timings_and_metrics_endpoint(monkeypatch: pytest.MonkeyPatch, make_keyword_embedder: MakeEmbedder) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        json.loads(request.content)
+        return httpx.Response(200, json={"choices": [{"message": {"content": "They purr [S1]."}}]})
+
+    monkeypatch.setattr(httpx, "Client", partial(httpx.Client, transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(httpx, "AsyncClient", partial(httpx.AsyncClient, transport=httpx.MockTransport(handler)))
+    client = QdrantClient(":memory:")
+    ensure_collection(client, CollectionSpec(name="pets", vector_size=2))
+    upsert_embedded_chunks(client, "pets", [
+        {"doc_id": "pets", "chunk_index": 0, "vector": [1.0, 0.01], "payload": {"text": "cats purr"}},
+    ])
+    llm = OpenAICompatibleClient(base_url="http://llm.test/v1", api_key="k", model="m")
+    service = ChatService(
+        retriever=Retriever(qdrant=client, embedder=make_keyword_embedder(("cat", "dog")), collection_name="pets"),
+        prompt_builder=PromptBuilder(),
+        llm=llm,
+        include_timings=True,
+    )
+
+    result = service.chat(question="what do cats do?", top_k=1)
+    assert result.timings is not None
+    assert {"chat", "retrieve", "normalize_query", "embed_query", "search", "prompt_build", "llm"} <= set(result.timings)
+    assert result.timings["chat"] >= result.timings["retrieve"] >= result.timings["search"]
+
+    monkeypatch.delenv("QDRANT_COLLECTION", raising=False)
+    monkeypatch.setattr(api.app.state, "chat_service", service, raising=False)
+    monkeypatch.setattr(api.app.state, "single_flight", None, raising=False)
+    with TestClient(api.app) as http:
+        body = http.post("/chat", json={"question": "what do cats do?", "top_k": 1}).json()
+        scrape = http.get("/metrics")
+    llm.close()
+
+    assert body["answer"] == "They purr [S1]." and "llm" in body["timings"]
+    assert scrape.headers["content-type"].startswith("text/plain")
+    assert 'rag_stage_seconds_bucket{stage="llm",le="+Inf"}' in scrape.text
+    assert 'rag_coalesce_calls_total{endpoint="chat"} 1' in scrape.text
@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+from services.ingest.normalize.cleaner import (
+    DEFAULT_PIPELINE,
+    looks_like_code_or_table,
+    nfk_normalize,
+    normalize_text,
+    normalize_texts,
+    normalize_whitespace,
+)
+
+def reference(text: str, *, aggressive: bool = True) -> str:
+    # The step-by-step pipeline normalize_text used to run
+    if not aggressive or looks_like_code_or_table(text):
+        for fn in [nfk_normalize, normalize_whitespace]:
+            text = fn(text)
+        return text
+    for fn in DEFAULT_PIPELINE:
+        text = fn(text)
+    return text
+
+CASES = [
+    "",
+    "\n",
+    "\n\n\n\n",
+    "plain text",
+    "infor-\nmation retrieval",
+    "a-\nb-\nc",
+    "ab-\ncd-\nef",
+    "trailing   \nspaces\t\t\nhere  ",
+    "para one\nstill one\n\n\n\npara two",
+    "\n\n\nleading blanks\n\n\n\n",
+    "- item one\n- item two\nwrapped\n1. first\n2) second",
+    "• bullet\n– dash item\n— em dash line\ncontinued",
+    "“quoted” and it’s\r\nwindows\rmac",
+    "zero\u200bwidth\u00adsoft\ufeffbom\u2060joiner",
+    "ﬁle Ａ\u3000full width",
+    "line\f\nform feed\n \t \nafter",
+    "x –\ny",
+    "{a|b};{c|d};" * 10 + "\n\n\n\ncode-\nlike",
+]
+
+@pytest.mark.parametrize("text", CASES)
+@pytest.mark.parametrize("aggressive", [True, False])
+def test_fused_matches_pipeline_on_cases(text: str, aggressive: bool) -> None:
+    assert normalize_text(text, aggressive=aggressive) == reference(text, aggressive=aggressive)
+
+def test_fused_matches_pipeline_on_random_text() -> None:
+    alphabet = list("ab1_ -.)") + [
+        "\n", "\n", "\r\n", "\r", "\t", "  ", "-\n", "x-\n", "\u200b", "\u00ad", "\f",
+        "•", "–", "—", "“", "”", "’", "*", "1.", "2)", "ﬁ", "é", "e\u0301", "Ａ", "\u3000", "|",
+    ]
+    rng = random.Random(1234)
+    for _ in range(20_000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+        assert normalize_text(text) == reference(text), repr(text)
+        assert normalize_text(text, aggressive=False) == reference(text, aggressive=False), repr(text)
+
+def test_batch_api_matches_single() -> None:
+    assert normalize_texts(CASES) == [normalize_text(t) for t in CASES]
+    assert normalize_texts(CASES, aggressive=False) == [normalize_text(t, aggressive=False) for t in CASES]
@@ -0,0 +1,103 @@
+import json
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pytest
+
+onnx = pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+pytest.importorskip("tokenizers")
+
+from onnx import TensorProto, helper  # noqa: E402
+from tokenizers import Tokenizer, models, pre_tokenizers  # noqa: E402
+
+from services.ingest.embed.onnx_embedder import (  # noqa: E402
+    META_FILE,
+    MODEL_FILE,
+    OnnxEmbedder,
+    default_model_dir,
+)
+
+VOCAB = ["[PAD]", "[UNK]", "hello", "world", "vector", "search", "rag"]
+DIM = 4
+
+
+def write_mean_pool_model(model_dir: Path, table: np.ndarray) -> None:
+    # sentence_embedding = sum(table[ids] * mask) / sum(mask), i.e. sbert mean pooling over an embedding table
+    nodes = [
+        helper.make_node("Gather", ["table", "input_ids"], ["tok"]),
+        helper.make_node("Cast", ["attention_mask"], ["maskf"], to=TensorProto.FLOAT),
+        helper.make_node("Unsqueeze", ["maskf", "axis2"], ["mask3"]),
+        helper.make_node("Mul", ["tok", "mask3"], ["masked"]),
+        helper.make_node("ReduceSum", ["masked", "axis1"], ["summed"], keepdims=0),
+        helper.make_node("ReduceSum", ["mask3", "axis1"], ["count"], keepdims=0),
+        helper.make_node("Div", ["summed", "count"], ["sentence_embedding"]),
+    ]
+    graph = helper.make_graph(
+        nodes,
+        "mean_pool",
+        [
+            helper.make_tensor_value_info("input_ids", TensorProto.INT64, ["batch", "sequence"]),
+            helper.make_tensor_value_info("attention_mask", TensorProto.INT64, ["batch", "sequence"]),
+        ],
+        [helper.make_tensor_value_info("sentence_embedding", TensorProto.FLOAT, ["batch", DIM])],
+        initializer=[
+            helper.make_tensor("table", TensorProto.FLOAT, list(table.shape), table.flatten().tolist()),
+            helper.make_tensor("axis1", TensorProto.INT64, [1], [1]),
+            helper.make_tensor("axis2", TensorProto.INT64, [1], [2]),
+        ],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)], ir_version=8)
+    onnx.save(model, str(model_dir / MODEL_FILE))
+
+    tok = Tokenizer(models.WordLevel({w: i for i, w in enumerate(VOCAB)}, unk_token="[UNK]"))
+    tok.pre_tokenizer = pre_tokenizers.Whitespace()
+    tok.save(str(model_dir / "tokenizer.json"))
+    meta = {"model_name": "fake/mean", "dimension": DIM, "max_seq_length": 3, "pad_token": "[PAD]", "pad_token_id": 0}
+    (model_dir / META_FILE).write_text(json.dumps(meta))
+
+
+def reference(table: np.ndarray, text: str, max_len: int) -> np.ndarray:
+    ids: List[int] = [VOCAB.index(w) if w in VOCAB else 1 for w in text.split()][:max_len]
+    return np.asarray(table[ids].mean(axis=0), dtype=np.float32)
+
+
+def test_onnx_embedder_matches_reference_pooling(tmp_path: Path) -> None:
+    table = np.random.default_rng(0).normal(size=(len(VOCAB), DIM)).astype(np.float32)
+    write_mean_pool_model(tmp_path, table)
+    texts = ["hello world", "rag", "vector search hello world", "unknown words here"]
+
+    raw = OnnxEmbedder("fake/mean", model_dir=tmp_path, normalize=False, batch_size=3)
+    assert (raw.model_name, raw.dimension) == ("fake/mean", DIM)
+    arr = raw.embed_array(texts)
+    expected = np.stack([reference(table, t, max_len=3) for t in texts])
+    assert arr.dtype == np.float32 and arr.shape == (len(texts), DIM)
+    np.testing.assert_allclose(arr, expected, rtol=1e-5, atol=1e-6)
+
+    unit = OnnxEmbedder("fake/mean", model_dir=tmp_path, normalize=True, max_length=2)
+    out = np.asarray(unit.embed_texts(texts))
+    np.testing.assert_allclose(np.linalg.norm(out, axis=1), 1.0, rtol=1e-5)
+    # max_length below the exported limit truncates further
+    first_two = reference(table, "vector search", max_len=2)
+    np.testing.assert_allclose(out[2], first_two / np.linalg.norm(first_two), rtol=1e-5)
+    assert unit.embed_array([]).shape == (0, DIM)
+
+
+def test_default_export_dirs_are_per_precision() -> None:
+    fp32 = default_model_dir("sentence-transformers/all-MiniLM-L6-v2")
+    int8 = default_model_dir("sentence-transformers/all-MiniLM-L6-v2", quantize=True)
+    assert fp32 != int8 and fp32.parent == int8.parent
+    assert int8.name == "sentence-transformers_all-MiniLM-L6-v2-int8"
+
+
+def test_onnx_matches_sbert_cosine(tmp_path: Path) -> None:
+    pytest.importorskip("sentence_transformers")
+    from services.ingest.embed.factory import create_embedder
+
+    texts = ["What is retrieval augmented generation?", "Qdrant stores vectors.", "short"]
+    sbert = create_embedder("sbert").embed_array(texts)
+    for quantize, floor in ((False, 0.999), (True, 0.98)):
+        onnx_arr = create_embedder("onnx", model_dir=tmp_path, quantize=quantize).embed_array(texts)
+        cos = np.sum(sbert * onnx_arr, axis=1)
+        assert cos.min() > floor
@@ -0,0 +1,68 @@
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, List
+
+import pytest
+from pypdf import PdfReader
+
+from services.ingest import pdf_reader
+from services.ingest.normalize.cleaner import normalize_text
+from services.ingest.pdf_reader import load_pdf, load_pdfs
+
+MakePdf = Callable[..., Path]
+
+def test_parallel_load_matches_serial(make_pdf: MakePdf) -> None:
+    texts: List[str] = [f"Page number {i} of the manual." for i in range(1, 41)]
+    path = make_pdf(texts)
+
+    serial = load_pdf(path)
+    parallel = load_pdf(path, workers=3)
+
+    assert [p.page_no for p in parallel.pages] == list(range(1, 41))
+    assert parallel.pages == serial.pages
+    assert parallel.meta == serial.meta
+    assert parallel.doc_id == serial.doc_id
+    assert parallel.meta["failed_pages"] == ""
+
+def test_load_pdfs_keeps_input_order(make_pdf: MakePdf) -> None:
+    a = make_pdf(["alpha one", "alpha two"], name="a.pdf")
+    b = make_pdf(["beta one"], name="b.pdf")
+
+    docs = load_pdfs([a, b, a], doc_ids=["a", "b", "a2"], workers=2)
+
+    assert [d.doc_id for d in docs] == ["a", "b", "a2"]
+    assert [p.text for p in docs[0].pages] == ["alpha one", "alpha two"]
+    assert [p.text for p in docs[1].pages] == ["beta one"]
+
+def test_page_failure_is_reported_without_dropping_document(make_pdf: MakePdf, monkeypatch: pytest.MonkeyPatch) -> None:
+    def flaky(text: str) -> str:
+        if "broken" in text:
+            raise RuntimeError("bad glyphs")
+        return normalize_text(text)
+
+    monkeypatch.setattr(pdf_reader, "normalize_text", flaky)
+    doc = load_pdf(make_pdf(["fine page", "broken page", "another fine page"]))
+
+    assert [p.text for p in doc.pages] == ["fine page", "", "another fine page"]
+    assert doc.pages[1].error is not None and "bad glyphs" in doc.pages[1].error
+    assert doc.meta["failed_pages"] == "2"
+
+def test_page_range_tasks_reuse_one_reader_per_file(make_pdf: MakePdf, monkeypatch: pytest.MonkeyPatch) -> None:
+    opened: List[str] = []
+
+    def counting_reader(path: str) -> PdfReader:
+        opened.append(path)
+        return PdfReader(path)
+
+    monkeypatch.setattr(pdf_reader, "PdfReader", counting_reader)
+    monkeypatch.setattr(pdf_reader, "_READERS", OrderedDict())
+    path = str(make_pdf([f"page {i}" for i in range(1, 9)]))
+
+    pages = [r for start in range(0, 8, 2) for r in pdf_reader._extract_page_range(path, start, start + 2)]
+
+    assert [p[2] for p in pages] == [f"page {i}" for i in range(1, 9)]
+    assert opened == [path]
+
+    make_pdf(["rewritten"])  # same path, new file: not served from the cache
+    assert pdf_reader._extract_page_range(path, 0, 1)[0][2] == "rewritten"
+    assert len(opened) == 2
@@ -0,0 +1,40 @@
+import hashlib
+from pathlib import Path
+from typing import Callable
+
+from services.ingest.chunk.pager import concat_pages
+from services.ingest.normalize.cleaner import normalize_text
+from services.ingest.pdf_reader import iter_pdf_pages, load_pdf
+
+MakePdf = Callable[..., Path]
+
+def test_stream_matches_load_pdf(make_pdf: MakePdf) -> None:
+    path = make_pdf([f"Streaming page {i}" for i in range(1, 6)])
+    doc = load_pdf(path)
+
+    stream = iter_pdf_pages(path, keep_raw=False)
+    pages = list(stream)
+
+    assert stream.doc_id == doc.doc_id
+    assert stream.content_hash == doc.content_hash
+    assert [p.text for p in pages] == [p.text for p in doc.pages]
+    assert all(p.raw_text == "" for p in pages)
+    assert stream.meta["normalized_hash"] == doc.meta["normalized_hash"]
+    assert stream.meta["title"] == doc.meta["title"]
+
+def test_concat_pages_consumes_stream(make_pdf: MakePdf) -> None:
+    path = make_pdf(["first page text", "second page text"])
+
+    assert concat_pages(iter_pdf_pages(path).pages) == concat_pages(load_pdf(path).pages)
+
+def test_normalized_hash_keeps_its_definition(make_pdf: MakePdf) -> None:
+    # Hash of the page texts normalized once more, as stored by earlier releases
+    path = make_pdf(["Hash  me", "and\tme too"])
+    doc = load_pdf(path)
+    expected = hashlib.sha256("\n\n".join(normalize_text(p.text) for p in doc.pages).encode("utf-8")).hexdigest()
+
+    assert doc.meta["normalized_hash"] == expected
+    stream = iter_pdf_pages(path)
+    list(stream)
+    assert stream.meta["normalized_hash"] == expected
+    assert load_pdf(path, workers=2).meta["normalized_hash"] == expected
@@ -0,0 +1,52 @@
+import os
+from functools import partial
+from typing import List, cast
+
+import numpy as np
+import numpy.typing as npt
+import pytest
+
+from services.ingest.embed.pool_embedder import ProcessPoolEmbedder
+
+# In a worker this module is imported while the initializer is unpickled, i.e. at
+# the same point numpy is, so this is the value BLAS saw when it loaded
+_OMP_AT_IMPORT = int(os.environ.get("OMP_NUM_THREADS", "0"))
+
+class PidEmbedder:
+
+    def __init__(self, dim: int) -> None:
+        self.model_name = "fake/pid"
+        self.dimension = dim
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        return cast(List[List[float]], self.embed_array(texts).tolist())
+
+    def embed_array(self, texts: List[str]) -> npt.NDArray[np.float32]:
+        import time
+        time.sleep(0.02)  # long enough that one worker cannot drain the queue alone
+        out = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        out[:, 0] = [len(t) for t in texts]
+        out[:, 1] = os.getpid()
+        out[:, 2] = _OMP_AT_IMPORT
+        return out
+
+def test_pool_preserves_input_order() -> None:
+    texts = ["x" * n for n in range(1, 41)]
+    with ProcessPoolEmbedder(workers=2, batch_size=4, embedder_factory=partial(PidEmbedder, 3)) as emb:
+        assert (emb.model_name, emb.dimension) == ("fake/pid", 3)
+        arr = emb.embed_array(texts)
+        assert emb.embed_array([]).shape == (0, 3)
+
+    assert arr.shape == (40, 3)
+    assert arr[:, 0].tolist() == [float(n) for n in range(1, 41)]
+    assert len(set(arr[:, 1].tolist())) == 2  # both workers did some of the batches
+
+def test_thread_env_is_set_at_spawn_not_in_parent(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("OMP_NUM_THREADS", "7")
+    monkeypatch.delenv("MKL_NUM_THREADS", raising=False)
+    with ProcessPoolEmbedder(workers=2, threads_per_worker=3, embedder_factory=partial(PidEmbedder, 3)) as emb:
+        arr = emb.embed_array(["a", "b", "c", "d"])
+
+    assert set(arr[:, 2].tolist()) == {3.0}
+    assert os.environ["OMP_NUM_THREADS"] == "7"
+    assert "MKL_NUM_THREADS" not in os.environ
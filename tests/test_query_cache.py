@@ -0,0 +1,89 @@
+from pathlib import Path
+from typing import List, cast
+
+import numpy as np
+import numpy.typing as npt
+import pytest
+from qdrant_client import QdrantClient
+
+from services.ingest.index import CollectionSpec, ensure_collection, upsert_embedded_chunks
+from services.retriever import QueryEmbeddingCache, RetrievalQuery, Retriever, query_namespace
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+class CountingEmbedder:
+    model_name = "fake/count"
+    dimension = 2
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        return cast(List[List[float]], self.embed_array(texts).tolist())
+
+    def embed_array(self, texts: List[str]) -> npt.NDArray[np.float32]:
+        self.calls += 1
+        return np.asarray([[1.0, float(len(t))] for t in texts], dtype=np.float32).reshape(len(texts), 2)
+
+def test_lru_eviction_ttl_and_counters() -> None:
+    clock = FakeClock()
+    cache = QueryEmbeddingCache(max_entries=2, ttl_s=60, clock=clock)
+    cache.put("a", np.array([1.0, 0.0]))
+    cache.put("b", np.array([0.0, 1.0]))
+    assert cache.get("a") is not None        # "a" is now most recently used
+    cache.put("c", np.array([1.0, 1.0]))     # evicts "b"
+    assert cache.get("b") is None
+
+    clock.now += 61
+    assert cache.get("a") is None            # expired
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 2, "evictions": 1}
+
+def test_persisted_cache_reloads_for_same_namespace(tmp_path: Path) -> None:
+    path = tmp_path / "qcache.npz"
+    cache = QueryEmbeddingCache(path=path, namespace="model-a")
+    for i in range(5):
+        cache.put(f"q{i}", np.full(3, i, dtype=np.float32))
+    cache.save()
+
+    reloaded = QueryEmbeddingCache(max_entries=3, path=path, namespace="model-a")
+    assert len(reloaded) == 3 and reloaded.get("q1") is None   # oldest entries dropped first
+    np.testing.assert_array_equal(reloaded.get("q4"), np.full(3, 4, dtype=np.float32))
+
+    with pytest.raises(ValueError, match="model-a"):
+        QueryEmbeddingCache(path=path, namespace="model-b")
+
+def test_namespace_defaults_to_embedder_model_and_variant(tmp_path: Path) -> None:
+    path = tmp_path / "qcache.npz"
+    embedder = CountingEmbedder()
+    cache = QueryEmbeddingCache(path=path, embedder=embedder)
+    assert cache.namespace == query_namespace(embedder) == "fake/count|sbert"
+    cache.put("q", np.ones(2, dtype=np.float32))
+    cache.save()
+    assert len(QueryEmbeddingCache(path=path, embedder=CountingEmbedder())) == 1
+
+    int8 = CountingEmbedder()
+    int8.variant = "onnx-int8"  # type: ignore[attr-defined]
+    with pytest.raises(ValueError, match="onnx-int8"):
+        QueryEmbeddingCache(path=path, embedder=int8)
+
+def test_retriever_skips_model_for_repeated_queries() -> None:
+    client = QdrantClient(":memory:")
+    ensure_collection(client, CollectionSpec(name="qc", vector_size=2))
+    upsert_embedded_chunks(client, "qc", [
+        {"doc_id": "d", "chunk_index": 0, "vector": [1.0, 0.5], "payload": {"text": "hello"}},
+    ])
+    embedder = CountingEmbedder()
+    retriever = Retriever(qdrant=client, embedder=embedder, collection_name="qc", query_cache=QueryEmbeddingCache())
+
+    for text in ["what is this?", "  what   is\nthis? ", "what is this?"]:
+        hits = retriever.retrieve(RetrievalQuery(text=text))
+        assert [h.text for h in hits] == ["hello"]
+
+    assert embedder.calls == 1  # whitespace variants normalize to the same key
+    assert retriever.query_cache is not None
+    assert (retriever.query_cache.hits, retriever.query_cache.misses) == (2, 1)
@@ -0,0 +1,67 @@
+from pathlib import Path
+from typing import Any, Callable
+
+from qdrant_client import QdrantClient
+
+from services.ingest.index import ChunkTextStore, CollectionSpec, ensure_collection, upsert_embedded_chunks
+from services.retriever import QueryEmbeddingCache, RetrievalQuery, Retriever
+
+MakeEmbedder = Callable[..., Any]
+
+
+class CountingClient:
+    def __init__(self, inner: QdrantClient) -> None:
+        self._inner = inner
+        self.batch_calls = 0
+
+    def query_batch_points(self, **kwargs):  # type: ignore[no-untyped-def]
+        self.batch_calls += 1
+        return self._inner.query_batch_points(**kwargs)
+
+def _setup(tmp_path: Path, make_keyword_embedder: MakeEmbedder) -> tuple[QdrantClient, ChunkTextStore]:
+    client = QdrantClient(":memory:")
+    ensure_collection(client, CollectionSpec(name="many", vector_size=3))
+    store = ChunkTextStore(tmp_path / "texts.sqlite")
+    embedder = make_keyword_embedder()
+    items = []
+    for doc_id, texts in {"pets": ["cat naps", "dog walks"], "food": ["pizza night", "cat food"]}.items():
+        for i, (t, v) in enumerate(zip(texts, embedder.embed_array(texts))):
+            items.append({"doc_id": doc_id, "chunk_index": i, "vector": v.tolist(), "payload": {"text": t}})
+    upsert_embedded_chunks(client, "many", items, text_store=store)
+    return client, store
+
+def test_retrieve_many_matches_retrieve(tmp_path: Path, make_keyword_embedder: MakeEmbedder) -> None:
+    client, store = _setup(tmp_path, make_keyword_embedder)
+    counting = CountingClient(client)
+    embedder = make_keyword_embedder()
+    retriever = Retriever(qdrant=client, embedder=embedder, collection_name="many", text_store=store)
+    batched = Retriever(qdrant=counting, embedder=embedder, collection_name="many", text_store=store)  # type: ignore[arg-type]
+
+    queries = [
+        RetrievalQuery(text="cat", top_k=2),
+        RetrievalQuery(text="cat", top_k=1, doc_id="food"),
+        RetrievalQuery(text="pizza please", top_k=1),
+        RetrievalQuery(text="  cat ", top_k=3, doc_id="pets"),
+    ]
+    embedder.batches.clear()
+    results = batched.retrieve_many(queries)
+
+    assert counting.batch_calls == 1
+    assert embedder.batches == [["cat", "pizza please"]]  # one forward pass over distinct queries
+    assert [[(h.doc_id, h.text) for h in r] for r in results] == [
+        [(h.doc_id, h.text) for h in retriever.retrieve(q)] for q in queries
+    ]
+    assert [(h.doc_id, h.text) for h in results[1]] == [("food", "cat food")]
+    assert len(results[3]) == 2 and {h.doc_id for h in results[3]} == {"pets"}
+    assert batched.retrieve_many([]) == []
+
+def test_retrieve_many_uses_query_cache(tmp_path: Path, make_keyword_embedder: MakeEmbedder) -> None:
+    client, store = _setup(tmp_path, make_keyword_embedder)
+    embedder = make_keyword_embedder()
+    cache = QueryEmbeddingCache()
+    retriever = Retriever(qdrant=client, embedder=embedder, collection_name="many", text_store=store, query_cache=cache)
+
+    retriever.retrieve(RetrievalQuery(text="dog"))
+    retriever.retrieve_many([RetrievalQuery(text="dog"), RetrievalQuery(text="pizza")])
+
+    assert embedder.batches == [["dog"], ["pizza"]]
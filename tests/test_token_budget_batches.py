@@ -0,0 +1,53 @@
+from typing import Any, Dict, List
+
+import numpy as np
+import numpy.typing as npt
+
+from services.ingest.embed.sbert_embedder import SentenceTransformerEmbedder, _token_budget_batches
+
+def test_batches_respect_padded_budget_and_cover_all() -> None:
+    lengths = [40, 900, 35, 870, 50, 10, 1200, 60]
+
+    batches = _token_budget_batches(lengths, max_batch_tokens=2000)
+
+    assert sorted(i for b in batches for i in b) == list(range(len(lengths)))
+    for b in batches:
+        assert len(b) == 1 or max(lengths[i] for i in b) * len(b) <= 2000
+    # long texts are not padded together with short ones
+    assert [6] in batches
+    assert any(set(b) >= {0, 2, 4, 5, 7} for b in batches)
+
+def test_batch_size_cap() -> None:
+    batches = _token_budget_batches([5] * 10, max_batch_tokens=10_000, max_batch_size=4)
+    assert [len(b) for b in batches] == [4, 4, 2]
+
+class _FakeTokenizer:
+    def __call__(self, texts: List[str], **kwargs: Any) -> Dict[str, List[List[int]]]:
+        return {"input_ids": [[0] * len(t.split()) for t in texts]}
+
+class _FakeModel:
+    """Encodes a text as [word count, text id]; records the batches it is given."""
+    tokenizer = _FakeTokenizer()
+    max_seq_length = 512
+
+    def __init__(self) -> None:
+        self.batches: List[List[str]] = []
+
+    def encode(self, batch: List[str], **kwargs: Any) -> npt.NDArray[np.float32]:
+        self.batches.append(batch)
+        return np.asarray([[len(t.split()), int(t.split()[0][1:])] for t in batch], dtype=np.float32)
+
+def test_embed_array_returns_rows_in_input_order() -> None:
+    # No model download: bypass __init__ and plug in a fake SentenceTransformer
+    model = _FakeModel()
+    embedder = object.__new__(SentenceTransformerEmbedder)
+    embedder.__dict__.update(_model=model, _dim=2, _normalize=False, _max_batch_tokens=100, _batch_size=64)
+
+    word_counts = [3, 40, 5, 38, 1, 60, 4, 45, 2]
+    texts = [" ".join([f"t{i}"] + ["w"] * (n - 1)) for i, n in enumerate(word_counts)]
+    out = embedder.embed_array(texts)
+
+    assert len(model.batches) > 2
+    assert model.batches[0] == [texts[5]]  # encoded longest first, not in input order
+    np.testing.assert_array_equal(out[:, 1], np.arange(len(texts)))
+    np.testing.assert_array_equal(out[:, 0], word_counts)